@@ -1,6 +1,13 @@
 from typing import Self
+import random
+import time
+import pygame
+from PerformanceHelperFunctions.Metrics import METRICS
+from Games.SnakeGameLogic import DEFAULT_ROWS, DEFAULT_COLS
+from Games.Maps import make_map
 
 default_screen_width = 600
+default_aspect_ratio = 4/3
 
 class GameManager:
     _instance = None
@@ -9,16 +16,156 @@ class GameManager:
         if cls._instance is None:
             cls._instance = super(GameManager, cls).__new__(cls)
             cls._instance.scene = None
+            cls._instance.screen_width = default_screen_width
+            # (rows, cols) of the boards new game scenes are created with; chosen in the main menu or on the
+            # command line.
+            cls._instance.board_size = (DEFAULT_ROWS, DEFAULT_COLS)
+            # The walls of those boards: map_kind is "none", a generator ("maze", "rooms") or a map file, and
+            # game_map the Games.Maps.GameMap built from it (None for an open board). The map's size is kept
+            # equal to board_size.
+            cls._instance.map_kind = "none"
+            cls._instance.map_seed = None
+            cls._instance.game_map = None
+            # Where games started from now on record their episodes (Games.EpisodeRecord.REPLAY_DIRECTORY when
+            # recording is on), or None.
+            cls._instance.replay_directory = None
+            # The agents of the arena's snakes (names from Games.ArenaAgents.ARENA_AGENTS), and where they run.
+            cls._instance.arena_agents = ("human", "a_star", "hamiltonian", "rl")
+            cls._instance.arena_parallel = "auto"
+            cls._instance.arena_workers = None
+            cls._instance.metrics = METRICS
+            # A RenderModes.FrameExporter.SceneCapture exporting every frame's board, or None.
+            cls._instance.frame_capture = None
+            cls._instance.overlay = None  # Created by run(), once pygame is initialized.
         return cls._instance
 
     def initialize(self: Self, initial_scene, width = default_screen_width) -> Self:
         if self.scene is None:  # Only initialize if not already initialized
+            self.screen_width = width
             self.scene = initial_scene
             self.scene.set_game_manager(self)
             self.scene.set_scale(width)
         return self
 
-    def changeScene(self: Self, scene, width = default_screen_width):
+    def select_map(self: Self, kind: str, seed: int = None):
+        """Builds the map new games are played on (see Games.Maps.make_map). A map file sets the board size."""
+        if seed is None:
+            # Keep the seed, so the same map is generated again when the board size changes.
+            seed = random.getrandbits(32)
+        self.game_map = make_map(kind, *self.board_size, seed)
+        self.map_kind = kind
+        self.map_seed = seed
+        if self.game_map is not None:
+            self.board_size = (self.game_map.rows, self.game_map.cols)
+
+    def changeScene(self: Self, scene, width = None):
+        # New scenes are laid out for the current window rather than the default one.
+        if width is not None:
+            self.screen_width = width
         self.scene = scene
         self.scene.set_game_manager(self)
-        self.scene.set_scale(width)
+        self.scene.set_scale(self.screen_width)
+        # Metrics describe the scene on screen; export them (F4) before switching to keep them.
+        self.metrics.reset()
+
+    def dispatch_event(self: Self, event) -> bool:
+        """
+        Routes a pygame event to the active scene.
+        A VIDEORESIZE rescales the scene, which is the only thing that invalidates its cached layout.
+        F3 and F4 are reserved for the metrics overlay and export.
+        """
+        if event.type == pygame.VIDEORESIZE:
+            self.screen_width = event.w
+            self.scene.set_scale(event.w)
+            return True
+        if event.type == pygame.KEYDOWN and self.overlay is not None:
+            if event.key == pygame.K_F3:
+                self.overlay.toggle()
+                return True
+            if event.key == pygame.K_F4:
+                path = self.export_metrics()
+                self.overlay.notify(f"Exported {path}")
+                print(f"Metrics exported to {path}")
+                return True
+        return self.scene.handle_event(event)
+
+    def export_metrics(self: Self, path: str = None) -> str:
+        return self.metrics.export(path, context={"scene": type(self.scene).__name__,
+                                                  "screen_width": self.screen_width})
+
+    def run(self: Self, screen: pygame.Surface, aspect_ratio = default_aspect_ratio, fps = 60, max_frames = None,
+            fixed_dt = None, profiler = None):
+        """
+        Runs the main loop until the window is closed. Each phase of every frame (event handling, the
+        scene's input, simulation and rendering, the display flip and the frame-rate wait) is timed into
+        the frame.* histograms of METRICS.
+
+        Headless runs stop after max_frames and can pass a fixed_dt to every scene instead of the measured
+        frame time (0 makes the agent scenes take one step per frame). fps = 0 doesn't cap the frame rate.
+        A profiler (a PerformanceHelperFunctions.Profiling.ProfileWindow) is stepped once per frame, and
+        frame_capture, if set, is handed the scene after it is rendered.
+        """
+        from UI.MetricsOverlay import MetricsOverlay
+
+        if self.overlay is None:
+            self.overlay = MetricsOverlay()
+        metrics = self.metrics
+        clock = pygame.time.Clock()
+        running = True
+        dt = 0
+        frames = 0
+        if profiler is not None:
+            profiler.step(0)
+
+        while running and (max_frames is None or frames < max_frames):
+            frame_start = time.perf_counter()
+            # poll for events
+            # pygame.QUIT event means the user clicked X to close your window
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.VIDEORESIZE:
+                    screen = pygame.display.set_mode((event.w, event.w * aspect_ratio), pygame.RESIZABLE)
+                # Clicks, key presses and resizes are dispatched to the active scene as they arrive,
+                # independently of the scene's simulation speed.
+                self.dispatch_event(event)
+            events_end = time.perf_counter()
+
+            self.scene.collect_input()
+            input_end = time.perf_counter()
+            self.scene.process_input(dt)
+            process_end = time.perf_counter()
+            self.scene.render_scene(screen)
+            if self.frame_capture is not None:
+                self.frame_capture.capture(self.scene)
+            render_end = time.perf_counter()
+            if self.overlay.visible:
+                self.overlay.draw(screen, metrics)
+            overlay_end = time.perf_counter()
+
+            # flip() the display to put your work on screen
+            pygame.display.flip()
+            flip_end = time.perf_counter()
+
+            # limits FPS
+            # dt is delta time in seconds since last frame, used for framerate-independent physics.
+            dt = clock.tick(fps) / 1000
+            if fixed_dt is not None:
+                dt = fixed_dt
+            frame_end = time.perf_counter()
+
+            metrics.observe("frame.events", (events_end - frame_start) * 1000, "ms")
+            metrics.observe("frame.collect_input", (input_end - events_end) * 1000, "ms")
+            metrics.observe("frame.process_input", (process_end - input_end) * 1000, "ms")
+            metrics.observe("frame.render", (render_end - process_end) * 1000, "ms")
+            metrics.observe("frame.overlay", (overlay_end - render_end) * 1000, "ms")
+            metrics.observe("frame.flip", (flip_end - overlay_end) * 1000, "ms")
+            metrics.observe("frame.idle", (frame_end - flip_end) * 1000, "ms")
+            # Busy time excludes the frame-rate wait, so it shows the headroom left at the target FPS.
+            metrics.observe("frame.busy", (flip_end - frame_start) * 1000, "ms")
+            metrics.count("frames")
+            metrics.tick(frame_end)
+            frames += 1
+            if profiler is not None:
+                profiler.step()
+        self.scene.close()
@@ -0,0 +1,306 @@
+import random
+import time
+from typing import Self
+import numpy as np
+from Games.Maps import cells_by_distance
+from Games.SnakeGameState import (SnakeGameState, neighbor_table, RIGHT, LEFT, DIRECTION_DELTAS, CELL_EMPTY,
+                                  CELL_SNAKE, CELL_FOOD, CELL_OBSTICLE, START_LENGTH, STEP_MOVED, STEP_ATE,
+                                  STEP_DIED)
+
+# Result of ArenaState.step for a snake that was already dead.
+STEP_OUT = -1
+
+# Display codes: the board's cell codes, then one code per snake colour (snake k uses SNAKE_CODE + k % count).
+SNAKE_CODE = 4
+SNAKE_COLORS = ((255, 255, 255), (0, 160, 255), (255, 200, 0), (200, 80, 255),
+                (0, 220, 180), (255, 120, 40), (255, 110, 200), (160, 160, 160))
+
+
+class ArenaState:
+    """
+    Several snakes on one board, moving simultaneously.
+
+    All snakes share one occupancy buffer, cells, with the cell codes of SnakeGameState, and owner records
+    which snake is on each cell. Every snake is a SnakeGameState whose cells is that shared buffer, so the
+    single-snake agents (A*, rollouts, state encoders) work on a snake unchanged and see the other snakes
+    as obstacles. Each snake's food is the food nearest its head.
+
+    A tick resolves all moves at once, independently of the order of the snakes: a head may not enter any
+    cell occupied when the tick starts (tails included, as for a single snake), and heads entering the
+    same cell all die. These rules are checked for all snakes together with NumPy; only moving the
+    survivors' bodies is per snake. Dead snakes are removed from the board.
+    """
+
+    def __init__(self: Self, rows: int, cols: int, snake_count: int, walls: bytes = None, food_count: int = None,
+                 seed=None) -> Self:
+        if snake_count < 1:
+            raise ValueError("An arena needs at least one snake")
+        self.rows = rows
+        self.cols = cols
+        self.capacity = rows * cols
+        self.snake_count = snake_count
+        self.food_count = food_count if food_count is not None else max(1, snake_count // 2)
+        self.neighbors = neighbor_table(rows, cols)
+        self.neighbor_array = np.frombuffer(self.neighbors, dtype=np.int32)
+        self.walls = bytes(walls) if walls is not None else None
+        self.open_cells = self.capacity - (self.walls.count(CELL_OBSTICLE) if self.walls is not None else 0)
+        self.cells = bytearray(self.capacity)
+        self.board = np.frombuffer(self.cells, dtype=np.uint8)
+        self.owner = np.full(self.capacity, -1, dtype=np.int16)
+        self.starts = self.find_starts()
+        self.snakes = []
+        for start_cell, direction in self.starts:
+            snake = SnakeGameState(rows, cols, self.walls, start_cell)
+            snake.cells = self.cells
+            self.snakes.append(snake)
+        self.heads = np.zeros(snake_count, dtype=np.int32)
+        self.alive = np.zeros(snake_count, dtype=bool)
+        self.foods = []
+        self.changed = []  # Cells whose code changed since the list was last cleared.
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.episode_seeds = random.Random(self.seed)
+        self.reset()
+
+    def find_starts(self: Self) -> list[tuple[int, int]]:
+        """
+        Start cells and directions: snakes are spread over evenly spaced rows, alternately heading right from
+        the left quarter and left from the right quarter, each with START_LENGTH free cells ahead of it.
+        """
+        rows, cols = self.rows, self.cols
+        claimed = bytearray(self.walls) if self.walls is not None else bytearray(self.capacity)
+        starts = []
+        for k in range(self.snake_count):
+            direction = RIGHT if k % 2 == 0 else LEFT
+            d_col = DIRECTION_DELTAS[direction][1]
+            row = (k + 1) * rows // (self.snake_count + 1)
+            col = cols // 4 if direction == RIGHT else cols - 1 - cols // 4
+            for cell in cells_by_distance(rows, cols, row, col):
+                lane = [cell + i * d_col for i in range(START_LENGTH)]
+                end_col = cell % cols + (START_LENGTH - 1) * d_col
+                if 0 <= end_col < cols and not any(claimed[c] for c in lane):
+                    break
+            else:
+                raise ValueError(f"No room for {self.snake_count} snakes on a {rows}x{cols} board")
+            for c in lane:
+                claimed[c] = CELL_SNAKE
+            starts.append((cell, direction))
+        return starts
+
+    def reset(self: Self, seed=None):
+        """Puts every snake back on its start cell and places fresh food, drawn from a new episode seed."""
+        self.episode_seed = seed if seed is not None else self.episode_seeds.getrandbits(32)
+        self.rng = random.Random(self.episode_seed)
+        self.cells[:] = self.walls if self.walls is not None else bytes(self.capacity)
+        self.owner.fill(-1)
+        for k, (snake, (start_cell, direction)) in enumerate(zip(self.snakes, self.starts)):
+            snake.body[0] = start_cell
+            snake.tail_slot = 0
+            snake.length = 1
+            snake.head = start_cell
+            snake.direction = direction
+            snake.food = -1
+            snake.score = 0
+            snake.pending_growth = START_LENGTH - 1
+            snake.is_dead = False
+            snake.vacated = -1
+            self.cells[start_cell] = CELL_SNAKE
+            self.owner[start_cell] = k
+            self.heads[k] = start_cell
+        self.alive[:] = True
+        self.foods = []
+        self.ticks = 0
+        self.changed.clear()
+        for _ in range(self.food_count):
+            self.place_food()
+        self.assign_food()
+
+    @property
+    def is_over(self: Self) -> bool:
+        return not self.alive.any()
+
+    def scores(self: Self) -> list[int]:
+        return [snake.score for snake in self.snakes]
+
+    def place_food(self: Self) -> int:
+        """Places one food on a random empty cell and returns it, or -1 if the board has no empty cell left."""
+        cells = self.cells
+        occupied = sum(snake.length for snake in self.snakes if not snake.is_dead) + len(self.foods)
+        # Rejection sampling is fast while the board is mostly empty.
+        if self.open_cells - occupied > self.capacity // 8:
+            while True:
+                cell = self.rng.randint(0, self.rows - 1) * self.cols + self.rng.randint(0, self.cols - 1)
+                if cells[cell] == CELL_EMPTY:
+                    break
+        else:
+            empty = np.flatnonzero(self.board == CELL_EMPTY)
+            if len(empty) == 0:
+                return -1
+            cell = int(empty[self.rng.randint(0, len(empty) - 1)])
+        cells[cell] = CELL_FOOD
+        self.foods.append(cell)
+        self.changed.append(cell)
+        return cell
+
+    def assign_food(self: Self):
+        """Points every snake's food at the food nearest its head (Manhattan distance)."""
+        if not self.foods:
+            for snake in self.snakes:
+                snake.food = -1
+            return
+        foods = np.array(self.foods, dtype=np.int32)
+        food_rows, food_cols = np.divmod(foods, self.cols)
+        head_rows, head_cols = np.divmod(self.heads, self.cols)
+        distances = np.abs(head_rows[:, None] - food_rows) + np.abs(head_cols[:, None] - food_cols)
+        for snake, food in zip(self.snakes, foods[np.argmin(distances, axis=1)].tolist()):
+            snake.food = food
+
+    def step(self: Self, directions) -> np.ndarray:
+        """
+        Moves every living snake one cell in its direction (a sequence of direction codes, one per snake;
+        those of dead snakes are ignored). Returns each snake's STEP_MOVED, STEP_ATE or STEP_DIED, or STEP_OUT
+        for snakes that were already dead.
+        """
+        directions = np.asarray(directions, dtype=np.int32)
+        alive = self.alive
+        # The collision pass, for all snakes at once.
+        new_heads = self.neighbor_array[(self.heads << 2) + directions]
+        new_heads[~alive] = -1
+        targets = self.board[np.maximum(new_heads, 0)]
+        moving = alive & (new_heads >= 0) & (targets != CELL_SNAKE) & (targets != CELL_OBSTICLE)
+        if np.count_nonzero(moving) > 1:
+            entered, counts = np.unique(new_heads[moving], return_counts=True)
+            clashes = entered[counts > 1]
+            if len(clashes):
+                moving &= ~np.isin(new_heads, clashes)
+        ate = moving & (targets == CELL_FOOD)
+        died = alive & ~moving
+        results = np.where(moving, np.where(ate, STEP_ATE, STEP_MOVED), np.where(died, STEP_DIED, STEP_OUT))
+
+        # Moving the survivors. Same body bookkeeping as SnakeGameState.advance, without its checks.
+        cells = self.cells
+        owner = self.owner
+        changed = self.changed
+        ate_flags = ate.tolist()
+        for k in np.flatnonzero(moving).tolist():
+            snake = self.snakes[k]
+            new_head = int(new_heads[k])
+            snake.direction = int(directions[k])
+            snake.vacated = -1
+            if ate_flags[k]:
+                snake.score += 1
+                self.foods.remove(new_head)
+            elif snake.pending_growth > 0:
+                snake.pending_growth -= 1
+            else:
+                tail = snake.body[snake.tail_slot]
+                cells[tail] = CELL_EMPTY
+                owner[tail] = -1
+                changed.append(tail)
+                snake.vacated = tail
+                snake.tail_slot += 1
+                if snake.tail_slot == snake.capacity:
+                    snake.tail_slot = 0
+                snake.length -= 1
+            head_slot = snake.tail_slot + snake.length
+            if head_slot >= snake.capacity:
+                head_slot -= snake.capacity
+            snake.body[head_slot] = new_head
+            snake.length += 1
+            snake.head = new_head
+            cells[new_head] = CELL_SNAKE
+            owner[new_head] = k
+            changed.append(new_head)
+
+        for k in np.flatnonzero(died).tolist():
+            snake = self.snakes[k]
+            snake.is_dead = True
+            for cell in snake.body_cells():
+                cells[cell] = CELL_EMPTY
+                owner[cell] = -1
+                changed.append(cell)
+
+        self.heads[moving] = new_heads[moving]
+        alive &= ~died
+        for _ in range(int(np.count_nonzero(ate))):
+            self.place_food()
+        self.assign_food()
+        self.ticks += 1
+        return results
+
+
+class ArenaGame:
+    """
+    An ArenaState with what scenes and the BoardRenderer need: display_cells, a copy of the board where
+    every snake has its own colour code (see SNAKE_CODE), the cells changed since the renderer last looked,
+    the snake the view follows (state) and best scores over the rounds played.
+    """
+
+    def __init__(self: Self, rows: int, cols: int, snake_count: int, game_map=None, food_count: int = None,
+                 seed=None) -> Self:
+        if game_map is not None:
+            rows, cols = game_map.rows, game_map.cols
+        self.rows, self.cols = rows, cols
+        self.game_map = game_map
+        self.arena = ArenaState(rows, cols, snake_count, game_map.walls if game_map is not None else None,
+                                food_count, seed)
+        self.state = self.arena.snakes[0]
+        self.display_cells = bytearray(self.arena.capacity)
+        self.changed_cells = []
+        self.redraw_all = True
+        self.high_scores = [0] * snake_count
+        self.rounds = 0
+        self.sync_display()
+        self.start_time = time.time()
+
+    @property
+    def is_dead(self: Self) -> bool:
+        return self.arena.is_over
+
+    def display_code(self: Self, cell: int) -> int:
+        code = self.arena.cells[cell]
+        if code == CELL_SNAKE:
+            return SNAKE_CODE + self.arena.owner[cell] % len(SNAKE_COLORS)
+        return code
+
+    def sync_display(self: Self):
+        """Rebuilds display_cells from the arena."""
+        board = self.arena.board
+        display = np.where(board == CELL_SNAKE, SNAKE_CODE + self.arena.owner % len(SNAKE_COLORS), board)
+        self.display_cells[:] = display.astype(np.uint8).tobytes()
+        self.arena.changed.clear()
+        self.changed_cells.clear()
+        self.redraw_all = True
+
+    def step(self: Self, directions) -> np.ndarray:
+        results = self.arena.step(directions)
+        display = self.display_cells
+        for cell in self.arena.changed:
+            display[cell] = self.display_code(cell)
+        self.changed_cells.extend(self.arena.changed)
+        self.arena.changed.clear()
+        if len(self.changed_cells) > self.arena.capacity:
+            self.changed_cells.clear()
+            self.redraw_all = True
+        for k, snake in enumerate(self.arena.snakes):
+            if snake.score > self.high_scores[k]:
+                self.high_scores[k] = snake.score
+        return results
+
+    def reset(self: Self, seed=None):
+        self.arena.reset(seed)
+        self.rounds += 1
+        self.sync_display()
+        self.start_time = time.time()
+
+    def get_elapsed_time(self: Self) -> float:
+        return time.time() - self.start_time
+
+    def take_changed_cells(self: Self) -> list[int] | None:
+        """Same as SnakeGame.take_changed_cells."""
+        if self.redraw_all:
+            self.redraw_all = False
+            self.changed_cells.clear()
+            return None
+        changed = self.changed_cells
+        self.changed_cells = []
+        return changed
@@ -0,0 +1,272 @@
+import os
+import random
+import signal
+from array import array
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ThreadPoolExecutor
+from typing import Self
+import numpy as np
+from Games.Arena import ArenaState
+from Games.SnakeGameState import SnakeGameState
+from GraphHelperFunctions.Hamiltonian import find_hamiltonian_cycle_on_map
+from SearchHelperFunctions.GridAStar import find_path, direction_towards
+from SearchHelperFunctions.RolloutPolicies import GreedyRollout, safe_directions
+
+# Where an arena's agents compute their moves; see ArenaController.
+PARALLEL_MODES = ("auto", "serial", "threads", "processes")
+
+
+class HumanArenaAgent:
+    """Moves in the direction last set by the scene from the keyboard."""
+    name = "human"
+    local = True  # Input arrives in the scene's process, so this agent can't run in a worker.
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, seed: int) -> Self:
+        self.direction = None
+
+    def choose(self: Self, state: SnakeGameState) -> int:
+        return self.direction if self.direction is not None else state.direction
+
+
+class GreedyArenaAgent:
+    """The greedy rollout policy: the safe move closest to the food."""
+    name = "greedy"
+    local = False
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, seed: int) -> Self:
+        self.policy = GreedyRollout()
+        self.rng = random.Random(seed)
+
+    def choose(self: Self, state: SnakeGameState) -> int:
+        return self.policy.choose(state, self.rng)
+
+
+class AStarArenaAgent:
+    """
+    Follows an A* path to its food, replanned every tick since the other snakes move. Without a path it
+    chases its own tail, and failing that takes any safe move.
+    """
+    name = "a_star"
+    local = False
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, seed: int) -> Self:
+        pass
+
+    def choose(self: Self, state: SnakeGameState) -> int:
+        for goal in (state.food, state.body_cell(0)):
+            if goal >= 0 and goal != state.head:
+                path = find_path(state, state.head, goal)
+                if path:
+                    return direction_towards(state, path[0])
+        options = safe_directions(state)
+        return options[0] if options else state.direction
+
+
+# Successor tables of the Hamiltonian cycle, shared by the agents on the same board and walls.
+_cycle_successors = {}
+
+class HamiltonianArenaAgent:
+    """
+    Follows the board's Hamiltonian cycle (around the map's walls, if any). Another snake can sit on the
+    cycle ahead; the agent then steps off onto any safe cell and follows the cycle again from there.
+    """
+    name = "hamiltonian"
+    local = False
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, seed: int) -> Self:
+        key = (rows, cols, walls)
+        self.successors = _cycle_successors.get(key)
+        if self.successors is None:
+            self.successors = array('i', [-1]) * (rows * cols)
+            cycle = find_hamiltonian_cycle_on_map(walls, rows, cols) or []
+            for index, (row, col) in enumerate(cycle):
+                next_row, next_col = cycle[(index + 1) % len(cycle)]
+                self.successors[row * cols + col] = next_row * cols + next_col
+            _cycle_successors[key] = self.successors
+
+    def choose(self: Self, state: SnakeGameState) -> int:
+        next_cell = self.successors[state.head]
+        if next_cell >= 0 and not state.is_blocked(next_cell):
+            return direction_towards(state, next_cell)
+        options = safe_directions(state)
+        return options[0] if options else state.direction
+
+
+class TabularArenaAgent:
+    """
+    The tabular RL agent's greedy policy, from the Q-table the RL scene saves for this board size (read-only,
+    memory-mapped). Without a saved table it plays an untrained one.
+    """
+    name = "rl"
+    local = False
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, seed: int) -> Self:
+        from ModelHelperFunctions.QTable import QTable
+        from ModelHelperFunctions.StateEncoders import STATE_ENCODERS
+        from Scenes.SnakeGameRLAgent import STATE_ENCODER, Q_TABLE_PATH
+
+        encoder = STATE_ENCODERS[STATE_ENCODER](rows, cols)
+        path = Q_TABLE_PATH.format(encoder=encoder.name)
+        self.q_table = None
+        if os.path.exists(path):
+            try:
+                self.q_table = QTable.load(path, rows, cols, mmap_mode="r", encoder=encoder)
+            except ValueError as error:
+                print(f"Arena RL agent starts untrained: {error}")
+        if self.q_table is None:
+            self.q_table = QTable(rows, cols, encoder=encoder)
+
+    def choose(self: Self, state: SnakeGameState) -> int:
+        row, symmetry = self.q_table.encode_state(state)
+        action = int(np.argmax(self.q_table.values[row]))
+        return int(self.q_table.encoder.action_from_canonical[symmetry, action])
+
+
+ARENA_AGENTS = {
+    HumanArenaAgent.name: HumanArenaAgent,
+    GreedyArenaAgent.name: GreedyArenaAgent,
+    AStarArenaAgent.name: AStarArenaAgent,
+    HamiltonianArenaAgent.name: HamiltonianArenaAgent,
+    TabularArenaAgent.name: TabularArenaAgent,
+}
+
+
+class ArenaController:
+    """
+    Computes the moves of an arena's snakes for every tick, with one agent per snake (names from ARENA_AGENTS).
+
+    parallel picks where the agents run:
+        "serial": one after the other, in this thread.
+        "threads": on a thread pool. The agents here are pure Python, so threads take turns on the GIL; this
+            pays off for agents that release it (NumPy or torch heavy ones).
+        "processes": on worker processes, each owning a share of the snakes and their agents. The board is
+            copied into shared memory once per tick and only the snakes' bodies are sent over pipes, so
+            this scales with the number of cores.
+        "auto": processes when there are several cores and several agents to spread, otherwise serial.
+    Human agents always run in this process, where the keyboard input arrives.
+    """
+
+    def __init__(self: Self, arena: ArenaState, agent_names: list[str], parallel: str = "auto", workers: int = None,
+                 seed=None) -> Self:
+        if len(agent_names) != arena.snake_count:
+            raise ValueError(f"{len(agent_names)} agents for {arena.snake_count} snakes")
+        unknown = [name for name in agent_names if name not in ARENA_AGENTS]
+        if unknown:
+            raise ValueError(f"Unknown arena agents {unknown}, expected some of {list(ARENA_AGENTS)}")
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"Unknown parallel mode {parallel!r}, expected one of {PARALLEL_MODES}")
+        self.arena = arena
+        self.agent_names = list(agent_names)
+        rng = random.Random(seed)
+        self.seeds = [rng.getrandbits(32) for _ in agent_names]
+        remote = [k for k, name in enumerate(agent_names) if not ARENA_AGENTS[name].local]
+        cores = os.cpu_count() or 1
+        if parallel == "auto":
+            parallel = "processes" if cores > 1 and len(remote) > 1 else "serial"
+        self.parallel = parallel
+        self.workers = []
+        self.executor = None
+        self.shared_memory = None
+
+        if parallel == "processes" and remote:
+            # Agents of worker processes live there; only the local ones are built here.
+            self.agents = [self.make_agent(k) if k not in remote else None for k in range(arena.snake_count)]
+            self.shared_memory = SharedMemory(create=True, size=arena.capacity)
+            count = max(1, min(workers or cores, len(remote)))
+            for w in range(count):
+                assigned = [(k, agent_names[k], self.seeds[k]) for k in remote[w::count]]
+                connection, worker_connection = Pipe()
+                process = Process(target=arena_worker, daemon=True,
+                                  args=(worker_connection, self.shared_memory.name, arena.rows, arena.cols,
+                                        arena.walls, assigned))
+                process.start()
+                worker_connection.close()
+                self.workers.append((connection, process, [k for k, _, _ in assigned]))
+        else:
+            self.agents = [self.make_agent(k) for k in range(arena.snake_count)]
+            if parallel == "threads":
+                self.executor = ThreadPoolExecutor(max_workers=workers or cores)
+
+    def make_agent(self: Self, k: int):
+        return ARENA_AGENTS[self.agent_names[k]](self.arena.rows, self.arena.cols, self.arena.walls, self.seeds[k])
+
+    def human_agents(self: Self) -> list[HumanArenaAgent]:
+        return [agent for agent in self.agents if isinstance(agent, HumanArenaAgent)]
+
+    def choose_directions(self: Self) -> list[int]:
+        """The direction of every snake for the next tick (that of a dead snake is its last one)."""
+        snakes = self.arena.snakes
+        directions = [snake.direction for snake in snakes]
+        if self.workers:
+            self.shared_memory.buf[:self.arena.capacity] = self.arena.cells
+            for connection, _, assigned in self.workers:
+                connection.send([(k, snakes[k].head, snakes[k].direction, snakes[k].food,
+                                  array('i', snakes[k].body_cells())) for k in assigned if not snakes[k].is_dead])
+        local = [k for k, agent in enumerate(self.agents) if agent is not None and not snakes[k].is_dead]
+        if self.executor is not None:
+            futures = [(k, self.executor.submit(self.agents[k].choose, snakes[k])) for k in local]
+            for k, future in futures:
+                directions[k] = future.result()
+        else:
+            for k in local:
+                directions[k] = self.agents[k].choose(snakes[k])
+        for connection, _, _ in self.workers:
+            for k, direction in connection.recv():
+                directions[k] = direction
+        return directions
+
+    def close(self: Self):
+        """Stops the worker processes or threads and frees the shared board."""
+        for connection, process, _ in self.workers:
+            connection.send(None)
+            connection.close()
+            process.join(timeout=5)
+        self.workers = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.shared_memory is not None:
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+            self.shared_memory = None
+
+
+def arena_worker(connection, memory_name: str, rows: int, cols: int, walls: bytes, assigned: list):
+    """
+    Worker process of ArenaController: keeps a SnakeGameState per assigned snake over the shared board and
+    answers every list of (snake, head, direction, food, body cells) with the agents' (snake, direction).
+    """
+    # Workers are forked from a process running pygame, whose SIGTERM handler only posts a quit event; restore
+    # the default so terminating the worker stops it. Ctrl+C is handled by the scene's process.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    memory = SharedMemory(name=memory_name)
+    states = {}
+    agents = {}
+    for k, name, seed in assigned:
+        states[k] = SnakeGameState(rows, cols, walls)
+        states[k].cells = memory.buf
+        agents[k] = ARENA_AGENTS[name](rows, cols, walls, seed)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            replies = []
+            for k, head, direction, food, body in message:
+                state = states[k]
+                state.body[:len(body)] = body
+                state.tail_slot = 0
+                state.length = len(body)
+                state.head = head
+                state.direction = direction
+                state.food = food
+                replies.append((k, agents[k].choose(state)))
+            connection.send(replies)
+    except EOFError:
+        pass
+    finally:
+        for state in states.values():
+            state.cells = None
+        memory.close()
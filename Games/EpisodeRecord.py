@@ -0,0 +1,156 @@
+from array import array
+from typing import Self
+import json
+import os
+import random
+import struct
+import zlib
+from Games.Maps import GameMap
+from Games.SnakeGameState import SnakeGameState, STEP_ATE, STEP_DIED
+
+# Where recorded episodes are written (see SnakeGame's replay_directory) and the extension of the binary format.
+REPLAY_DIRECTORY = os.path.join("SaveData", "replays")
+REPLAY_EXTENSION = ".replay"
+
+# Binary replay layout: this header, the seed as decimal text, the map name and text (both empty for an open
+# board), then the zlib-compressed action stream with four 2-bit direction codes per byte.
+REPLAY_MAGIC = b"SNKR"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sBIIIHHI")
+
+
+def pack_actions(actions: array) -> bytes:
+    """
+    Packs direction codes (0-3) four to a byte, the first in the lowest bits. Each of the four interleaved
+    byte strings is read as one integer and shifted into place; no code reaches the next byte, so the whole
+    stream is packed with four big-integer operations instead of a loop per action.
+    """
+    codes = bytes(actions) + bytes(-len(actions) % 4)
+    count = len(codes) // 4
+    packed = 0
+    for offset in range(4):
+        packed |= int.from_bytes(codes[offset::4], "little") << (2 * offset)
+    return packed.to_bytes(count, "little")
+
+def unpack_actions(packed: bytes, length: int) -> array:
+    """Reverses pack_actions, returning the first length direction codes."""
+    count = len(packed)
+    value = int.from_bytes(packed, "little")
+    mask = int.from_bytes(b"\x03" * count, "little")
+    codes = bytearray(count * 4)
+    for offset in range(4):
+        codes[offset::4] = ((value >> (2 * offset)) & mask).to_bytes(count, "little")
+    return array('B', codes[:length])
+
+def replay_files(directory: str = REPLAY_DIRECTORY) -> list[str]:
+    """The recorded episodes in directory, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(REPLAY_EXTENSION)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+class EpisodeRecord:
+    """
+    Everything needed to reproduce one episode exactly: the board size, the map (if the board has walls),
+    the seed of the episode's food RNG and the direction code of every move that was processed.
+    """
+    __slots__ = ('seed', 'rows', 'cols', 'actions', 'game_map')
+
+    def __init__(self: Self, seed: int, rows: int, cols: int, actions=None, game_map: GameMap = None) -> Self:
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.actions = array('B', actions if actions is not None else [])
+        self.game_map = game_map
+
+    def append(self: Self, direction: int):
+        self.actions.append(direction)
+
+    def __len__(self: Self) -> int:
+        return len(self.actions)
+
+    def to_dict(self: Self) -> dict:
+        data = {"seed": self.seed, "rows": self.rows, "cols": self.cols, "actions": self.actions.tolist()}
+        if self.game_map is not None:
+            data["map"] = self.game_map.to_text()
+            data["map_name"] = self.game_map.name
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EpisodeRecord":
+        game_map = GameMap.from_text(data["map"], data.get("map_name", "custom")) if "map" in data else None
+        return cls(data["seed"], data["rows"], data["cols"], data["actions"], game_map)
+
+    def to_bytes(self: Self) -> bytes:
+        """The compact binary form: about a quarter of a byte per move, less once compressed."""
+        seed = str(self.seed).encode()
+        name = self.game_map.name.encode() if self.game_map is not None else b""
+        text = self.game_map.to_text().encode() if self.game_map is not None else b""
+        actions = zlib.compress(pack_actions(self.actions))
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.rows, self.cols, len(self.actions),
+                                    len(seed), len(name), len(text))
+        return b"".join((header, seed, name, text, actions))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EpisodeRecord":
+        if len(data) < REPLAY_HEADER.size:
+            raise ValueError("not a replay: too short")
+        magic, version, rows, cols, length, seed_size, name_size, text_size = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"not a version {REPLAY_VERSION} replay")
+        offset = REPLAY_HEADER.size
+        seed = int(data[offset:offset + seed_size])
+        offset += seed_size
+        name = data[offset:offset + name_size].decode()
+        offset += name_size
+        text = data[offset:offset + text_size].decode()
+        offset += text_size
+        actions = unpack_actions(zlib.decompress(data[offset:]), length)
+        if len(actions) != length:
+            raise ValueError(f"replay holds {len(actions)} of its {length} moves")
+        game_map = GameMap.from_text(text, name) if text_size else None
+        return cls(seed, rows, cols, actions, game_map)
+
+    def save(self: Self, filename: str):
+        """Writes the binary format for a .replay file, JSON otherwise."""
+        if filename.endswith(REPLAY_EXTENSION):
+            with open(filename, 'wb') as f:
+                f.write(self.to_bytes())
+            return
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename: str) -> "EpisodeRecord":
+        if filename.endswith(REPLAY_EXTENSION):
+            with open(filename, 'rb') as f:
+                return cls.from_bytes(f.read())
+        with open(filename) as f:
+            return cls.from_dict(json.load(f))
+
+
+def initial_state(record: EpisodeRecord) -> tuple[SnakeGameState, random.Random]:
+    """Returns the episode's starting state and its food RNG, positioned exactly as SnakeGame leaves them."""
+    rng = random.Random(record.seed)
+    if record.game_map is not None:
+        state = SnakeGameState(record.rows, record.cols, record.game_map.walls, record.game_map.start_cell)
+    else:
+        state = SnakeGameState(record.rows, record.cols)
+    state.place_food(rng)
+    return state, rng
+
+def replay_episode(record: EpisodeRecord, steps: int = -1) -> SnakeGameState:
+    """
+    Replays the recorded moves headlessly (no rendering, files or timers) and returns the resulting state.
+    If steps is non-negative, only that many moves are replayed.
+    """
+    state, rng = initial_state(record)
+    actions = record.actions if steps < 0 else record.actions[:steps]
+    for direction in actions:
+        result = state.advance(direction)
+        if result == STEP_ATE:
+            state.place_food(rng)
+        elif result == STEP_DIED:
+            break
+    return state
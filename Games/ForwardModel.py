@@ -0,0 +1,114 @@
+from array import array
+from typing import Self
+import random
+from Games.SnakeGameState import SnakeGameState, CELL_EMPTY, CELL_SNAKE, STEP_ATE, STEP_DIED
+
+# Default rewards, matching the ones used by the reinforcement learning agents.
+FOOD_REWARD = 10
+DEATH_REWARD = -10
+STEP_REWARD = 0
+
+# Layout of one undo record.
+_HEAD, _TAIL_SLOT, _LENGTH, _DIRECTION, _FOOD, _SCORE, _PENDING_GROWTH, _IS_DEAD, _VACATED, \
+    _TARGET_CELL, _NEW_FOOD, _RESULT = range(12)
+UNDO_STRIDE = 12
+
+
+class UndoLog:
+    """
+    Stack of fixed-size integer records, one per applied step, that lets ForwardModel.undo roll a state
+    back without copying it. Records live in a single array('i'), so pushing and popping doesn't allocate
+    once the array has grown to the search depth.
+    """
+    __slots__ = ('entries',)
+
+    def __init__(self: Self) -> Self:
+        self.entries = array('i')
+
+    def __len__(self: Self) -> int:
+        return len(self.entries) // UNDO_STRIDE
+
+    def clear(self: Self):
+        del self.entries[:]
+
+
+class ForwardModel:
+    """
+    Side-effect-free snake dynamics for lookahead search.
+
+    Unlike SnakeGame.process_action, stepping the model never touches the filesystem or the clock. The only
+    state it owns is the random source used to place new food after the snake eats.
+    """
+
+    def __init__(self: Self, rng=None, food_reward=FOOD_REWARD, death_reward=DEATH_REWARD,
+                 step_reward=STEP_REWARD) -> Self:
+        self.rng = rng if rng is not None else random.Random()
+        self.food_reward = food_reward
+        self.death_reward = death_reward
+        self.step_reward = step_reward
+
+    def step(self: Self, state: SnakeGameState, direction: int) -> tuple[SnakeGameState, int, bool]:
+        """Returns (next_state, reward, done) without modifying the given state."""
+        next_state = state.copy()
+        reward, done = self.apply(next_state, direction)
+        return next_state, reward, done
+
+    def apply(self: Self, state: SnakeGameState, direction: int, undo_log: UndoLog = None) -> tuple[int, bool]:
+        """
+        Advances the state in place and returns (reward, done).
+        If an undo log is given, enough is recorded to reverse the step with undo().
+        """
+        if undo_log is not None:
+            target = state.neighbors[(state.head << 2) | direction]
+            undo_log.entries.extend((
+                state.head, state.tail_slot, state.length, state.direction, state.food, state.score,
+                state.pending_growth, state.is_dead, state.vacated,
+                state.cells[target] if target >= 0 else CELL_EMPTY, -1, STEP_DIED))
+
+        result = state.advance(direction)
+        if result == STEP_ATE:
+            new_food = state.place_food(self.rng)
+            reward = self.food_reward
+        else:
+            new_food = -1
+            reward = self.death_reward if result == STEP_DIED else self.step_reward
+
+        if undo_log is not None:
+            entries = undo_log.entries
+            base = len(entries) - UNDO_STRIDE
+            entries[base + _NEW_FOOD] = new_food
+            entries[base + _RESULT] = result
+        return reward, result == STEP_DIED
+
+    def undo(self: Self, state: SnakeGameState, undo_log: UndoLog):
+        """Reverts the most recent step recorded in the undo log."""
+        entries = undo_log.entries
+        base = len(entries) - UNDO_STRIDE
+        cells = state.cells
+        if entries[base + _RESULT] != STEP_DIED:
+            new_food = entries[base + _NEW_FOOD]
+            if new_food >= 0:
+                cells[new_food] = CELL_EMPTY
+            cells[state.head] = entries[base + _TARGET_CELL]
+            if state.vacated >= 0:
+                cells[state.vacated] = CELL_SNAKE
+        state.head = entries[base + _HEAD]
+        state.tail_slot = entries[base + _TAIL_SLOT]
+        state.length = entries[base + _LENGTH]
+        state.direction = entries[base + _DIRECTION]
+        state.food = entries[base + _FOOD]
+        state.score = entries[base + _SCORE]
+        state.pending_growth = entries[base + _PENDING_GROWTH]
+        state.is_dead = bool(entries[base + _IS_DEAD])
+        state.vacated = entries[base + _VACATED]
+        del entries[base:]
+
+    @staticmethod
+    def snapshot(state: SnakeGameState) -> SnakeGameState:
+        """Returns a full copy of the state to restore later."""
+        return state.copy()
+
+    @staticmethod
+    def restore(state: SnakeGameState, snapshot: SnakeGameState):
+        """Rolls the state back to a snapshot, reusing the state's buffers."""
+        state.restore(snapshot)
@@ -0,0 +1,294 @@
+import os
+import random
+import re
+from collections import deque
+from typing import Self
+from Games.SnakeGameState import CELL_EMPTY, CELL_OBSTICLE, START_LENGTH
+
+# Maps shipped with the game, offered by the main menu next to the generated ones.
+MAP_DIRECTORY = "Maps"
+MAP_EXTENSION = ".map"
+GENERATED_MAPS = ("maze", "rooms")
+
+WALL_CHAR = "#"
+EMPTY_CHAR = "."
+COMMENT_CHAR = ";"
+HEADER = re.compile(r"(\d+)x(\d+)$")
+ROW_LINE = re.compile(r"(?:(\d+)\*)?((?:\d*[.#])+)$")
+RUN = re.compile(r"(\d*)([.#])")
+
+
+class GameMap:
+    """
+    A board's static walls. walls holds one cell code per cell (CELL_OBSTICLE or CELL_EMPTY), in the layout
+    SnakeGameState.cells uses, and start_cell is where snakes start: the open cell nearest the middle of the
+    board with room to move right.
+
+    Maps are stored as text. The first line is "<rows>x<cols>" and every following line is a row, run-length
+    encoded as runs of "<count><char>" ("." for an empty cell, "#" for a wall, the count defaulting to 1).
+    A row line prefixed with "<count>*" stands for that many identical rows, and lines starting with ";" are
+    comments:
+
+        ; a box with a pillar
+        6x8
+        8#
+        2*#6.#
+        #2.2#2.#
+        #6.#
+        8#
+    """
+
+    def __init__(self: Self, rows: int, cols: int, walls: bytes, name: str = "custom") -> Self:
+        if len(walls) != rows * cols:
+            raise ValueError(f"A {rows}x{cols} map needs {rows * cols} cells, got {len(walls)}")
+        self.rows = rows
+        self.cols = cols
+        self.walls = bytes(walls)
+        self.name = name
+        self.open_cells = len(self.walls) - self.walls.count(CELL_OBSTICLE)
+        if self.open_cells == 0:
+            raise ValueError(f"Map {name!r} has no open cells")
+        self.start_cell = self.find_start_cell()
+        self.hamiltonian_cycle_cache = None
+        self.text = None
+
+    def is_wall(self: Self, row: int, col: int) -> bool:
+        return self.walls[row * self.cols + col] == CELL_OBSTICLE
+
+    def find_start_cell(self: Self) -> int:
+        """The open cell nearest the middle of the board, preferring cells with START_LENGTH open cells to the right."""
+        walls = self.walls
+        fallback = -1
+        for cell in cells_by_distance(self.rows, self.cols, self.rows // 2, self.cols // 2):
+            if walls[cell] == CELL_OBSTICLE:
+                continue
+            col = cell % self.cols
+            if col + START_LENGTH <= self.cols and not any(walls[cell + 1:cell + START_LENGTH]):
+                return cell
+            if fallback < 0:
+                fallback = cell
+        return fallback
+
+    def hamiltonian_cycle(self: Self) -> list[tuple[int, int]] | None:
+        """A Hamiltonian cycle through the map's open cells, or None if none was found. Computed once."""
+        if self.hamiltonian_cycle_cache is None:
+            from GraphHelperFunctions.Hamiltonian import find_hamiltonian_cycle_on_map
+            self.hamiltonian_cycle_cache = find_hamiltonian_cycle_on_map(self.walls, self.rows, self.cols) or []
+        return self.hamiltonian_cycle_cache or None
+
+    def to_text(self: Self) -> str:
+        if self.text is None:
+            lines = [f"{self.rows}x{self.cols}"]
+            previous = None
+            repeats = 0
+            for row in range(self.rows):
+                line = encode_row(self.walls[row * self.cols:(row + 1) * self.cols])
+                if line == previous:
+                    repeats += 1
+                    continue
+                if previous is not None:
+                    lines.append(f"{repeats}*{previous}" if repeats > 1 else previous)
+                previous = line
+                repeats = 1
+            lines.append(f"{repeats}*{previous}" if repeats > 1 else previous)
+            self.text = "\n".join(lines) + "\n"
+        return self.text
+
+    @classmethod
+    def from_text(cls, text: str, name: str = "custom") -> "GameMap":
+        size = None
+        walls = bytearray()
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith(COMMENT_CHAR):
+                continue
+            if size is None:
+                match = HEADER.match(line)
+                if match is None:
+                    raise ValueError(f"{name}:{number}: expected a '<rows>x<cols>' header, got {line!r}")
+                size = (int(match.group(1)), int(match.group(2)))
+                continue
+            match = ROW_LINE.match(line)
+            if match is None:
+                raise ValueError(f"{name}:{number}: not a row of '.' and '#' runs: {line!r}")
+            row = decode_row(match.group(2))
+            if len(row) != size[1]:
+                raise ValueError(f"{name}:{number}: row has {len(row)} cells, expected {size[1]}")
+            walls.extend(row * int(match.group(1) or 1))
+        if size is None:
+            raise ValueError(f"{name}: empty map")
+        if len(walls) != size[0] * size[1]:
+            raise ValueError(f"{name}: map has {len(walls) // size[1]} rows, expected {size[0]}")
+        return cls(size[0], size[1], walls, name)
+
+    def save(self: Self, path: str):
+        with open(path, "w") as file:
+            file.write(self.to_text())
+
+    @classmethod
+    def load(cls, path: str) -> "GameMap":
+        with open(path) as file:
+            return cls.from_text(file.read(), os.path.splitext(os.path.basename(path))[0])
+
+
+def encode_row(cells: bytes) -> str:
+    runs = []
+    start = 0
+    for i in range(1, len(cells) + 1):
+        if i == len(cells) or cells[i] != cells[start]:
+            char = WALL_CHAR if cells[start] == CELL_OBSTICLE else EMPTY_CHAR
+            runs.append(f"{i - start}{char}" if i - start > 1 else char)
+            start = i
+    return "".join(runs)
+
+def decode_row(line: str) -> bytes:
+    row = bytearray()
+    for count, char in RUN.findall(line):
+        row.extend(bytes([CELL_OBSTICLE if char == WALL_CHAR else CELL_EMPTY]) * int(count or 1))
+    return bytes(row)
+
+def cells_by_distance(rows: int, cols: int, row: int, col: int):
+    """Yields every cell of the board in order of Manhattan distance from (row, col)."""
+    for distance in range(rows + cols):
+        for d_row in range(-distance, distance + 1):
+            r = row + d_row
+            if not 0 <= r < rows:
+                continue
+            d_col = distance - abs(d_row)
+            for c in (col - d_col, col + d_col) if d_col else (col,):
+                if 0 <= c < cols:
+                    yield r * cols + c
+
+def is_connected(walls: bytes, rows: int, cols: int) -> bool:
+    """Returns True if every open cell can be reached from every other."""
+    start = next((i for i, code in enumerate(walls) if code != CELL_OBSTICLE), -1)
+    if start < 0:
+        return False
+    seen = bytearray(walls[i] == CELL_OBSTICLE for i in range(len(walls)))
+    seen[start] = 1
+    reached = 1
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        row, col = divmod(cell, cols)
+        for neighbor, valid in ((cell - cols, row > 0), (cell + cols, row < rows - 1),
+                                (cell - 1, col > 0), (cell + 1, col < cols - 1)):
+            if valid and not seen[neighbor]:
+                seen[neighbor] = 1
+                reached += 1
+                queue.append(neighbor)
+    return reached == len(walls) - walls.count(CELL_OBSTICLE)
+
+
+def upscale(coarse: list[list[bool]], rows: int, cols: int, scale: int) -> bytes:
+    """
+    Turns a grid of wall flags into walls for a rows x cols board, every coarse cell covering scale x scale
+    cells. Rows and columns left over when the board isn't a multiple of scale are walls.
+    """
+    walls = bytearray([CELL_OBSTICLE]) * (rows * cols)
+    for row in range(len(coarse) * scale):
+        line = coarse[row // scale]
+        offset = row * cols
+        for col in range(len(line) * scale):
+            if not line[col // scale]:
+                walls[offset + col] = CELL_EMPTY
+    return bytes(walls)
+
+def generate_maze(rows: int, cols: int, seed: int = None, loops: float = 0.1, scale: int = 2) -> GameMap:
+    """
+    A random maze: a depth-first spanning tree with corridors scale cells wide, with a loops fraction of
+    the remaining inner walls knocked through so the snake isn't stuck in dead ends. With the default scale
+    of 2 every wall covers whole 2x2 blocks, which is what the map Hamiltonian cycle needs.
+    """
+    rng = random.Random(seed)
+    height, width = rows // scale, cols // scale
+    if height < 3 or width < 3:
+        raise ValueError(f"A {rows}x{cols} board is too small for a maze")
+    # Maze cells sit at even coarse coordinates; odd coordinates are the walls between them.
+    coarse = [[True] * width for _ in range(height)]
+    start = (height // 2 // 2 * 2, width // 2 // 2 * 2)
+    coarse[start[0]][start[1]] = False
+    stack = [start]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + d_row, col + d_col) for d_row, d_col in ((-2, 0), (2, 0), (0, 2), (0, -2))
+                   if 0 <= row + d_row < height and 0 <= col + d_col < width and coarse[row + d_row][col + d_col]]
+        if not options:
+            stack.pop()
+            continue
+        n_row, n_col = rng.choice(options)
+        coarse[(row + n_row) // 2][(col + n_col) // 2] = False
+        coarse[n_row][n_col] = False
+        stack.append((n_row, n_col))
+    for row in range(height):
+        for col in range(width):
+            if coarse[row][col] and (row % 2) != (col % 2) and rng.random() < loops:
+                # An inner wall between two maze cells; opening it adds a loop.
+                if (row % 2 == 1 and row + 1 < height) or (col % 2 == 1 and col + 1 < width):
+                    coarse[row][col] = False
+    # With an even number of coarse rows (or columns) the last one is outside the maze lattice; leave it open.
+    if height % 2 == 0:
+        coarse[-1] = [False] * width
+    if width % 2 == 0:
+        for line in coarse:
+            line[-1] = False
+    return GameMap(rows, cols, upscale(coarse, rows, cols, scale), f"maze-{seed}")
+
+def generate_rooms(rows: int, cols: int, seed: int = None, min_room: int = 3, scale: int = 2) -> GameMap:
+    """
+    Rooms divided by recursive division: walls are placed on odd coarse rows and columns with one door each on
+    an even coordinate, so a later wall can never block an earlier door and every room stays reachable.
+    Rooms are at least min_room coarse cells (of scale x scale cells) across.
+    """
+    rng = random.Random(seed)
+    height, width = rows // scale, cols // scale
+    if height < 2 * min_room + 1 or width < 2 * min_room + 1:
+        raise ValueError(f"A {rows}x{cols} board is too small for rooms")
+    coarse = [[False] * width for _ in range(height)]
+
+    def divide(top, left, bottom, right):
+        # (top, left) to (bottom, right) is an open region, ends exclusive.
+        walls_rows = [row for row in range(top + min_room, bottom - min_room) if row % 2 == 1]
+        walls_cols = [col for col in range(left + min_room, right - min_room) if col % 2 == 1]
+        if not walls_rows and not walls_cols:
+            return
+        horizontal = bool(walls_rows) and (not walls_cols or bottom - top > right - left or
+                                           (bottom - top == right - left and rng.random() < 0.5))
+        if horizontal:
+            row = rng.choice(walls_rows)
+            door = rng.choice([col for col in range(left, right) if col % 2 == 0])
+            for col in range(left, right):
+                coarse[row][col] = col != door
+            divide(top, left, row, right)
+            divide(row + 1, left, bottom, right)
+        else:
+            col = rng.choice(walls_cols)
+            door = rng.choice([row for row in range(top, bottom) if row % 2 == 0])
+            for row in range(top, bottom):
+                coarse[row][col] = row != door
+            divide(top, left, bottom, col)
+            divide(top, col + 1, bottom, right)
+
+    # Regions start on even coordinates so that their walls fall on odd ones; a region wider than the
+    # board's even part keeps its last odd row or column open.
+    divide(0, 0, height, width)
+    return GameMap(rows, cols, upscale(coarse, rows, cols, scale), f"rooms-{seed}")
+
+def map_files(directory: str = MAP_DIRECTORY) -> list[str]:
+    """Paths of the map files in directory, sorted by name."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(MAP_EXTENSION))
+
+def make_map(kind: str, rows: int, cols: int, seed: int = None) -> GameMap | None:
+    """
+    Builds a map by kind: "none" for an open board, "maze" or "rooms" to generate one for a rows x cols
+    board from seed, or the path of a map file (whose own size then applies).
+    """
+    if kind == "none":
+        return None
+    if kind == "maze":
+        return generate_maze(rows, cols, seed)
+    if kind == "rooms":
+        return generate_rooms(rows, cols, seed)
+    return GameMap.load(kind)
@@ -0,0 +1,143 @@
+from array import array
+from bisect import bisect_right
+from typing import Self
+import random
+from Games.EpisodeRecord import EpisodeRecord, initial_state
+from Games.SnakeGameState import SnakeGameState, CELL_SNAKE, CELL_FOOD, STEP_ATE, STEP_DIED
+
+# Moves between keyframes: the most a seek has to replay. Keyframes of long snakes are spaced further apart
+# (see keyframe_interval) so that all of an episode's keyframes fit in about KEYFRAME_BUDGET bytes.
+KEYFRAME_INTERVAL = 256
+KEYFRAME_BUDGET = 64 * 1024 * 1024
+
+
+class Keyframe:
+    """The state of a replay after step moves: the snake, the food, the counters and the food RNG's state."""
+    __slots__ = ('step', 'body', 'direction', 'food', 'score', 'pending_growth', 'is_dead', 'rng_state')
+
+    def __init__(self: Self, step: int, state: SnakeGameState, rng: random.Random) -> Self:
+        self.step = step
+        self.body = array('i', state.body_cells())
+        self.direction = state.direction
+        self.food = state.food
+        self.score = state.score
+        self.pending_growth = state.pending_growth
+        self.is_dead = state.is_dead
+        self.rng_state = rng.getstate()
+
+    def restore(self: Self, state: SnakeGameState, rng: random.Random):
+        """Rebuilds state from its walls and the keyframe's snake and food, and rewinds rng."""
+        state.reset(self.body[-1], self.direction)
+        cells = state.cells
+        length = len(self.body)
+        state.body[:length] = self.body
+        for cell in self.body:
+            cells[cell] = CELL_SNAKE
+        state.length = length
+        state.head = self.body[-1]
+        state.food = self.food
+        if self.food >= 0:
+            cells[self.food] = CELL_FOOD
+        state.score = self.score
+        state.pending_growth = self.pending_growth
+        state.is_dead = self.is_dead
+        rng.setstate(self.rng_state)
+
+
+class ReplayPlayer:
+    """
+    Plays a recorded episode back without its agent: every move is read from the record, so playing costs a
+    state update per move, and any move can be reached with seek().
+
+    Keyframes are taken while moves are played for the first time. A seek backwards, or far ahead, restores
+    the nearest keyframe before the target and replays at most one interval of moves from there.
+
+    It exposes what BoardRenderer draws (rows, cols, state, display_cells and take_changed_cells), like
+    SnakeGame does.
+    """
+
+    def __init__(self: Self, record: EpisodeRecord) -> Self:
+        self.record = record
+        self.rows = record.rows
+        self.cols = record.cols
+        self.state, self.rng = initial_state(record)
+        self.step = 0
+        self.keyframes = [Keyframe(0, self.state, self.rng)]
+        self.keyframe_steps = [0]
+        self.changed_cells = []
+        self.redraw_all = True
+
+    @property
+    def length(self: Self) -> int:
+        """Moves in the episode."""
+        return len(self.record.actions)
+
+    @property
+    def display_cells(self: Self) -> bytearray:
+        return self.state.cells
+
+    @property
+    def score(self: Self) -> int:
+        return self.state.score
+
+    @property
+    def is_finished(self: Self) -> bool:
+        return self.step >= self.length
+
+    def keyframe_interval(self: Self) -> int:
+        """Moves until the next keyframe, growing with the snake so the keyframes stay within the budget."""
+        keyframe_size = 4 * self.state.length
+        return max(KEYFRAME_INTERVAL, keyframe_size * self.length // KEYFRAME_BUDGET)
+
+    def advance(self: Self, count: int = 1) -> int:
+        """Plays up to count moves forward and returns how many were played."""
+        actions = self.record.actions
+        state = self.state
+        rng = self.rng
+        changed = self.changed_cells
+        end = min(self.step + count, self.length)
+        played = end - self.step
+        next_keyframe = self.keyframe_steps[-1] + self.keyframe_interval()
+        for step in range(self.step, end):
+            result = state.advance(actions[step])
+            if result == STEP_DIED:
+                # The fatal move is the last one recorded.
+                continue
+            if state.vacated >= 0:
+                changed.append(state.vacated)
+            changed.append(state.head)
+            if result == STEP_ATE and state.place_food(rng) >= 0:
+                changed.append(state.food)
+            if step + 1 == next_keyframe:
+                self.keyframes.append(Keyframe(step + 1, state, rng))
+                self.keyframe_steps.append(step + 1)
+                next_keyframe += self.keyframe_interval()
+        self.step = end
+        if len(changed) > state.capacity:
+            changed.clear()
+            self.redraw_all = True
+        return played
+
+    def seek(self: Self, step: int):
+        """Moves the playback to just after move step (0 is the start of the episode)."""
+        step = min(max(step, 0), self.length)
+        if step == self.step:
+            return
+        # Restore the nearest keyframe unless playing on from the current move is at least as short.
+        keyframe = self.keyframes[bisect_right(self.keyframe_steps, step) - 1]
+        if step < self.step or keyframe.step > self.step:
+            keyframe.restore(self.state, self.rng)
+            self.step = keyframe.step
+        self.advance(step - self.step)
+        self.changed_cells.clear()
+        self.redraw_all = True
+
+    def take_changed_cells(self: Self) -> list[int] | None:
+        """Same contract as SnakeGame.take_changed_cells."""
+        if self.redraw_all:
+            self.redraw_all = False
+            self.changed_cells.clear()
+            return None
+        changed = self.changed_cells
+        self.changed_cells = []
+        return changed
@@ -0,0 +1,153 @@
+from typing import Self
+import numpy as np
+from Games.SnakeGameLogic import SnakeGame, DEFAULT_ROWS, DEFAULT_COLS
+from Games.SnakeGameState import UP, DOWN, RIGHT, LEFT, CELL_SNAKE, CELL_FOOD, CELL_OBSTICLE
+
+# Relative actions, as used by the DQN: keep going, turn right or turn left.
+STRAIGHT = 0
+TURN_RIGHT = 1
+TURN_LEFT = 2
+
+# TURN_TABLE[direction][relative_action] is the absolute direction the snake ends up moving in.
+TURN_TABLE = (
+    (UP, RIGHT, LEFT),      # Up
+    (DOWN, LEFT, RIGHT),    # Down
+    (RIGHT, DOWN, UP),      # Right
+    (LEFT, UP, DOWN),       # Left
+)
+
+# Direction features in observation order (left, right, up, down) for each absolute direction.
+DIRECTION_FEATURES = (
+    (0, 0, 1, 0),  # Up
+    (0, 0, 0, 1),  # Down
+    (0, 1, 0, 0),  # Right
+    (1, 0, 0, 0),  # Left
+)
+
+# Channels of the board-plane observation.
+PLANE_BLOCKED = 0    # snake body and obstacles
+PLANE_HEAD = 1
+PLANE_FOOD = 2
+PLANE_DIRECTION = 3  # the cell the snake would move into by going straight
+PLANE_COUNT = 4
+
+FOOD_REWARD = 10
+DEATH_REWARD = -10
+STEP_REWARD = 0
+
+
+class SnakeGameEnv:
+    """
+    Gym-style adapter around SnakeGame for agents that act relative to the snake's heading.
+
+    step() takes a relative action (an index or a one-hot list of length 3) and returns
+    (observation, reward, done, info). Observations are the 11 features the DQN was designed for,
+    computed in grid coordinates from precomputed direction tables:
+
+        danger straight, danger right, danger left,
+        moving left, moving right, moving up, moving down,
+        food left, food right, food up, food down
+
+    With observation_type="planes" the observation is instead the whole board as stacked channel planes
+    (see board_planes), for convolutional networks.
+
+    An episode also ends if the snake goes idle_factor * length steps without eating, so a looping
+    policy can't stall training.
+    """
+    observation_size = 11
+    action_size = 3
+
+    def __init__(self: Self, game: SnakeGame = None, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, seed=None, idle_factor=100,
+                 observation_type="features", game_map=None, replay_directory=None) -> Self:
+        # Without a game to display, run headless: no score files or plots on death.
+        self.game = game if game is not None else SnakeGame("rl_env", rows, cols, save_results=False, seed=seed,
+                                                            game_map=game_map, replay_directory=replay_directory)
+        self.idle_factor = idle_factor
+        self.steps_since_food = 0
+        self.observation_type = observation_type
+        # A NumPy view of the compact state's board buffer; it follows the game without copying.
+        self.board = np.frombuffer(self.game.state.cells, dtype=np.uint8).reshape(self.game.rows, self.game.cols)
+
+    @property
+    def observation_shape(self: Self) -> tuple:
+        if self.observation_type == "planes":
+            return (PLANE_COUNT, self.game.rows, self.game.cols)
+        return (self.observation_size,)
+
+    def reset(self: Self) -> np.ndarray:
+        """Starts a new episode and returns its first observation."""
+        self.game.reset()
+        self.steps_since_food = 0
+        return self.observation()
+
+    def step(self: Self, action) -> tuple[np.ndarray, int, bool, dict]:
+        if not isinstance(action, (int, np.integer)):
+            action = int(np.argmax(action))
+        game = self.game
+        game.set_direction(TURN_TABLE[game.direction][action])
+        score = game.score
+        game.process_action()
+
+        self.steps_since_food += 1
+        if game.is_dead:
+            reward, done = DEATH_REWARD, True
+        elif game.score > score:
+            reward, done = FOOD_REWARD, False
+            self.steps_since_food = 0
+        elif self.steps_since_food > self.idle_factor * game.state.length:
+            reward, done = DEATH_REWARD, True
+        else:
+            reward, done = STEP_REWARD, False
+        return self.observation(), reward, done, {"score": game.score}
+
+    def observation(self: Self) -> np.ndarray:
+        if self.observation_type == "planes":
+            return self.board_planes()
+        return self.features()
+
+    def board_planes(self: Self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Fills (or allocates) a (4, rows, cols) float32 array with the blocked, head, food and direction
+        planes, computed with vectorized comparisons on the board buffer.
+        """
+        state = self.game.state
+        if out is None:
+            out = np.empty((PLANE_COUNT, state.rows, state.cols), dtype=np.float32)
+        board = self.board
+        np.logical_or(board == CELL_SNAKE, board == CELL_OBSTICLE, out=out[PLANE_BLOCKED], casting="unsafe")
+        np.equal(board, CELL_FOOD, out=out[PLANE_FOOD], casting="unsafe")
+        out[PLANE_HEAD].fill(0)
+        out[PLANE_DIRECTION].fill(0)
+        cols = state.cols
+        out[PLANE_HEAD, state.head // cols, state.head % cols] = 1
+        ahead = state.next_cell(state.direction)
+        if ahead >= 0:
+            out[PLANE_DIRECTION, ahead // cols, ahead % cols] = 1
+        return out
+
+    def features(self: Self) -> np.ndarray:
+        state = self.game.state
+        cells = state.cells
+        neighbors = state.neighbors
+        direction = state.direction
+        turns = TURN_TABLE[direction]
+        base = state.head << 2
+
+        danger = [0, 0, 0]
+        for index in range(3):
+            cell = neighbors[base + turns[index]]
+            if cell < 0 or cells[cell] == CELL_SNAKE or cells[cell] == CELL_OBSTICLE:
+                danger[index] = 1
+
+        cols = state.cols
+        head_row, head_col = divmod(state.head, cols)
+        if state.food >= 0:
+            food_row, food_col = divmod(state.food, cols)
+        else:
+            food_row, food_col = head_row, head_col
+        return np.array(danger + list(DIRECTION_FEATURES[direction]) + [
+            food_col < head_col,  # food left
+            food_col > head_col,  # food right
+            food_row < head_row,  # food up
+            food_row > head_row,  # food down
+        ], dtype=np.float32)
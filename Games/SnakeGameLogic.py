@@ -1,11 +1,11 @@
-from collections import deque
 from typing import Self
 from enum import Enum
 import random
 import csv
 import os
 import time
-from Scenes.PlotCSVdata import plot_csv_data  # Import the function directly
+from Games.EpisodeRecord import EpisodeRecord, REPLAY_EXTENSION
+from Games.SnakeGameState import SnakeGameState, UP, DOWN, RIGHT, LEFT, STEP_ATE, STEP_DIED
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -22,22 +22,79 @@ class InputAction(Enum):
     Left = (0, -1)
 
 
+# Integer direction code for each InputAction, so the game loop never branches on the Enum.
+ACTION_DIRECTIONS = {
+    InputAction.Up: UP,
+    InputAction.Down: DOWN,
+    InputAction.Right: RIGHT,
+    InputAction.Left: LEFT,
+}
+DIRECTION_ACTIONS = (InputAction.Up, InputAction.Down, InputAction.Right, InputAction.Left)
+
+# Board size used when none is chosen, and the sizes offered by the main menu.
+DEFAULT_ROWS = 26
+DEFAULT_COLS = 32
+BOARD_SIZES = ((26, 32), (50, 64), (100, 128), (250, 320), (500, 500))
+
+
+class SnakeBodyView:
+    """Read-only sequence of the snake's (row, col) locations from tail to head, backed by the compact state."""
+
+    def __init__(self: Self, state: SnakeGameState) -> Self:
+        self.state = state
+
+    def __len__(self: Self) -> int:
+        return self.state.length
+
+    def __getitem__(self: Self, position: int) -> tuple[int, int]:
+        length = self.state.length
+        if position < 0:
+            position += length
+        if position < 0 or position >= length:
+            raise IndexError("snake body index out of range")
+        return divmod(self.state.body_cell(position), self.state.cols)
+
+    def __iter__(self: Self):
+        cols = self.state.cols
+        for cell in self.state.body_cells():
+            yield divmod(cell, cols)
+
+
 class SnakeGame:
 
-    def __init__(self: Self, save_id: str, rows=26, cols=32) -> Self:
-        self.score = 0
+    def __init__(self: Self, save_id: str, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, save_results=True, seed=None,
+                 game_map=None, replay_directory=None) -> Self:
         self.save_id = save_id
-        self.is_dead = False
+        self.save_results = save_results  # Headless runs can skip writing and plotting scores on death
+        # With a replay_directory, every finished episode is written there as a .replay file (see save_replay).
+        self.replay_directory = replay_directory
+        self.replay_prefix = f"{save_id}-{time.strftime('%Y%m%d-%H%M%S')}"
         self.action = InputAction.Right
+        self.direction = RIGHT
+        # A map (Games.Maps.GameMap) brings its own board size and walls.
+        self.game_map = game_map
+        if game_map is not None:
+            rows, cols = game_map.rows, game_map.cols
         self.rows, self.cols = (rows,cols)
+        # Every episode draws its food from its own RNG stream. The episode seeds come from a generator
+        # seeded here, so a game constructed with the same seed replays the same sequence of boards.
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.episode_seeds = random.Random(self.seed)
+        self.start_episode()
+        # The compact state is the source of truth; state_arr mirrors it for renderers and agents.
+        if game_map is not None:
+            self.state = SnakeGameState(rows, cols, game_map.walls, game_map.start_cell)
+        else:
+            self.state = SnakeGameState(rows, cols)
+        self.tail_locations = SnakeBodyView(self.state)
         self.state_arr = [[BlockState.Empty for i in range(self.cols)] for j in range(self.rows)]
-        self.head_location = (int(self.rows / 2), int(self.cols / 2))
-        self.tail_locations = deque()
-        self.food_location = None
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -0, self.head_location[1] + self.action.value[1] * -0))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -1, self.head_location[1] + self.action.value[1] * -1))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -2, self.head_location[1] + self.action.value[1] * -2))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -3, self.head_location[1] + self.action.value[1] * -3))
+        if game_map is not None:
+            for cell, code in enumerate(game_map.walls):
+                if code == BlockState.Obsticle.value:
+                    self.state_arr[cell // self.cols][cell % self.cols] = BlockState.Obsticle
+        # Cells changed since a renderer last took them (see take_changed_cells), so it can redraw only those.
+        self.changed_cells = []
+        self.redraw_all = True
         self.set_block_state(self.head_location, BlockState.Snake)
         self.place_food()
         # Initialize timers
@@ -48,74 +105,114 @@ class SnakeGame:
         self.attempts = 0
         self.high_score = 0  # Track highest score achieved
 
+    @property
+    def score(self: Self) -> int:
+        return self.state.score
+
+    @property
+    def is_dead(self: Self) -> bool:
+        return self.state.is_dead
+
+    @property
+    def display_cells(self: Self) -> bytearray:
+        """The buffer renderers draw: the board's cell codes."""
+        return self.state.cells
+
+    @property
+    def head_location(self: Self) -> tuple[int, int]:
+        return divmod(self.state.head, self.cols)
+
+    @property
+    def food_location(self: Self):
+        if self.state.food < 0:
+            return None
+        return divmod(self.state.food, self.cols)
+
+    def start_episode(self: Self, seed=None):
+        """Seeds the food RNG for a new episode and starts recording its moves."""
+        self.episode_seed = seed if seed is not None else self.episode_seeds.getrandbits(32)
+        self.rng = random.Random(self.episode_seed)
+        self.episode = EpisodeRecord(self.episode_seed, self.rows, self.cols, game_map=self.game_map)
+        self.episode_saved = False
+
     def place_food(self: Self):
-        while True:  #DO WHILE IMPLEMENTATION - do place_food while food placed in invalid space
-            x = random.randint(0,self.rows - 1)
-            y = random.randint(0, self.cols - 1)
-            if self.state_arr[x][y] == BlockState.Empty:
-                self.set_block_state((x, y), BlockState.Food)
-                self.food_location = (x,y)
-                return
+        cell = self.state.place_food(self.rng)
+        if cell >= 0:
+            self.state_arr[cell // self.cols][cell % self.cols] = BlockState.Food
+            self.changed_cells.append(cell)
     
     def set_block_state(self: Self, location : tuple[int, int], state : BlockState):
         x, y = location
         self.state_arr[x][y] = state
+        self.state.cells[x * self.cols + y] = state.value
+        self.changed_cells.append(x * self.cols + y)
 
     def set_action(self: Self, action: InputAction):
         self.action = action
+        self.direction = ACTION_DIRECTIONS[action]
+
+    def set_direction(self: Self, direction: int):
+        """Same as set_action, but takes an integer direction code."""
+        self.direction = direction
+        self.action = DIRECTION_ACTIONS[direction]
 
     def process_action(self: Self):
         # Skip processing if already dead
-        if self.is_dead:
-            return
-            
-        new_head_x, new_head_y = self.head_location[0] + self.action.value[0], self.head_location[1] + self.action.value[1]
-        if new_head_x < 0 or new_head_x >= self.rows or new_head_y < 0 or new_head_y >= self.cols:
-            self.is_dead = True
-            self.save_game(self.save_id, self.attempts, self.score, self.elapsed_time)
+        if self.state.is_dead:
             return
-        if self.state_arr[new_head_x][new_head_y] == BlockState.Snake or self.state_arr[new_head_x][new_head_y] == BlockState.Obsticle:
-            self.is_dead = True
-            self.save_game(self.save_id, self.attempts, self.score, self.elapsed_time)
-            return
-        if self.score == self.rows * self.cols - 5:
-            self.is_dead = True
-            self.save_game(self.save_id, self.attempts, self.score, self.elapsed_time)
+
+        self.episode.append(self.direction)
+        result = self.state.advance(self.direction)
+        if result == STEP_DIED:
+            self.save_replay()
+            if self.save_results:
+                self.save_game(self.save_id, self.attempts, self.score, self.elapsed_time)
+            else:
+                self.total_time += self.elapsed_time
             return
-        if self.state_arr[new_head_x][new_head_y] == BlockState.Food:
-            self.score += 1
+        # Mirror the cells that changed into state_arr.
+        cols = self.cols
+        changed = self.changed_cells
+        vacated = self.state.vacated
+        if vacated >= 0:
+            self.state_arr[vacated // cols][vacated % cols] = BlockState.Empty
+            changed.append(vacated)
+        head = self.state.head
+        self.state_arr[head // cols][head % cols] = BlockState.Snake
+        changed.append(head)
+        if len(changed) > self.state.capacity:
+            # Nothing is drawing this game (it runs headless); a full redraw is cheaper than the backlog.
+            changed.clear()
+            self.redraw_all = True
+        if result == STEP_ATE:
             # Update high score if current score is higher
             if self.score > self.high_score:
                 self.high_score = self.score
             self.place_food()
-        else:
-            self.set_block_state(self.tail_locations.popleft(), BlockState.Empty)
-        self.head_location = (new_head_x, new_head_y)
-        self.tail_locations.append(self.head_location)
-        self.set_block_state(self.head_location, BlockState.Snake)
         # Update elapsed time
         self.elapsed_time = time.time() - self.start_time
 
-    def reset(self: Self):
-        
+    def reset(self: Self, seed=None):
+        # An episode cut short (by an environment's step limit, say) is recorded as far as it went.
+        self.save_replay()
+
         # Increment attempt counter
         self.attempts += 1
+        self.start_episode(seed)
         
         # Reset game state
-        self.score = 0
-        self.is_dead = False
         self.action = InputAction.Right
+        self.direction = RIGHT
         
-        # Clear the board
-        self.state_arr = [[BlockState.Empty for i in range(self.cols)] for j in range(self.rows)]
-        
-        # Reset snake position
-        self.head_location = (int(self.rows / 2), int(self.cols / 2))
-        self.tail_locations = deque()
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -0, self.head_location[1] + self.action.value[1] * -0))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -1, self.head_location[1] + self.action.value[1] * -1))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -2, self.head_location[1] + self.action.value[1] * -2))
-        self.tail_locations.append((self.head_location[0] + self.action.value[0] * -3, self.head_location[1] + self.action.value[1] * -3))
+        # Clear the board in place. Only the snake and the food change, so only their cells are cleared;
+        # the walls stay.
+        occupied = list(self.state.body_cells())
+        if self.state.food >= 0:
+            occupied.append(self.state.food)
+        for cell in occupied:
+            self.state_arr[cell // self.cols][cell % self.cols] = BlockState.Empty
+        self.changed_cells.extend(occupied)
+        self.state.reset(direction=self.direction)
         self.set_block_state(self.head_location, BlockState.Snake)
         
         # Place new food
@@ -125,6 +222,55 @@ class SnakeGame:
         self.start_time = time.time()
         self.elapsed_time = 0
 
+    def save_replay(self: Self):
+        """Writes the current episode to replay_directory, once, if recording and any moves were made."""
+        if self.replay_directory is None or self.episode_saved or len(self.episode) == 0:
+            return
+        os.makedirs(self.replay_directory, exist_ok=True)
+        filename = os.path.join(self.replay_directory, f"{self.replay_prefix}-{self.attempts:05d}{REPLAY_EXTENSION}")
+        self.episode.save(filename)
+        self.episode_saved = True
+
+    def snapshot(self: Self) -> SnakeGameState:
+        """Returns a copy of the current board and snake that can be handed back to restore()."""
+        return self.state.copy()
+
+    def restore(self: Self, snapshot: SnakeGameState):
+        """
+        Rolls the game back to a snapshot taken from this game, without touching timers or statistics.
+        The episode record is not rewound, so a restored episode can no longer be replayed, nor is it saved
+        as a replay.
+        """
+        self.state.restore(snapshot)
+        self.episode_saved = True
+        self.direction = snapshot.direction
+        self.action = DIRECTION_ACTIONS[snapshot.direction]
+        self.sync_state_arr()
+
+    def sync_state_arr(self: Self):
+        """Rebuilds the state_arr mirror from the compact state."""
+        cells = self.state.cells
+        block_states = list(BlockState)
+        for x, row in enumerate(self.state_arr):
+            offset = x * self.cols
+            for y in range(self.cols):
+                row[y] = block_states[cells[offset + y]]
+        self.changed_cells.clear()
+        self.redraw_all = True
+
+    def take_changed_cells(self: Self) -> list[int] | None:
+        """
+        Returns the flat indices of the cells changed since the last call, or None if the whole board has to
+        be redrawn, and starts a new list. Meant for the one renderer drawing this game.
+        """
+        if self.redraw_all:
+            self.redraw_all = False
+            self.changed_cells.clear()
+            return None
+        changed = self.changed_cells
+        self.changed_cells = []
+        return changed
+
     def save_game(self: Self, save_id: str, attempts: int, score: int, elapsed_time: float):
         """
         Save game statistics to a CSV file in the SaveData folder.
@@ -163,6 +309,8 @@ class SnakeGame:
         
         # Call plotting function directly and show any errors
         try:
+            # Imported on first use: the plot pulls in pandas and matplotlib, which dominate start-up time.
+            from Scenes.PlotCSVdata import plot_csv_data
             plot_csv_data(filename)
         except Exception as e:
             print(f"Error plotting data: {str(e)}")  # More detailed error output
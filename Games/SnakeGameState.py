@@ -0,0 +1,217 @@
+from array import array
+from typing import Self
+
+# Integer direction codes, in the same order as the InputAction members.
+UP = 0
+DOWN = 1
+RIGHT = 2
+LEFT = 3
+DIRECTION_DELTAS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+OPPOSITE_DIRECTION = (DOWN, UP, LEFT, RIGHT)
+
+# Cell codes stored in the board buffer. They match the BlockState values.
+CELL_EMPTY = 0
+CELL_SNAKE = 1
+CELL_FOOD = 2
+CELL_OBSTICLE = 3
+
+# Results returned by SnakeGameState.advance.
+STEP_MOVED = 0
+STEP_ATE = 1
+STEP_DIED = 2
+
+# Snakes start as a single cell and grow to this length over their first moves.
+START_LENGTH = 4
+
+# Neighbor tables are shared by every state with the same board size.
+_neighbor_tables = {}
+
+def neighbor_table(rows: int, cols: int) -> array:
+    """
+    Returns a flat table where entry (cell * 4 + direction) holds the index of the neighboring cell
+    in that direction, or -1 if the move would leave the board.
+    """
+    key = (rows, cols)
+    table = _neighbor_tables.get(key)
+    if table is None:
+        table = array('i', [-1]) * (rows * cols * 4)
+        for row in range(rows):
+            for col in range(cols):
+                cell = row * cols + col
+                for direction, (d_row, d_col) in enumerate(DIRECTION_DELTAS):
+                    n_row, n_col = row + d_row, col + d_col
+                    if 0 <= n_row < rows and 0 <= n_col < cols:
+                        table[cell * 4 + direction] = n_row * cols + n_col
+        _neighbor_tables[key] = table
+    return table
+
+
+class SnakeGameState:
+    """
+    Compact, allocation-free representation of a snake game.
+
+    Cells are addressed by flat index (row * cols + col). The board is a bytearray of cell codes and the
+    snake body is a fixed-capacity circular array('i') ordered from tail to head, so advancing the snake
+    only overwrites a few integers. Copies are plain buffer copies, which makes it cheap for search agents
+    to branch thousands of states per second.
+
+    A board can have static walls (see Games.Maps): walls is then a bytes object of capacity cell codes,
+    CELL_OBSTICLE for walls and CELL_EMPTY elsewhere, that every reset copies into the board. It never
+    changes, so copies share it.
+    """
+    __slots__ = ('rows', 'cols', 'capacity', 'neighbors', 'cells', 'body', 'tail_slot', 'length',
+                 'head', 'direction', 'food', 'score', 'pending_growth', 'is_dead', 'vacated',
+                 'walls', 'open_cells', 'start_cell')
+
+    def __init__(self: Self, rows: int = 26, cols: int = 32, walls: bytes = None, start_cell: int = -1) -> Self:
+        self.rows = rows
+        self.cols = cols
+        self.capacity = rows * cols
+        self.neighbors = neighbor_table(rows, cols)
+        self.cells = bytearray(self.capacity)
+        self.body = array('i', [0]) * self.capacity
+        self.walls = bytes(walls) if walls is not None else None
+        self.open_cells = self.capacity - (self.walls.count(CELL_OBSTICLE) if self.walls is not None else 0)
+        self.start_cell = start_cell if start_cell >= 0 else (rows // 2) * cols + cols // 2
+        self.reset()
+
+    def reset(self: Self, start_cell: int = -1, direction: int = RIGHT):
+        """Clears the board back to its walls and places a one-cell snake (by default at start_cell)."""
+        if start_cell < 0:
+            start_cell = self.start_cell
+        self.cells[:] = self.walls if self.walls is not None else bytes(self.capacity)
+        self.body[0] = start_cell
+        self.tail_slot = 0
+        self.length = 1
+        self.head = start_cell
+        self.direction = direction
+        self.food = -1
+        self.score = 0
+        self.pending_growth = START_LENGTH - 1
+        self.is_dead = False
+        self.vacated = -1
+        self.cells[start_cell] = CELL_SNAKE
+
+    def copy(self: Self) -> "SnakeGameState":
+        """Returns an independent copy. The neighbor table is shared since it never changes."""
+        clone = SnakeGameState.__new__(SnakeGameState)
+        clone.rows = self.rows
+        clone.cols = self.cols
+        clone.capacity = self.capacity
+        clone.neighbors = self.neighbors
+        clone.cells = bytearray(self.cells)
+        clone.body = self.body[:]
+        clone.tail_slot = self.tail_slot
+        clone.length = self.length
+        clone.head = self.head
+        clone.direction = self.direction
+        clone.food = self.food
+        clone.score = self.score
+        clone.pending_growth = self.pending_growth
+        clone.is_dead = self.is_dead
+        clone.vacated = self.vacated
+        clone.walls = self.walls
+        clone.open_cells = self.open_cells
+        clone.start_cell = self.start_cell
+        return clone
+
+    def restore(self: Self, other: "SnakeGameState"):
+        """Overwrites this state with another state of the same board, reusing this state's buffers."""
+        self.cells[:] = other.cells
+        self.body[:] = other.body
+        self.tail_slot = other.tail_slot
+        self.length = other.length
+        self.head = other.head
+        self.direction = other.direction
+        self.food = other.food
+        self.score = other.score
+        self.pending_growth = other.pending_growth
+        self.is_dead = other.is_dead
+        self.vacated = other.vacated
+
+    def next_cell(self: Self, direction: int) -> int:
+        """Returns the cell the head would move into, or -1 if that move leaves the board."""
+        return self.neighbors[(self.head << 2) | direction]
+
+    def is_blocked(self: Self, cell: int) -> bool:
+        """Returns True if moving into the cell would kill the snake."""
+        return cell < 0 or self.cells[cell] == CELL_SNAKE or self.cells[cell] == CELL_OBSTICLE
+
+    def advance(self: Self, direction: int) -> int:
+        """
+        Moves the snake one cell in the given direction.
+        Returns STEP_MOVED, STEP_ATE or STEP_DIED. Food is not replaced here; after STEP_ATE the caller
+        places new food, so that the choice of random source stays with the caller.
+        """
+        if self.is_dead:
+            return STEP_DIED
+        self.direction = direction
+        self.vacated = -1
+        cells = self.cells
+        new_head = self.neighbors[(self.head << 2) | direction]
+        if new_head < 0 or cells[new_head] == CELL_SNAKE or cells[new_head] == CELL_OBSTICLE:
+            self.is_dead = True
+            return STEP_DIED
+        if self.score == self.open_cells - 5:
+            # The board is full.
+            self.is_dead = True
+            return STEP_DIED
+
+        ate = cells[new_head] == CELL_FOOD
+        if ate:
+            self.score += 1
+            self.food = -1
+        elif self.pending_growth > 0:
+            self.pending_growth -= 1
+        else:
+            tail = self.body[self.tail_slot]
+            cells[tail] = CELL_EMPTY
+            self.vacated = tail
+            self.tail_slot += 1
+            if self.tail_slot == self.capacity:
+                self.tail_slot = 0
+            self.length -= 1
+
+        head_slot = self.tail_slot + self.length
+        if head_slot >= self.capacity:
+            head_slot -= self.capacity
+        self.body[head_slot] = new_head
+        self.length += 1
+        self.head = new_head
+        cells[new_head] = CELL_SNAKE
+        return STEP_ATE if ate else STEP_MOVED
+
+    def place_food(self: Self, rng) -> int:
+        """
+        Places food on a random empty cell using rng (anything with randint, such as the random module)
+        and returns its index, or -1 if the board has no empty cell left.
+        """
+        cells = self.cells
+        # Rejection sampling is fast while the board is mostly empty.
+        if self.open_cells - self.length > self.capacity // 8:
+            while True:
+                cell = rng.randint(0, self.rows - 1) * self.cols + rng.randint(0, self.cols - 1)
+                if cells[cell] == CELL_EMPTY:
+                    break
+        else:
+            # On a crowded board, pick directly from the remaining empty cells.
+            empty = [i for i in range(self.capacity) if cells[i] == CELL_EMPTY]
+            if not empty:
+                self.food = -1
+                return -1
+            cell = empty[rng.randint(0, len(empty) - 1)]
+        cells[cell] = CELL_FOOD
+        self.food = cell
+        return cell
+
+    def body_cell(self: Self, position: int) -> int:
+        """Returns the body cell at the given position, counted from the tail (0) to the head (length - 1)."""
+        slot = self.tail_slot + position
+        if slot >= self.capacity:
+            slot -= self.capacity
+        return self.body[slot]
+
+    def body_cells(self: Self):
+        """Yields the snake's cells from tail to head."""
+        for position in range(self.length):
+            yield self.body_cell(position)
@@ -1,4 +1,3 @@
-import networkx as nx
 from Games.SnakeGameLogic import BlockState
 
 def array_to_graph(grid):
@@ -8,6 +7,9 @@ def array_to_graph(grid):
     Nodes represent each cell (as (row, col)) that is not an obstacle.
     Edges connect nodes that are adjacent in the grid (up, down, left, right).
     """
+    # networkx is only needed once a graph is built, so it isn't imported with the module.
+    import networkx as nx
+
     G = nx.Graph()
     rows = len(grid)
     cols = len(grid[0]) if rows > 0 else 0
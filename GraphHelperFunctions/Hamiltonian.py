@@ -52,16 +52,16 @@ def find_hamiltonian_cycle(m, n):
         # For the zig-zag to end at the top (row 1), we require that the last column (j = n-1)
         # is odd; that is, n must be even.
         # Combine the connector (reserved row) with the interior zig-zag.
+        # The zig-zag ends at (1, n - 1), next to the connector's first node, which closes the cycle.
         cycle = connector + interior
-        cycle.append((0 ,n - 1))
         
     elif m % 2 == 0:
         # m is odd but n is even.
         # Reserve the leftmost column.
         reserved_col = 0
         interior_cols = list(range(1, n))
-        # Build reserved connector: all nodes in the reserved column (from top to bottom).
-        connector = [(i, reserved_col) for i in range(m)]
+        # Build reserved connector: all nodes in the reserved column (from bottom to top).
+        connector = [(i, reserved_col) for i in range(m - 1, -1, -1)]
         
         # Now build a zig-zag path over the interior block of columns 1 .. n-1, iterating by rows.
         # For each row, if the row index is even, traverse the interior columns left-to-right;
@@ -74,8 +74,8 @@ def find_hamiltonian_cycle(m, n):
             else:
                 for j in reversed(interior_cols):
                     interior.append((i, j))
-        # Now the interior path should start at (0, 1) and end at (m-1, 1) provided that m is even.
-        # Since m is odd here, the pattern is arranged to keep the connection on column 1.
+        # Now the interior path starts at (0, 1), next to the connector's last node, and ends at (m-1, 1),
+        # next to its first node, since m is even.
         cycle = connector + interior
         
     else:
@@ -89,4 +89,163 @@ def find_hamiltonian_cycle(m, n):
         if not are_adjacent(a, b):
             print("Adjacency error between", a, "and", b)
             return cycle
-    return cycle
\ No newline at end of file
+    return cycle
+
+# Cell code of a wall in a map's walls buffer (Games.SnakeGameState.CELL_OBSTICLE).
+WALL = 3
+# Steps the backtracking search may take on maps without the 2x2 block structure before giving up.
+SEARCH_STEPS = 200_000
+
+def find_hamiltonian_cycle_on_map(walls, rows, cols, max_steps=SEARCH_STEPS):
+    """
+    Construct a Hamiltonian cycle through the open cells of a rows x cols board whose walls buffer holds
+    WALL for every wall cell (or is None for an open board). Returns a list of (row, col) nodes, each
+    following the one before and the last leading back to the first, or None if no cycle was found.
+
+    Without walls this is find_hamiltonian_cycle. When every wall covers whole 2x2 blocks (as the generated
+    maps do), the cycle is built from a spanning tree of the open blocks, which always works when the open
+    cells are connected. Other maps fall back to a backtracking search of at most max_steps steps.
+    """
+    if walls is None or WALL not in walls:
+        return find_hamiltonian_cycle(rows, cols)
+    cycle = block_cycle(walls, rows, cols)
+    if cycle is None:
+        cycle = search_cycle(walls, rows, cols, max_steps)
+    return cycle
+
+def block_cycle(walls, rows, cols):
+    """
+    Tiles the board with 2x2 blocks, each walked clockwise as a little cycle, and joins the cycles of
+    neighbouring blocks along a spanning tree. Joining block A to the block B on its right replaces the
+    moves A.TR->A.BR and B.BL->B.TL with A.TR->B.TL and B.BL->A.BR; joining A to the block B below replaces
+    A.BR->A.BL and B.TL->B.TR with A.BR->B.TR and B.TL->A.BL. Returns None unless every block is entirely
+    open or entirely walled (with any odd last row or column walled) and the open blocks are connected.
+    """
+    block_rows, block_cols = rows // 2, cols // 2
+    for row in range(rows):
+        for col in range(cols):
+            wall = walls[row * cols + col] == WALL
+            if row >= 2 * block_rows or col >= 2 * block_cols:
+                if not wall:
+                    return None
+            elif wall != (walls[(row & ~1) * cols + (col & ~1)] == WALL):
+                return None
+    open_blocks = [(r, c) for r in range(block_rows) for c in range(block_cols) if walls[2 * r * cols + 2 * c] != WALL]
+    if not open_blocks:
+        return None
+
+    # Clockwise successor of every open cell.
+    successor = {}
+    for r, c in open_blocks:
+        top, left = 2 * r, 2 * c
+        successor[(top, left)] = (top, left + 1)
+        successor[(top, left + 1)] = (top + 1, left + 1)
+        successor[(top + 1, left + 1)] = (top + 1, left)
+        successor[(top + 1, left)] = (top, left)
+
+    # Depth-first spanning tree of the open blocks.
+    is_open = set(open_blocks)
+    seen = {open_blocks[0]}
+    stack = [open_blocks[0]]
+    while stack:
+        r, c = stack.pop()
+        for n_r, n_c in ((r, c + 1), (r + 1, c), (r, c - 1), (r - 1, c)):
+            if (n_r, n_c) not in is_open or (n_r, n_c) in seen:
+                continue
+            seen.add((n_r, n_c))
+            stack.append((n_r, n_c))
+            (a_r, a_c), (b_r, b_c) = sorted(((r, c), (n_r, n_c)))
+            if a_r == b_r:
+                # B is right of A.
+                successor[(2 * a_r, 2 * a_c + 1)] = (2 * b_r, 2 * b_c)
+                successor[(2 * b_r + 1, 2 * b_c)] = (2 * a_r + 1, 2 * a_c + 1)
+            else:
+                # B is below A.
+                successor[(2 * a_r + 1, 2 * a_c + 1)] = (2 * b_r, 2 * b_c + 1)
+                successor[(2 * b_r, 2 * b_c)] = (2 * a_r + 1, 2 * a_c)
+    if len(seen) != len(open_blocks):
+        return None
+
+    start = (2 * open_blocks[0][0], 2 * open_blocks[0][1])
+    cycle = [start]
+    node = successor[start]
+    while node != start:
+        cycle.append(node)
+        node = successor[node]
+    return cycle
+
+def search_cycle(walls, rows, cols, max_steps):
+    """
+    Backtracking search for a Hamiltonian cycle through the open cells, trying the neighbours with the fewest
+    onward moves first (Warnsdorff's rule) and, among those, the ones farthest from the start, so the path
+    heads back to the start last. Gives up after max_steps moves. Grid graphs are bipartite, so a
+    cycle needs as many open cells of one checkerboard colour as of the other; that and cells with fewer than
+    two open neighbours are checked up front, and moves that leave a cell with only one way left are pruned.
+    """
+    size = rows * cols
+    neighbors = [[] for _ in range(size)]
+    open_count = 0
+    balance = 0
+    for cell in range(size):
+        if walls[cell] == WALL:
+            continue
+        open_count += 1
+        row, col = divmod(cell, cols)
+        balance += 1 if (row + col) % 2 == 0 else -1
+        for n_row, n_col in ((row - 1, col), (row + 1, col), (row, col + 1), (row, col - 1)):
+            if 0 <= n_row < rows and 0 <= n_col < cols and walls[n_row * cols + n_col] != WALL:
+                neighbors[cell].append(n_row * cols + n_col)
+        if len(neighbors[cell]) < 2:
+            return None
+    if open_count < 4 or balance != 0:
+        return None
+
+    start = min((cell for cell in range(size) if walls[cell] != WALL), key=lambda cell: len(neighbors[cell]))
+    closing = set(neighbors[start])
+    visited = bytearray(size)
+    start_row, start_col = divmod(start, cols)
+
+    def distance_to_start(cell):
+        row, col = divmod(cell, cols)
+        return abs(row - start_row) + abs(col - start_col)
+
+    def strands_a_cell(head, next_cell):
+        # Moving on from head leaves its other unvisited neighbours one way fewer in or out; each still needs
+        # two (counting the new head and the start, which the path can still come from or return to).
+        for cell in neighbors[head]:
+            if cell == next_cell or visited[cell]:
+                continue
+            ways = 0
+            for n in neighbors[cell]:
+                if not visited[n] or n == next_cell or n == start:
+                    ways += 1
+            if ways < 2:
+                return True
+        return False
+
+    visited[start] = 1
+    path = [start]
+    choices = [iter(neighbors[start])]
+    steps = 0
+    while choices:
+        if len(path) == open_count:
+            if path[-1] in closing:
+                return [divmod(cell, cols) for cell in path]
+        else:
+            next_cell = next(choices[-1], None)
+            if next_cell is not None:
+                if visited[next_cell] or strands_a_cell(path[-1], next_cell):
+                    continue
+                steps += 1
+                if steps > max_steps:
+                    return None
+                visited[next_cell] = 1
+                path.append(next_cell)
+                onward = [cell for cell in neighbors[next_cell] if not visited[cell]]
+                onward.sort(key=lambda cell: (sum(not visited[n] for n in neighbors[cell]), -distance_to_start(cell)))
+                choices.append(iter(onward))
+                continue
+        # Dead end (or a full path that doesn't close): step back.
+        choices.pop()
+        visited[path.pop()] = 0
+    return None
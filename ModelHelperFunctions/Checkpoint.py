@@ -0,0 +1,198 @@
+import os
+import re
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import torch
+
+MEMORY_FIELDS = ("states", "actions", "rewards", "next_states", "dones")
+CHECKPOINT_PATTERN = re.compile(r"^(best|latest)-(\d+)-(\d+)$")
+
+
+def clone_tensors(value):
+    """Deep-copies the tensors in a (nested) state dict so the live training state can keep changing."""
+    if isinstance(value, torch.Tensor):
+        return value.detach().clone()
+    if isinstance(value, dict):
+        return {key: clone_tensors(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone_tensors(item) for item in value]
+    return value
+
+
+def checkpoint_directory(network: str, rows: int, cols: int, root="./model/checkpoints") -> str:
+    """The directory of a network's checkpoints on one board size, such as model/checkpoints/conv-26x32."""
+    return os.path.join(root, f"{network}-{rows}x{cols}")
+
+
+class CheckpointManager:
+    """
+    Saves and restores DeepRLAgent training runs.
+
+    A checkpoint is a directory holding state.pt (model, optimizer, target network, counters and RNG
+    states) and, optionally, the filled part of the replay memory as .npy files, which are loaded into the
+    agent's buffer in full. Two kinds are kept, each rotated independently:
+
+        latest-<sequence>-<n_games>   the keep_latest most recently written checkpoints, with replay memory,
+                                      for resuming
+        best-<score>-<n_games>        the keep_best highest-scoring models, without replay memory
+
+    Latest checkpoints are numbered in the order they are written rather than ranked by n_games, so a run
+    started afresh in a directory keeps its own checkpoints even when an older run there trained for longer.
+    Scores are only comparable on the same board, so every network and board size needs its own directory
+    (see checkpoint_directory).
+
+    The training state is snapshotted on the calling thread, then written to disk by a background thread,
+    so a save never blocks the game loop on file I/O. Checkpoints are written to a temporary directory and
+    renamed into place, so a crash mid-save never leaves a half-written checkpoint behind.
+    """
+
+    def __init__(self, directory="./model/checkpoints", keep_best=3, keep_latest=2):
+        self.directory = directory
+        self.keep_best = keep_best
+        self.keep_latest = keep_latest
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self.pending: list[Future] = []
+        os.makedirs(directory, exist_ok=True)
+        # Number of the next latest checkpoint, continuing after those already in the directory.
+        latest = self.latest()
+        self.sequence = int(CHECKPOINT_PATTERN.match(os.path.basename(latest)).group(2)) + 1 if latest else 0
+
+    def save_latest(self, agent) -> Future:
+        """Saves a resumable checkpoint of the agent, including its replay memory."""
+        return self.save(agent, "latest", 0, include_memory=True)
+
+    def save_best(self, agent, score: int) -> Future | None:
+        """
+        Saves the agent's model as a best checkpoint if score ranks among the keep_best highest.
+        Returns None when the score would be rotated out straight away.
+        """
+        best = self.checkpoints("best")
+        if len(best) >= self.keep_best and score <= int(CHECKPOINT_PATTERN.match(os.path.basename(best[-1])).group(2)):
+            return None
+        return self.save(agent, "best", score, include_memory=False)
+
+    def save(self, agent, kind: str, score: int, include_memory: bool) -> Future:
+        snapshot = self.snapshot(agent, include_memory)
+        if kind == "best":
+            name = f"best-{score:06d}-{agent.n_games:08d}"
+        else:
+            name = f"latest-{self.sequence:08d}-{agent.n_games:08d}"
+            self.sequence += 1
+        future = self.executor.submit(self.write, name, snapshot)
+        self.pending = [pending for pending in self.pending if not pending.done()] + [future]
+        return future
+
+    def snapshot(self, agent, include_memory: bool) -> dict:
+        """Copies everything needed to resume training. Runs on the caller's thread, so it is consistent."""
+        trainer = agent.trainer
+        state = {
+            "network": agent.network,
+            "state_shape": agent.state_shape,
+            "model": clone_tensors(agent.model.state_dict()),
+            "optimizer": clone_tensors(trainer.optimizer.state_dict()),
+            "target_model": None if trainer.target_model is None else clone_tensors(trainer.target_model.state_dict()),
+            "train_steps": trainer.train_steps,
+            "n_games": agent.n_games,
+            "n_steps": agent.n_steps,
+            "epsilon": agent.epsilon,
+            "rng": agent.rng.getstate(),
+            "np_rng": agent.np_rng.bit_generator.state,
+            "torch_rng": torch.get_rng_state(),
+            "memory": None,
+        }
+        memory = {}
+        if include_memory:
+            buffer = agent.memory
+            state["memory"] = {"position": buffer.position, "size": buffer.size, "capacity": buffer.capacity}
+            for field in MEMORY_FIELDS:
+                memory[field] = getattr(buffer, field)[:buffer.size].copy()
+        return {"state": state, "memory": memory}
+
+    def write(self, name: str, snapshot: dict) -> str:
+        path = os.path.join(self.directory, name)
+        temp_path = path + ".tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        torch.save(snapshot["state"], os.path.join(temp_path, "state.pt"))
+        for field, array in snapshot["memory"].items():
+            np.save(os.path.join(temp_path, f"memory_{field}.npy"), array)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+        self.rotate()
+        return path
+
+    def checkpoints(self, kind: str) -> list[str]:
+        """Returns the paths of the saved checkpoints of a kind, best (highest score) or last written first."""
+        found = []
+        for name in os.listdir(self.directory):
+            match = CHECKPOINT_PATTERN.match(name)
+            if match and match.group(1) == kind:
+                found.append((int(match.group(2)), int(match.group(3)), name))
+        found.sort(reverse=True)
+        return [os.path.join(self.directory, name) for _, _, name in found]
+
+    def rotate(self):
+        for kind, keep in (("best", self.keep_best), ("latest", self.keep_latest)):
+            for path in self.checkpoints(kind)[keep:]:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def latest(self) -> str | None:
+        paths = self.checkpoints("latest")
+        return paths[0] if paths else None
+
+    def best(self) -> str | None:
+        paths = self.checkpoints("best")
+        return paths[0] if paths else None
+
+    def wait(self):
+        """Blocks until all queued saves have been written."""
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
+
+    def resume(self, agent) -> bool:
+        """Restores the agent from the latest checkpoint. Returns False if there is none."""
+        self.wait()
+        path = self.latest()
+        if path is None:
+            return False
+        self.load(path, agent)
+        return True
+
+    def load(self, path: str, agent):
+        """
+        Restores an agent from a checkpoint directory. Best checkpoints restore the model and counters but
+        leave the replay memory as it is.
+        """
+        state = torch.load(os.path.join(path, "state.pt"), weights_only=True)
+        if state["network"] != agent.network or tuple(state["state_shape"]) != tuple(agent.state_shape):
+            raise ValueError(f"Checkpoint {path} is for a {state['network']} network over {state['state_shape']}, "
+                             f"not {agent.network} over {agent.state_shape}")
+        trainer = agent.trainer
+        agent.model.load_state_dict(state["model"])
+        trainer.optimizer.load_state_dict(state["optimizer"])
+        if trainer.target_model is not None:
+            trainer.target_model.load_state_dict(state["target_model"] or state["model"])
+        trainer.train_steps = state["train_steps"]
+        agent.n_games = state["n_games"]
+        agent.n_steps = state["n_steps"]
+        agent.epsilon = state["epsilon"]
+        agent.rng.setstate(state["rng"])
+        agent.np_rng.bit_generator.state = state["np_rng"]
+        torch.set_rng_state(state["torch_rng"])
+
+        memory = state["memory"]
+        if memory is not None:
+            buffer = agent.memory
+            size = min(memory["size"], buffer.capacity)
+            for field in MEMORY_FIELDS:
+                # The buffer owns its arrays and keeps changing them, so the stored memory is read in full.
+                stored = np.load(os.path.join(path, f"memory_{field}.npy"))
+                getattr(buffer, field)[:size] = stored[:size]
+            buffer.size = size
+            buffer.position = memory["position"] % buffer.capacity if size == memory["size"] else 0
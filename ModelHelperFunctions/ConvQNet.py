@@ -0,0 +1,41 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import os
+
+class Conv_QNet(nn.Module):
+    """
+    Q-network over the whole board, fed with stacked channel planes (see SnakeGameEnv.board_planes).
+
+    Sized for CPU training: one full-resolution 3x3 convolution to pick up local danger, then two
+    stride-2 convolutions that shrink the board 4x in each dimension before a small fully connected head.
+    """
+
+    def __init__(self, in_channels, rows, cols, output_size, hidden_size=256):
+        super().__init__()
+        self.rows = rows
+        self.cols = cols
+        self.conv1 = nn.Conv2d(in_channels, 16, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(16, 32, kernel_size=3, stride=2, padding=1)
+        self.conv3 = nn.Conv2d(32, 32, kernel_size=3, stride=2, padding=1)
+        reduced_rows = (((rows + 1) // 2) + 1) // 2
+        reduced_cols = (((cols + 1) // 2) + 1) // 2
+        self.fc = nn.Linear(32 * reduced_rows * reduced_cols, hidden_size)
+        self.head = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x):
+        if x.dim() == 3:
+            x = x.unsqueeze(0)
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        x = F.relu(self.fc(torch.flatten(x, 1)))
+        return self.head(x)
+
+    def save(self, file_name='conv_model.pth'):
+        model_folder_path = './model'
+        if not os.path.exists(model_folder_path):
+            os.makedirs(model_folder_path)
+
+        file_name = os.path.join(model_folder_path, file_name)
+        torch.save(self.state_dict(), file_name)
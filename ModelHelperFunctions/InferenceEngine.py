@@ -0,0 +1,82 @@
+import numpy as np
+import torch
+
+class NumpyQNet:
+    """
+    Pure-NumPy forward pass of a Linear_QNet.
+
+    The weight arrays are views of the model's CPU parameters rather than copies, so they follow the
+    optimizer's in-place updates and never need re-exporting during training.
+    """
+
+    def __init__(self, model):
+        self.w1 = model.linear1.weight.detach().numpy().T
+        self.b1 = model.linear1.bias.detach().numpy()
+        self.w2 = model.linear2.weight.detach().numpy().T
+        self.b2 = model.linear2.bias.detach().numpy()
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        hidden = x @ self.w1
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden)
+        out = hidden @ self.w2
+        out += self.b2
+        return out
+
+
+class QNetInferenceEngine:
+    """
+    Action selection for Q-networks without autograd overhead.
+
+    Batches are copied into a reusable input buffer (pinned when the model lives on a GPU) and run under
+    torch.inference_mode. For Linear_QNet on the CPU the engine can instead use a NumPy forward pass,
+    which avoids PyTorch's per-call dispatch cost on the actor side.
+    """
+
+    def __init__(self, model, input_shape=None, max_batch=256, use_numpy=True):
+        self.model = model
+        self.device = next(model.parameters()).device
+        if input_shape is None:
+            input_shape = (model.linear1.in_features,)
+        self.input_shape = tuple(input_shape)
+        self.action_count = list(model.parameters())[-1].shape[0]
+        pin = self.device.type == "cuda"
+        self.input_buffer = torch.empty((max_batch,) + self.input_shape, dtype=torch.float, pin_memory=pin)
+        self.numpy_net = None
+        if use_numpy and self.device.type == "cpu" and hasattr(model, "linear1") and hasattr(model, "linear2"):
+            self.numpy_net = self.export_numpy()
+
+    def export_numpy(self) -> NumpyQNet:
+        """Returns a NumPy forward pass sharing the model's weights (CPU Linear_QNet only)."""
+        return NumpyQNet(self.model)
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        """Returns the Q-values for a batch of states with shape (n,) + input_shape."""
+        states = np.asarray(states, dtype=np.float32)
+        if self.numpy_net is not None:
+            return self.numpy_net.forward(states)
+        count = len(states)
+        if count > len(self.input_buffer):
+            self.input_buffer = torch.empty((count,) + self.input_shape, dtype=torch.float,
+                                            pin_memory=self.input_buffer.is_pinned())
+        batch = self.input_buffer[:count]
+        batch.copy_(torch.from_numpy(states))
+        with torch.inference_mode():
+            return self.model(batch.to(self.device, non_blocking=True)).cpu().numpy()
+
+    def best_actions(self, states: np.ndarray) -> np.ndarray:
+        """Returns the greedy action index for each state in the batch."""
+        return np.argmax(self.q_values(states), axis=1)
+
+    def best_action(self, state: np.ndarray) -> int:
+        """Returns the greedy action index for a single state."""
+        return int(self.best_actions(np.asarray(state, dtype=np.float32)[None])[0])
+
+    def select_actions(self, states: np.ndarray, epsilon: float, rng: np.random.Generator) -> np.ndarray:
+        """Epsilon-greedy action indices for a batch of states, with exploration drawn from rng."""
+        actions = self.best_actions(states)
+        explore = rng.random(len(actions)) < epsilon
+        count = int(explore.sum())
+        if count:
+            actions[explore] = rng.integers(0, self.action_count, size=count)
+        return actions
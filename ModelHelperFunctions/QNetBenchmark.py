@@ -0,0 +1,59 @@
+"""
+Compares the linear feature network against the convolutional board network.
+
+Run from the repository root:
+
+    python -m ModelHelperFunctions.QNetBenchmark --games 100 --rows 12 --cols 12
+
+For each network it reports training throughput (environment steps per second, including the learning
+updates) and sample efficiency (mean score over the last games, and the score reached per thousand steps).
+"""
+import argparse
+import time
+import numpy as np
+
+
+def benchmark_network(network: str, n_games: int, rows=26, cols=32, seed=0, num_envs=1) -> dict:
+    """Trains a fresh agent headlessly for n_games and returns its throughput and score statistics."""
+    # Imported here so that the module can be inspected without pulling in pygame.
+    from Scenes.SnakeGameRL_DLAgent import DeepRLAgent, train_headless
+
+    agent = DeepRLAgent(seed, network=network, rows=rows, cols=cols)
+    start = time.perf_counter()
+    scores = train_headless(agent, n_games, rows=rows, cols=cols, seed=seed, num_envs=num_envs)
+    elapsed = time.perf_counter() - start
+
+    tail = scores[-max(1, n_games // 5):]
+    return {
+        "network": network,
+        "games": n_games,
+        "steps": agent.n_steps,
+        "seconds": elapsed,
+        "steps_per_second": agent.n_steps / elapsed,
+        "mean_score_last_games": float(np.mean(tail)),
+        "best_score": max(scores),
+        "score_per_1k_steps": 1000 * sum(scores) / max(agent.n_steps, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=12)
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--envs", type=int, default=1, help="environments stepped in lockstep")
+    parser.add_argument("--networks", nargs="+", default=["linear", "conv"])
+    args = parser.parse_args()
+
+    for network in args.networks:
+        result = benchmark_network(network, args.games, args.rows, args.cols, args.seed, args.envs)
+        print(f"{result['network']:>6}: {result['steps_per_second']:8.0f} steps/s  "
+              f"{result['steps']:7d} steps in {result['seconds']:6.1f}s  "
+              f"mean score (last games) {result['mean_score_last_games']:5.1f}  "
+              f"best {result['best_score']:3d}  "
+              f"score/1k steps {result['score_per_1k_steps']:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
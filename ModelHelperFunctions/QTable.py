@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from Games.SnakeGameState import SnakeGameState
+from ModelHelperFunctions.StateEncoders import AbsoluteEncoder
+
+
+class QTable:
+    """
+    Dense tabular Q-values, one row per encoded state and one column per direction (UP, DOWN, RIGHT, LEFT,
+    matching the direction codes in Games.SnakeGameState).
+
+    The encoder (see ModelHelperFunctions/StateEncoders.py) decides the state space. The default
+    AbsoluteEncoder enumerates (head cell, food cell): rows*cols*rows*cols states with four actions is about
+    11MB of float32 on the default 26x32 board. States are plain integers, so action selection and updates
+    for a whole batch of environments are NumPy gathers and scatters.
+
+    Encoders may fold symmetric states together; encode_state then also returns the symmetry used, and
+    table actions are directions in that folded frame (see actions_to_directions).
+    """
+
+    def __init__(self, rows: int, cols: int, learning_rate=0.1, discount_factor=0.9, values: np.ndarray = None,
+                 encoder=None):
+        self.rows = rows
+        self.cols = cols
+        self.cell_count = rows * cols
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.encoder = encoder if encoder is not None else AbsoluteEncoder(rows, cols)
+        shape = (self.encoder.state_count, 4)
+        if values is None:
+            values = np.zeros(shape, dtype=np.float32)
+        elif values.shape != shape:
+            raise ValueError(f"Q-table of shape {values.shape} does not fit the {self.encoder.name} encoding of a "
+                             f"{rows}x{cols} board")
+        self.values = values
+
+    def encode_state(self, state: SnakeGameState) -> tuple[int, int]:
+        """Returns (table row, symmetry) for a game state."""
+        return self.encoder.encode(state)
+
+    def actions_to_directions(self, actions: np.ndarray, symmetries: np.ndarray) -> np.ndarray:
+        """Maps table actions, chosen in each state's folded frame, back to board directions."""
+        return self.encoder.action_from_canonical[symmetries, actions]
+
+    def best_actions(self, states: np.ndarray) -> np.ndarray:
+        return np.argmax(self.values[states], axis=1)
+
+    def select_actions(self, states: np.ndarray, epsilon: float, rng: np.random.Generator, return_greedy=False):
+        """
+        Epsilon-greedy directions for a batch of encoded states. With return_greedy, also returns a mask of
+        the actions that agree with the greedy policy (for off-policy trace cutting).
+        """
+        best = self.best_actions(states)
+        actions = best.copy() if return_greedy else best
+        explore = rng.random(len(actions)) < epsilon
+        count = int(explore.sum())
+        if count:
+            actions[explore] = rng.integers(0, 4, size=count)
+        if return_greedy:
+            return actions, actions == best
+        return actions
+
+    def update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray, next_states: np.ndarray,
+               dones: np.ndarray):
+        """
+        Applies the Q-learning update to a batch of transitions. Terminal transitions don't bootstrap.
+        """
+        values = self.values
+        next_max = values[next_states].max(axis=1)
+        targets = rewards + self.discount_factor * next_max * (1 - dones)
+        self.apply_deltas(states, actions, self.learning_rate * (targets - values[states, actions]))
+
+    def apply_deltas(self, states: np.ndarray, actions: np.ndarray, deltas: np.ndarray):
+        """
+        Adds deltas to the given state-action values. Pairs that appear more than once in the batch get
+        the mean of their deltas: with many environments in a few states, summing them would multiply the
+        learning rate and diverge.
+        """
+        flat = states * 4 + actions
+        pairs, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+        if len(pairs) == len(flat):
+            self.values.reshape(-1)[flat] += deltas.astype(np.float32)
+            return
+        sums = np.bincount(inverse, weights=deltas, minlength=len(pairs))
+        self.values.reshape(-1)[pairs] += (sums / counts).astype(np.float32)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if isinstance(self.values, np.memmap) and os.path.abspath(self.values.filename) == os.path.abspath(path):
+            self.values.flush()
+        else:
+            np.save(path, self.values)
+
+    @classmethod
+    def load(cls, path: str, rows: int, cols: int, mmap_mode="r+", **kwargs):
+        """
+        Loads a table saved with save(). By default the file is memory-mapped read-write, so training
+        updates go straight to the page cache and save() only has to flush them.
+        Use mmap_mode="r" for a read-only policy, or None to load a private copy.
+        """
+        return cls(rows, cols, values=np.load(path, mmap_mode=mmap_mode), **kwargs)
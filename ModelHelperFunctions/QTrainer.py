@@ -2,7 +2,10 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
+import numpy as np
+import copy
 import os
+import warnings
 
 class Linear_QNet(nn.Module):
     def __init__(self, input_size, hidden_size, output_size):
@@ -25,44 +28,156 @@ class Linear_QNet(nn.Module):
 
 
 class QTrainer:
-    def __init__(self, model, lr, gamma):
+    def __init__(self, model, lr, gamma, target_update=0, tau=None, double_dqn=False, num_threads=None,
+                 compile_mode=None, fused=None):
+        """
+        :param target_update: If > 0, bootstrap from a target network that is copied from the model every
+                              target_update train steps.
+        :param tau: If set, keep a target network that tracks the model by Polyak averaging after every
+                    train step: target = tau * model + (1 - tau) * target.
+        :param double_dqn: Pick the next action with the model but evaluate it with the target network.
+                           Without a target network this is the same as the standard update.
+        :param num_threads: Intra-op thread count for PyTorch on the CPU. This is process-wide; None leaves
+                            PyTorch's default. Small networks are often fastest with one or two threads.
+        :param compile_mode: None for eager mode, "compile" to torch.compile the loss computation, or "script"
+                             to run the forward passes through a TorchScript trace of the model. If compilation
+                             fails (no compiler toolchain, unsupported model), training falls back to eager mode.
+        :param fused: Use the fused Adam kernel. None uses it where the installed PyTorch supports it.
+        See ModelHelperFunctions/TrainerBenchmark.py to pick the fastest combination for a machine.
+        """
         self.lr = lr
         self.gamma = gamma
         self.model = model
-        self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        self.optimizer = self.make_optimizer(fused)
         self.criterion = nn.MSELoss()
+        self.target_update = target_update
+        self.tau = tau
+        self.double_dqn = double_dqn
+        self.train_steps = 0
+        self.target_model = None
+        if target_update > 0 or tau is not None:
+            self.target_model = copy.deepcopy(model)
+            self.target_model.requires_grad_(False)
+
+        self.compile_mode = compile_mode
+        self.forward_model = model
+        self.loss_fn = self.compute_loss
+        if compile_mode == "compile":
+            self.loss_fn = torch.compile(self.compute_loss, dynamic=True)
+        elif compile_mode == "script":
+            self.forward_model = self.trace_model()
+        elif compile_mode is not None:
+            raise ValueError(f"Unknown compile_mode {compile_mode!r}")
+
+    def make_optimizer(self, fused):
+        """Adam, with the fused single-kernel update when requested (or, with fused=None, when supported)."""
+        if fused is False:
+            return optim.Adam(self.model.parameters(), lr=self.lr)
+        try:
+            return optim.Adam(self.model.parameters(), lr=self.lr, fused=True)
+        except (RuntimeError, TypeError):
+            if fused:
+                raise
+            return optim.Adam(self.model.parameters(), lr=self.lr)
+
+    def trace_model(self):
+        """TorchScript trace of the model. The trace shares the model's parameters, so training updates both."""
+        parameter = next(self.model.parameters())
+        if hasattr(self.model, "linear1"):
+            example = torch.zeros((1, self.model.linear1.in_features), device=parameter.device)
+        else:
+            example = torch.zeros((1, self.model.conv1.in_channels, self.model.rows, self.model.cols),
+                                  device=parameter.device)
+        try:
+            with warnings.catch_warnings():
+                # Recent PyTorch versions deprecate TorchScript, but tracing still works and is measured by
+                # the trainer benchmark alongside torch.compile.
+                warnings.simplefilter("ignore", FutureWarning)
+                return torch.jit.trace(self.model, example)
+        except Exception as error:
+            print(f"TorchScript tracing failed, training in eager mode: {error}")
+            self.compile_mode = None
+            return self.model
 
     def train_step(self, state, action, reward, next_state, done):
-        state = torch.tensor(state, dtype=torch.float)
-        next_state = torch.tensor(next_state, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward = torch.tensor(reward, dtype=torch.float)
-        # (n, x)
+        """
+        Trains on one transition (done is a bool) or a batch of transitions (done is a sequence).
+        Actions are one-hot encoded.
+        """
+        state = np.asarray(state, dtype=np.float32)
+        next_state = np.asarray(next_state, dtype=np.float32)
+        action = np.argmax(np.asarray(action), axis=-1)
+        reward = np.asarray(reward, dtype=np.float32)
 
-        if len(state.shape) == 1:
+        if not isinstance(done, (tuple, list, np.ndarray)):
             # (1, x)
-            state = torch.unsqueeze(state, 0)
-            next_state = torch.unsqueeze(next_state, 0)
-            action = torch.unsqueeze(action, 0)
-            reward = torch.unsqueeze(reward, 0)
+            state = state[None]
+            next_state = next_state[None]
+            action = action[None]
+            reward = reward[None]
             done = (done, )
+        self.train_batch(state, action, reward, next_state, np.asarray(done, dtype=np.float32))
 
-        # 1: predicted Q values with current state
-        pred = self.model(state)
+    def train_batch(self, state, action, reward, next_state, done):
+        """
+        Batched update from NumPy arrays: states with a leading batch dimension, action indices,
+        rewards and done flags (1.0 for terminal transitions).
+        """
+        state = torch.as_tensor(state, dtype=torch.float)
+        next_state = torch.as_tensor(next_state, dtype=torch.float)
+        action = torch.as_tensor(action, dtype=torch.long)
+        reward = torch.as_tensor(reward, dtype=torch.float)
+        done = torch.as_tensor(done, dtype=torch.float)
 
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
+        if self.compile_mode == "compile" and self.train_steps == 0:
+            # torch.compile only compiles on the first call, so a missing toolchain shows up here.
+            try:
+                loss = self.loss_fn(state, action, reward, next_state, done)
+            except Exception as error:
+                print(f"torch.compile failed, training in eager mode: {error}")
+                self.compile_mode = None
+                self.loss_fn = self.compute_loss
+                loss = self.loss_fn(state, action, reward, next_state, done)
+        else:
+            loss = self.loss_fn(state, action, reward, next_state, done)
 
-            target[idx][torch.argmax(action[idx]).item()] = Q_new
-    
-        # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
-        # pred.clone()
-        # preds[argmax(action)] = Q_new
         self.optimizer.zero_grad()
-        loss = self.criterion(target, pred)
         loss.backward()
 
-        self.optimizer.step()
\ No newline at end of file
+        self.optimizer.step()
+        self.train_steps += 1
+        self.update_target()
+
+    def compute_loss(self, state, action, reward, next_state, done):
+        """The DQN loss for a batch of tensors. This is the part compiled by compile_mode="compile"."""
+        # 1: predicted Q values with current state
+        pred = self.forward_model(state)
+
+        # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
+        with torch.no_grad():
+            bootstrap_model = self.target_model if self.target_model is not None else self.forward_model
+            if self.double_dqn and self.target_model is not None:
+                next_action = torch.argmax(self.forward_model(next_state), dim=1, keepdim=True)
+                next_q = bootstrap_model(next_state).gather(1, next_action).squeeze(1)
+            else:
+                next_q = torch.max(bootstrap_model(next_state), dim=1).values
+            q_new = reward + self.gamma * next_q * (1 - done)
+
+            # preds[action] = Q_new
+            target = pred.detach().clone()
+            target[torch.arange(len(target)), action] = q_new
+
+        return self.criterion(target, pred)
+
+    def update_target(self):
+        """Syncs the target network after a train step, either periodically or by Polyak averaging."""
+        if self.target_model is None:
+            return
+        if self.tau is not None:
+            with torch.no_grad():
+                for target_param, param in zip(self.target_model.parameters(), self.model.parameters()):
+                    target_param.lerp_(param, self.tau)
+        elif self.train_steps % self.target_update == 0:
+            self.target_model.load_state_dict(self.model.state_dict())
@@ -0,0 +1,56 @@
+import numpy as np
+
+class ReplayBuffer:
+    """
+    Fixed-capacity experience replay stored in preallocated NumPy ring arrays.
+
+    Sampling a batch is a single fancy-indexing gather per field, instead of building Python tuples and
+    stacking them. Board-plane observations are 0/1 valued, so they can be stored as uint8 to cut memory.
+    """
+
+    def __init__(self, capacity, state_shape, state_dtype=np.float32):
+        self.capacity = capacity
+        self.states = np.zeros((capacity,) + tuple(state_shape), dtype=state_dtype)
+        self.next_states = np.zeros((capacity,) + tuple(state_shape), dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0  # next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action: int, reward: float, next_state, done: bool):
+        """Stores one transition, overwriting the oldest once the buffer is full."""
+        index = self.position
+        self.states[index] = state
+        self.next_states[index] = next_state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = done
+        self.position = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        """Stores a batch of transitions with vectorized writes."""
+        indices = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[indices] = states
+        self.next_states[indices] = next_states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.dones[indices] = dones
+        self.position = int(indices[-1] + 1) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size: int, rng: np.random.Generator):
+        """
+        Returns (states, actions, rewards, next_states, dones) for a random batch without replacement.
+        If fewer transitions are stored than batch_size, the whole buffer is returned.
+        """
+        if self.size <= batch_size:
+            indices = np.arange(self.size)
+        else:
+            indices = rng.choice(self.size, batch_size, replace=False)
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
@@ -0,0 +1,135 @@
+import numpy as np
+from Games.SnakeGameState import SnakeGameState, CELL_SNAKE, CELL_OBSTICLE
+
+# The eight cells around the head as (row, col) offsets; bit k of the danger pattern is NEIGHBOR_OFFSETS[k].
+NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+# (row, col) unit vectors of UP, DOWN, RIGHT and LEFT.
+DIRECTION_VECTORS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+# The dihedral group of the square: every signed permutation matrix, acting on (row, col) vectors.
+# Index 0 is the identity.
+SYMMETRIES = (
+    ((1, 0), (0, 1)), ((-1, 0), (0, 1)), ((1, 0), (0, -1)), ((-1, 0), (0, -1)),
+    ((0, 1), (1, 0)), ((0, -1), (1, 0)), ((0, 1), (-1, 0)), ((0, -1), (-1, 0)),
+)
+
+_neighbor8_tables = {}
+
+
+def neighbor8_table(rows: int, cols: int) -> tuple:
+    """Entry cell * 8 + k is the cell at NEIGHBOR_OFFSETS[k] from cell, or -1 off the board. Cached per size."""
+    key = (rows, cols)
+    table = _neighbor8_tables.get(key)
+    if table is None:
+        entries = []
+        for cell in range(rows * cols):
+            row, col = divmod(cell, cols)
+            for d_row, d_col in NEIGHBOR_OFFSETS:
+                r, c = row + d_row, col + d_col
+                entries.append(r * cols + c if 0 <= r < rows and 0 <= c < cols else -1)
+        table = tuple(entries)
+        _neighbor8_tables[key] = table
+    return table
+
+
+def transform_vector(symmetry: int, vector: tuple[int, int]) -> tuple[int, int]:
+    (a, b), (c, d) = SYMMETRIES[symmetry]
+    return (a * vector[0] + b * vector[1], c * vector[0] + d * vector[1])
+
+
+class AbsoluteEncoder:
+    """
+    The original tabular state: the absolute head and food cells, rows*cols*rows*cols states with no
+    symmetry folding (every state uses the identity transform).
+    """
+    name = "absolute"
+
+    def __init__(self, rows: int, cols: int):
+        self.cell_count = rows * cols
+        self.state_count = self.cell_count * self.cell_count
+        self.action_from_canonical = np.tile(np.arange(4), (len(SYMMETRIES), 1))
+        self.action_to_canonical = self.action_from_canonical
+
+    def encode(self, state: SnakeGameState) -> tuple[int, int]:
+        """Returns (table row, symmetry). A board without food (it is full) reuses the head cell."""
+        food = state.food if state.food >= 0 else state.head
+        return state.head * self.cell_count + food, 0
+
+
+class CanonicalEncoder:
+    """
+    Compact, board-size independent tabular state: which of the eight cells around the head are deadly
+    (walls, body, obstacles) and the sign of the food's row and column offset from the head.
+
+    Those features look the same under the eight rotations and reflections of the board, so each state is
+    folded onto a canonical representative, and actions are mapped into and out of that frame with the
+    symmetry that did the folding. The 256 * 9 raw states fold to a few hundred canonical ones.
+    All of the folding is precomputed: encoding a state is eight cell lookups and two table reads.
+    """
+    name = "canonical"
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.neighbors8 = neighbor8_table(rows, cols)
+
+        offset_index = {offset: index for index, offset in enumerate(NEIGHBOR_OFFSETS)}
+        direction_index = {vector: index for index, vector in enumerate(DIRECTION_VECTORS)}
+        offset_maps = [[offset_index[transform_vector(s, offset)] for offset in NEIGHBOR_OFFSETS]
+                       for s in range(len(SYMMETRIES))]
+        food_maps = [[self.food_index(*transform_vector(s, (d_row, d_col)))
+                      for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)] for s in range(len(SYMMETRIES))]
+        self.action_to_canonical = np.array([[direction_index[transform_vector(s, vector)]
+                                              for vector in DIRECTION_VECTORS] for s in range(len(SYMMETRIES))])
+        self.action_from_canonical = np.argsort(self.action_to_canonical, axis=1)
+
+        # Fold every raw state (danger bits * 9 + food index) onto the smallest of its eight images.
+        raw_count = 256 * 9
+        canonical_rows = {}
+        self.state_table = np.empty(raw_count, dtype=np.int64)
+        self.symmetry_table = np.empty(raw_count, dtype=np.int64)
+        for raw in range(raw_count):
+            bits, food = divmod(raw, 9)
+            images = []
+            for s in range(len(SYMMETRIES)):
+                image_bits = 0
+                for k in range(8):
+                    if bits >> k & 1:
+                        image_bits |= 1 << offset_maps[s][k]
+                images.append(image_bits * 9 + food_maps[s][food])
+            representative = min(images)
+            self.state_table[raw] = canonical_rows.setdefault(representative, len(canonical_rows))
+            self.symmetry_table[raw] = images.index(representative)
+        self.state_count = len(canonical_rows)
+        # Plain lists index faster than NumPy arrays from Python code.
+        self.state_lookup = self.state_table.tolist()
+        self.symmetry_lookup = self.symmetry_table.tolist()
+
+    @staticmethod
+    def food_index(sign_row: int, sign_col: int) -> int:
+        return (sign_row + 1) * 3 + sign_col + 1
+
+    def encode(self, state: SnakeGameState) -> tuple[int, int]:
+        """Returns (canonical table row, symmetry mapping the state onto it)."""
+        cells = state.cells
+        neighbors8 = self.neighbors8
+        base = state.head << 3
+        bits = 0
+        for k in range(8):
+            cell = neighbors8[base + k]
+            if cell < 0 or cells[cell] == CELL_SNAKE or cells[cell] == CELL_OBSTICLE:
+                bits |= 1 << k
+        food_index = 4  # no food: same as food on the head
+        if state.food >= 0:
+            head_row, head_col = divmod(state.head, self.cols)
+            food_row, food_col = divmod(state.food, self.cols)
+            food_index = self.food_index((food_row > head_row) - (food_row < head_row),
+                                         (food_col > head_col) - (food_col < head_col))
+        raw = bits * 9 + food_index
+        return self.state_lookup[raw], self.symmetry_lookup[raw]
+
+
+# Encoders selectable by name.
+STATE_ENCODERS = {
+    "absolute": AbsoluteEncoder,
+    "canonical": CanonicalEncoder,
+}
@@ -0,0 +1,71 @@
+"""
+Compares the tabular update rules under the same wall-clock training budget.
+
+Run from the repository root:
+
+    python -m ModelHelperFunctions.TabularBenchmark --seconds 15
+    python -m ModelHelperFunctions.TabularBenchmark --rows 10 --cols 10 --modes one-step lambda
+    python -m ModelHelperFunctions.TabularBenchmark --encoders absolute canonical
+
+Each mode trains a fresh Q-table for the given number of seconds, then the greedy policy is scored on a
+separate set of episodes (on a copy of the table, so evaluation doesn't keep training it).
+"""
+import argparse
+import time
+import numpy as np
+from ModelHelperFunctions.QTable import QTable
+from ModelHelperFunctions.TabularUpdates import UPDATE_MODES
+from ModelHelperFunctions.StateEncoders import STATE_ENCODERS
+
+
+def evaluate_greedy(q_table: QTable, n_episodes=1000, seed=12345) -> float:
+    """Mean score of the greedy policy over n_episodes."""
+    from Scenes.SnakeGameRLAgent import TabularTrainer
+
+    copy = QTable(q_table.rows, q_table.cols, q_table.learning_rate, q_table.discount_factor,
+                  values=np.array(q_table.values), encoder=q_table.encoder)
+    trainer = TabularTrainer(copy, num_envs=256, seed=seed, epsilon=0, min_epsilon=0, update_mode="one-step")
+    return float(np.mean(trainer.run(n_episodes)[:n_episodes]))
+
+
+def benchmark_update_mode(mode: str, seconds: float, rows=26, cols=32, seed=0, num_envs=256,
+                          encoder="absolute") -> dict:
+    # Imported here so that the module can be inspected without pulling in pygame.
+    from Scenes.SnakeGameRLAgent import TabularTrainer
+
+    q_table = QTable(rows, cols, encoder=STATE_ENCODERS[encoder](rows, cols))
+    trainer = TabularTrainer(q_table, num_envs=num_envs, seed=seed, epsilon_decay=0.9999, update_mode=mode)
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        trainer.run(1000)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "encoder": encoder,
+        "states": q_table.encoder.state_count,
+        "episodes": trainer.episodes,
+        "steps_per_second": trainer.steps / elapsed,
+        "greedy_mean_score": evaluate_greedy(q_table),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--rows", type=int, default=26)
+    parser.add_argument("--cols", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", choices=list(UPDATE_MODES), default=list(UPDATE_MODES))
+    parser.add_argument("--encoders", nargs="+", choices=list(STATE_ENCODERS), default=["absolute"])
+    args = parser.parse_args()
+
+    for encoder in args.encoders:
+        for mode in args.modes:
+            result = benchmark_update_mode(mode, args.seconds, args.rows, args.cols, args.seed, encoder=encoder)
+            print(f"{result['encoder']:>9} ({result['states']} states) {result['mode']:>8}: "
+                  f"{result['episodes']:8d} episodes  {result['steps_per_second']:9.0f} steps/s  "
+                  f"greedy mean score {result['greedy_mean_score']:.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
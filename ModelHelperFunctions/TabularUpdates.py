@@ -0,0 +1,128 @@
+import math
+import numpy as np
+from ModelHelperFunctions.QTable import QTable
+
+
+class OneStepUpdate:
+    """Plain one-step Q-learning: each transition only updates the state-action pair it started from."""
+
+    def __init__(self, q_table: QTable, num_envs: int):
+        self.q_table = q_table
+        self.num_envs = num_envs
+
+    def step(self, states, actions, rewards, next_states, dones, greedy):
+        self.q_table.update(states, actions, rewards, next_states, dones)
+
+
+class NStepUpdate:
+    """
+    n-step Q-learning. Each environment keeps its last n (state, action, reward) in a ring; once it is
+    full, the oldest pair is updated towards the discounted n-step return bootstrapped from max Q of the
+    newest state. When an episode ends, every pair still in the ring is updated towards its remaining return.
+
+    The rings are shared arrays indexed by a global step counter, since all environments step in lockstep.
+    """
+
+    def __init__(self, q_table: QTable, num_envs: int, n_steps=5):
+        self.q_table = q_table
+        self.num_envs = num_envs
+        self.n_steps = n_steps
+        self.states = np.zeros((num_envs, n_steps), dtype=np.int64)
+        self.actions = np.zeros((num_envs, n_steps), dtype=np.int64)
+        self.rewards = np.zeros((num_envs, n_steps), dtype=np.float32)
+        self.counts = np.zeros(num_envs, dtype=np.int64)
+        self.position = 0
+        self.discounts = q_table.discount_factor ** np.arange(n_steps, dtype=np.float32)
+
+    def step(self, states, actions, rewards, next_states, dones, greedy):
+        q_table = self.q_table
+        values = q_table.values
+        n = self.n_steps
+        slot = self.position
+        self.position = (slot + 1) % n
+        self.states[:, slot] = states
+        self.actions[:, slot] = actions
+        self.rewards[:, slot] = rewards
+        np.minimum(self.counts + 1, n, out=self.counts)
+
+        # Oldest to newest slot order, the same for every environment.
+        order = (slot + 1 + np.arange(n)) % n
+        full = np.flatnonzero((self.counts == n) & (dones == 0))
+        if len(full):
+            returns = self.rewards[full][:, order] @ self.discounts
+            returns += q_table.discount_factor ** n * values[next_states[full]].max(axis=1)
+            oldest_states = self.states[full, order[0]]
+            oldest_actions = self.actions[full, order[0]]
+            q_table.apply_deltas(oldest_states, oldest_actions,
+                                 q_table.learning_rate * (returns - values[oldest_states, oldest_actions]))
+
+        for env in np.flatnonzero(dones):
+            # Flush the finished episode: the last counts[env] pairs, newest first, with no bootstrapping.
+            count = self.counts[env]
+            slots = order[n - count:]
+            episode_return = 0.0
+            for index in slots[::-1]:
+                episode_return = self.rewards[env, index] + q_table.discount_factor * episode_return
+                state, action = self.states[env, index], self.actions[env, index]
+                values[state, action] += q_table.learning_rate * (episode_return - values[state, action])
+            self.counts[env] = 0
+
+
+class QLambdaUpdate:
+    """
+    Watkins's Q(lambda) with sparse, truncated eligibility traces.
+
+    Instead of a trace table the size of the Q-table, each environment remembers only its last trace_length
+    (state, action) pairs, enough for (discount * lambda) ** age to drop below min_trace. Every TD error is
+    applied to those pairs weighted by that decay, which is the accumulating trace truncated at min_trace
+    (except that, as in QTable.apply_deltas, a pair traced more than once in a step gets the mean update).
+    Traces are cut when an exploratory action is taken (or the episode ends), since the greedy policy's
+    return no longer follows from the earlier pairs.
+    """
+
+    def __init__(self, q_table: QTable, num_envs: int, trace_lambda=0.8, min_trace=0.01):
+        self.q_table = q_table
+        self.num_envs = num_envs
+        self.trace_lambda = trace_lambda
+        decay = q_table.discount_factor * trace_lambda
+        self.trace_length = max(1, math.ceil(math.log(min_trace) / math.log(decay))) if 0 < decay < 1 else 1
+        self.states = np.zeros((num_envs, self.trace_length), dtype=np.int64)
+        self.actions = np.zeros((num_envs, self.trace_length), dtype=np.int64)
+        self.counts = np.zeros(num_envs, dtype=np.int64)
+        self.position = 0
+        # Trace weight by age, newest first.
+        self.weights = (decay ** np.arange(self.trace_length)).astype(np.float32)
+
+    def step(self, states, actions, rewards, next_states, dones, greedy):
+        q_table = self.q_table
+        values = q_table.values
+        length = self.trace_length
+        # An exploratory action cuts the traces before it is added.
+        self.counts[~greedy] = 0
+
+        slot = self.position
+        self.position = (slot + 1) % length
+        self.states[:, slot] = states
+        self.actions[:, slot] = actions
+        np.minimum(self.counts + 1, length, out=self.counts)
+
+        targets = rewards + q_table.discount_factor * values[next_states].max(axis=1) * (1 - dones)
+        errors = q_table.learning_rate * (targets - values[states, actions])
+
+        ages = (slot - np.arange(length)) % length
+        trace = np.where(np.arange(length)[None, :] < self.counts[:, None], self.weights[None, :], 0)
+        # Columns are ring slots; age them so column k holds the pair visited k steps ago.
+        traced_states = self.states[:, ages]
+        traced_actions = self.actions[:, ages]
+        live = trace > 0
+        q_table.apply_deltas(traced_states[live], traced_actions[live], (errors[:, None] * trace)[live])
+
+        self.counts[dones != 0] = 0
+
+
+# Update rules selectable by name (see make_update in Scenes/SnakeGameRLAgent.py).
+UPDATE_MODES = {
+    "one-step": OneStepUpdate,
+    "n-step": NStepUpdate,
+    "lambda": QLambdaUpdate,
+}
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of QTrainer update speed for each CPU training configuration.
+
+Run from the repository root:
+
+    python -m ModelHelperFunctions.TrainerBenchmark
+    python -m ModelHelperFunctions.TrainerBenchmark --threads 1 2 4 --modes eager script compile --network conv
+
+Every combination of thread count, compile mode and fused Adam is timed on the two batch shapes the DQN
+agent trains with: single-transition short-memory updates and full replay batches. The fastest
+configuration for each batch size is printed at the end; pass its settings to QTrainer (or DeepRLAgent).
+"""
+import argparse
+import itertools
+import os
+import time
+import numpy as np
+import torch
+from ModelHelperFunctions.QTrainer import Linear_QNet, QTrainer
+from ModelHelperFunctions.ConvQNet import Conv_QNet
+
+
+def make_model(network: str, rows: int, cols: int):
+    if network == "conv":
+        return Conv_QNet(4, rows, cols, 3), (4, rows, cols)
+    return Linear_QNet(11, 256, 3), (11,)
+
+
+def benchmark_config(network: str, threads: int, mode: str, fused: bool, batch_size: int, rows=26, cols=32,
+                     duration=1.0, warmup=20) -> float:
+    """Returns train_batch calls per second for one configuration."""
+    torch.manual_seed(0)
+    model, state_shape = make_model(network, rows, cols)
+    trainer = QTrainer(model, lr=0.001, gamma=0.9, num_threads=threads,
+                       compile_mode=None if mode == "eager" else mode, fused=fused)
+    rng = np.random.default_rng(0)
+    states = rng.random((batch_size,) + state_shape, dtype=np.float32)
+    next_states = rng.random((batch_size,) + state_shape, dtype=np.float32)
+    actions = rng.integers(0, 3, size=batch_size)
+    rewards = rng.choice(np.array([-10, 0, 10], dtype=np.float32), size=batch_size)
+    dones = (rewards < 0).astype(np.float32)
+
+    for _ in range(warmup):
+        trainer.train_batch(states, actions, rewards, next_states, dones)
+    updates = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        trainer.train_batch(states, actions, rewards, next_states, dones)
+        updates += 1
+    return updates / (time.perf_counter() - start)
+
+
+def benchmark_trainer_configs(network="linear", threads=None, modes=("eager", "script", "compile"),
+                              fused=(False, True), batch_sizes=(1, 1000), rows=26, cols=32, duration=1.0) -> list[dict]:
+    """Times every configuration and returns one result dict per combination."""
+    if threads is None:
+        threads = sorted({1, 2, os.cpu_count() or 1})
+    default_threads = torch.get_num_threads()
+    results = []
+    try:
+        for thread_count, mode, use_fused, batch_size in itertools.product(threads, modes, fused, batch_sizes):
+            rate = benchmark_config(network, thread_count, mode, use_fused, batch_size, rows, cols, duration)
+            results.append({"network": network, "threads": thread_count, "mode": mode, "fused": use_fused,
+                            "batch_size": batch_size, "updates_per_second": rate})
+            print(f"threads={thread_count:<3} mode={mode:<8} fused={use_fused!s:<5} batch={batch_size:<5} "
+                  f"{rate:10.1f} updates/s", flush=True)
+    finally:
+        torch.set_num_threads(default_threads)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--network", choices=("linear", "conv"), default="linear")
+    parser.add_argument("--threads", type=int, nargs="+", default=None)
+    parser.add_argument("--modes", nargs="+", choices=("eager", "script", "compile"),
+                        default=["eager", "script", "compile"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--rows", type=int, default=26)
+    parser.add_argument("--cols", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds timed per configuration")
+    args = parser.parse_args()
+
+    results = benchmark_trainer_configs(args.network, args.threads, args.modes, batch_sizes=args.batch_sizes,
+                                        rows=args.rows, cols=args.cols, duration=args.duration)
+    for batch_size in args.batch_sizes:
+        best = max((result for result in results if result["batch_size"] == batch_size),
+                   key=lambda result: result["updates_per_second"])
+        print(f"Fastest for batch {batch_size}: threads={best['threads']} mode={best['mode']} "
+              f"fused={best['fused']} ({best['updates_per_second']:.1f} updates/s)")
+
+
+if __name__ == "__main__":
+    main()
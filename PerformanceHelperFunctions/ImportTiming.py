@@ -0,0 +1,53 @@
+import re
+import subprocess
+import sys
+
+# Dependencies that are expensive to import and should only load with the feature that needs them.
+HEAVY_MODULES = ("torch", "pandas", "matplotlib", "IPython", "networkx")
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_import_times(lines) -> list[tuple[str, int, float, float]]:
+    """Parses python -X importtime output into (module, depth, own seconds, cumulative seconds) rows."""
+    rows = []
+    for line in lines:
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, (len(indent) - 1) // 2, int(own) / 1e6, int(cumulative) / 1e6))
+    return rows
+
+
+def format_import_report(rows, top=20) -> str:
+    total = sum(cumulative for _, depth, _, cumulative in rows if depth == 0)
+    lines = [f"Imported {len(rows)} modules in {total:.3f}s"]
+    lines.append("\nSlowest top-level imports (cumulative):")
+    for module, depth, own, cumulative in sorted((row for row in rows if row[1] == 0), key=lambda row: -row[3])[:top]:
+        lines.append(f"  {cumulative:8.3f}s  {module}")
+    lines.append("\nSlowest modules (own time):")
+    for module, depth, own, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"  {own:8.3f}s  {module}")
+    imported = {module.partition(".")[0] for module, _, _, _ in rows}
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    lines.append(f"\nHeavy dependencies loaded: {', '.join(heavy) if heavy else 'none'}")
+    return "\n".join(lines)
+
+
+def run_with_import_report(script: str, arguments: list[str], top=20) -> int:
+    """
+    Runs script with arguments in a child interpreter under python -X importtime, passing its output
+    through, then prints a summary of where import time went. Import timing can only be switched on when
+    an interpreter starts, hence the child process. Returns the child's exit code.
+    """
+    child = subprocess.Popen([sys.executable, "-X", "importtime", script] + arguments,
+                             stderr=subprocess.PIPE, text=True)
+    timing = []
+    for line in child.stderr:
+        if line.startswith("import time:"):
+            timing.append(line)
+        else:
+            sys.stderr.write(line)
+    code = child.wait()
+    print(format_import_report(parse_import_times(timing), top))
+    return code
@@ -0,0 +1,168 @@
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Self
+
+# Histogram bucket i holds values in [2 ** (i - 1 + MIN_EXPONENT), 2 ** (i + MIN_EXPONENT)); the first and last
+# buckets also catch everything below and above. With milliseconds that spans about 1us to 18 minutes.
+MIN_EXPONENT = -10
+BUCKET_COUNT = 41
+# Percentiles are taken over the most recent samples, so the overlay follows the current behaviour.
+RECENT_SAMPLES = 512
+# Rates are averaged over windows of this many seconds.
+RATE_WINDOW = 1.0
+
+
+class Histogram:
+    """Distribution of one measurement: totals over all samples, log2 buckets, and a window of recent samples."""
+
+    def __init__(self: Self, name: str, unit: str = "") -> Self:
+        self.name = name
+        self.unit = unit
+        self.buckets = [0] * BUCKET_COUNT
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+
+    def observe(self: Self, value: float):
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.recent.append(value)
+        index = math.frexp(value)[1] - MIN_EXPONENT if value > 0 else 0
+        self.buckets[min(max(index, 0), BUCKET_COUNT - 1)] += 1
+
+    @property
+    def mean(self: Self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self: Self, *fractions: float) -> list[float]:
+        """Percentiles of the recent samples, e.g. percentiles(0.5, 0.95)."""
+        if not self.recent:
+            return [0.0 for _ in fractions]
+        ordered = sorted(self.recent)
+        return [ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] for fraction in fractions]
+
+    def summary(self: Self) -> dict:
+        p50, p95, p99 = self.percentiles(0.5, 0.95, 0.99)
+        return {
+            "unit": self.unit,
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "recent_p50": p50,
+            "recent_p95": p95,
+            "recent_p99": p99,
+            # Upper bound of each non-empty bucket and its sample count.
+            "buckets": [{"below": 2.0 ** (index + MIN_EXPONENT), "count": count}
+                        for index, count in enumerate(self.buckets) if count],
+        }
+
+
+class Rate:
+    """Counts events (game steps, training steps, frames) and their rate over the last full window."""
+
+    def __init__(self: Self, name: str) -> Self:
+        self.name = name
+        self.total = 0
+        self.per_second = 0.0
+        self.window_count = 0
+        self.window_start = time.perf_counter()
+
+    def add(self: Self, count: int = 1):
+        self.total += count
+        self.window_count += count
+
+    def update(self: Self, now: float):
+        elapsed = now - self.window_start
+        if elapsed >= RATE_WINDOW:
+            self.per_second = self.window_count / elapsed
+            self.window_count = 0
+            self.window_start = now
+
+
+class Metrics:
+    """
+    Named histograms and rate counters shared by the game loop and the agents.
+
+    Names are dotted, grouped by what they measure: frame.* are the phases of the main loop (ms),
+    <agent>.decision is the time an agent takes to pick a move (ms), and other <agent>.* histograms hold
+    search statistics such as A* expansions. Rates count game.steps, training.steps and frames.
+    Recording is a dictionary lookup and a few additions, cheap enough to leave on in every scene.
+    """
+
+    def __init__(self: Self) -> Self:
+        self.histograms = {}
+        self.rates = {}
+        self.started = time.time()
+
+    def histogram(self: Self, name: str, unit: str = "") -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(name, unit)
+        return histogram
+
+    def observe(self: Self, name: str, value: float, unit: str = ""):
+        self.histogram(name, unit).observe(value)
+
+    def count(self: Self, name: str, count: int = 1):
+        rate = self.rates.get(name)
+        if rate is None:
+            rate = self.rates[name] = Rate(name)
+        rate.add(count)
+
+    @contextmanager
+    def timer(self: Self, name: str):
+        """Records the duration of the with block, in milliseconds, under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, "ms")
+
+    def tick(self: Self, now: float = None):
+        """Rolls the rate windows over. The game loop calls this once per frame."""
+        now = time.perf_counter() if now is None else now
+        for rate in self.rates.values():
+            rate.update(now)
+
+    def reset(self: Self):
+        self.histograms.clear()
+        self.rates.clear()
+        self.started = time.time()
+
+    def snapshot(self: Self, context: dict = None) -> dict:
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "exported": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "context": context or {},
+            "histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            "rates": {name: {"total": rate.total, "per_second": rate.per_second}
+                      for name, rate in sorted(self.rates.items())},
+        }
+
+    def export(self: Self, path: str = None, context: dict = None) -> str:
+        """Writes a JSON snapshot, by default to SaveData/metrics/metrics-<timestamp>.json, and returns its path."""
+        if path is None:
+            path = os.path.join("SaveData", "metrics", f"metrics-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.snapshot(context), file, indent=2)
+        return path
+
+
+# Shared by the game manager, the scenes and the agents.
+METRICS = Metrics()
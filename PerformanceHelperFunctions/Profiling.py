@@ -0,0 +1,168 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Self
+
+PROFILE_DIRECTORY = os.path.join("SaveData", "profiles")
+# Functions listed in the text summaries.
+SUMMARY_LINES = 40
+
+
+class CProfileProfiler:
+    """Deterministic profiling with cProfile. Exact call counts, but every Python call pays for it."""
+    name = "cprofile"
+
+    def __init__(self: Self) -> Self:
+        self.profile = cProfile.Profile()
+
+    def enable(self: Self):
+        self.profile.enable()
+
+    def disable(self: Self):
+        self.profile.disable()
+
+    def dump(self: Self, path: str) -> list[str]:
+        """Writes <path>.pstats (for pstats, snakeviz and friends) and a cumulative-time summary <path>.txt."""
+        self.profile.dump_stats(path + ".pstats")
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LINES)
+        with open(path + ".txt", "w") as file:
+            file.write(summary.getvalue())
+        return [path + ".pstats", path + ".txt"]
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiling: a background thread snapshots the profiled thread's Python stack
+    every interval seconds. The profiled code runs at full speed between samples; the cost is one stack
+    walk per sample (and the GIL hand-off it needs).
+    """
+    name = "sampling"
+
+    def __init__(self: Self, interval: float = 0.005, thread_id: int = None) -> Self:
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = Counter()  # stack (tuple of code objects, root first) -> sample count
+        self.labels = {}
+        self.running = threading.Event()
+        self.thread = None
+
+    def enable(self: Self):
+        self.running.set()
+        self.thread = threading.Thread(target=self.sample_loop, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def disable(self: Self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def sample_loop(self: Self):
+        while self.running.is_set():
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+
+    def label(self: Self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+        return label
+
+    def dump(self: Self, path: str) -> list[str]:
+        """
+        Writes <path>.collapsed, one "frame;frame;...;frame count" line per distinct stack (the input format
+        of flamegraph.pl and speedscope), and a summary <path>.txt of the functions with the most samples.
+        """
+        with open(path + ".collapsed", "w") as file:
+            for stack, count in self.samples.most_common():
+                file.write(";".join(self.label(code) for code in stack) + f" {count}\n")
+
+        total = sum(self.samples.values())
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.samples.items():
+            own[self.label(stack[-1])] += count
+            for label in {self.label(code) for code in stack}:
+                inclusive[label] += count
+        with open(path + ".txt", "w") as file:
+            file.write(f"{total} samples every {self.interval * 1000:g}ms\n")
+            for title, counts in (("Own samples", own), ("Inclusive samples", inclusive)):
+                file.write(f"\n{title}:\n")
+                for label, count in counts.most_common(SUMMARY_LINES):
+                    file.write(f"{count:8d} {100 * count / max(total, 1):6.1f}%  {label}\n")
+        return [path + ".collapsed", path + ".txt"]
+
+
+PROFILERS = {
+    "cprofile": CProfileProfiler,
+    "sampling": SamplingProfiler,
+}
+
+
+class ProfileWindow:
+    """
+    Profiles a window of a run's steps (frames of a scene, episodes of a training run): the profiler is
+    switched on after start steps, off again after steps more (or when the run ends), and then dumped to
+    PROFILE_DIRECTORY as <label>-<mode>-<timestamp>.*. Call step(0) when the run's loop starts, step() after
+    every step and close() at the end.
+    """
+
+    def __init__(self: Self, mode: str, label: str, start: int = 0, steps: int = None, interval: float = 0.005,
+                 directory: str = PROFILE_DIRECTORY) -> Self:
+        if mode not in PROFILERS:
+            raise ValueError(f"Unknown profiler {mode!r}, expected one of {list(PROFILERS)}")
+        self.profiler = SamplingProfiler(interval) if mode == "sampling" else CProfileProfiler()
+        self.label = label
+        self.start = start
+        self.stop = None if steps is None else start + steps
+        self.directory = directory
+        self.count = 0
+        self.active = False
+        self.finished = False
+        self.paths = []
+
+    def begin(self: Self):
+        self.active = True
+        self.started = time.perf_counter()
+        self.profiler.enable()
+
+    def step(self: Self, count: int = 1):
+        if self.finished:
+            return
+        self.count += count
+        if not self.active and self.count >= self.start:
+            self.begin()
+        if self.active and self.stop is not None and self.count >= self.stop:
+            self.close()
+
+    def close(self: Self) -> list[str]:
+        """Stops profiling and writes the output files (once). Returns their paths."""
+        if self.finished:
+            return self.paths
+        self.finished = True
+        if not self.active:
+            print(f"Profiling window never started: the run ended after {self.count} of {self.start} steps")
+            return self.paths
+        self.profiler.disable()
+        self.active = False
+        elapsed = time.perf_counter() - self.started
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.label}-{self.profiler.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self.paths = self.profiler.dump(path)
+        print(f"Profiled steps {self.start}-{self.count} ({elapsed:.1f}s): {', '.join(self.paths)}")
+        return self.paths
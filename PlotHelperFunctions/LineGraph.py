@@ -1,8 +1,8 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from IPython import display
 import datetime
 
+# pandas, matplotlib and IPython are imported by the functions that use them, so importing this module
+# (as the deep RL scene does) costs nothing until a plot is drawn.
+
 def convert_time_to_seconds(time_str):
     """
     Convert a time string in the format HH:MM:SS.millis to seconds.
@@ -21,6 +21,9 @@ def plot_attempts_score_time(csv_file):
     
     Both series are plotted as lines with markers in a separate plot window.
     """
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
     # Read the CSV file
     df = pd.read_csv(csv_file)
     
@@ -50,9 +53,11 @@ def plot_attempts_score_time(csv_file):
     # Display the plot in a separate window.
     plt.show()
 
-plt.ion()
-
 def plot(scores, mean_scores):
+    import matplotlib.pyplot as plt
+    from IPython import display
+
+    plt.ion()
     display.clear_output(wait=True)
     display.display(plt.gcf())
     plt.clf()
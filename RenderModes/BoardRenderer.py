@@ -0,0 +1,270 @@
+import math
+from typing import Self
+import pygame
+import Games.SnakeGameLogic as gl
+from Games.SnakeGameState import CELL_EMPTY, CELL_FOOD
+from GameManager import default_aspect_ratio
+from RenderModes.RenderMode import RenderMode
+
+# Colors of the cell codes CELL_EMPTY, CELL_SNAKE, CELL_FOOD and CELL_OBSTICLE.
+CELL_COLORS = ((0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0))
+PATH_COLOR = (0, 255, 0)
+
+# The board's top-left corner on screen, and the room kept free below it for the score readouts and buttons.
+BOARD_OFFSET = 10
+HUD_HEIGHT = 220
+
+# Level of detail: cells at least this many pixels wide are drawn as rounded blocks. Smaller cells are drawn
+# by scaling an image of the board with one pixel per cell, which costs the same whatever the board size.
+DETAIL_CELL_SIZE = 4
+# Paths are drawn only when cells are at least this wide; on smaller cells they would bury the board.
+PATH_CELL_SIZE = 4
+# Zooming stops once cells are this many pixels wide.
+MAX_CELL_SIZE = 48
+ZOOM_STEP = 1.25
+
+
+class BoardRenderer(RenderMode):
+    """
+    Draws a game's board into a viewport below which the scene puts its readouts and buttons.
+
+    The whole board fits the viewport at zoom 1; the mouse wheel zooms in around the cursor, dragging with the
+    right button pans, and Home goes back to the whole board. While zoomed in the view follows the snake's
+    head until it is panned by hand.
+
+    The board is drawn from the game's display_cells, one code per cell coloured by palette (the cell codes
+    of Games.SnakeGameState by default). The visible part of the board is kept in a cached surface, and each
+    frame only the cells the game reports as changed (SnakeGame.take_changed_cells) are redrawn, so the cost
+    of a frame follows what moved rather than the size of the board. Only the cells inside the viewport are
+    ever drawn.
+    """
+
+    def __init__(self: Self, palette=CELL_COLORS) -> Self:
+        self.palette = palette  # Colour of every display code; see the game's display_cells.
+        self.game = None
+        self.width = None
+        self.rect = pygame.Rect(BOARD_OFFSET, BOARD_OFFSET, 0, 0)
+        self.fit_cell_size = 1.0
+        self.zoom = 1.0
+        self.origin = (0, 0)  # Top-left corner of the view, in pixels of the zoomed board.
+        self.follow = True
+        self.dragging = False
+        self.board_image = None  # One pixel per cell, sharing its memory with the game's cell buffer.
+        self.view = None  # Cached drawing of the visible part of the board.
+        self.view_dirty = True
+
+    @property
+    def cell_size(self: Self) -> float:
+        return self.fit_cell_size * self.zoom
+
+    @property
+    def shows_paths(self: Self) -> bool:
+        return self.cell_size >= PATH_CELL_SIZE
+
+    def set_scale(self: Self, width: float, game: gl.SnakeGame):
+        """Fits the board into a window width pixels wide, keeping the zoom level."""
+        self.width = width
+        if game is not self.game:
+            self.attach(game)
+        view_width = width - 2 * BOARD_OFFSET
+        view_height = width * default_aspect_ratio - BOARD_OFFSET - HUD_HEIGHT
+        self.fit_cell_size = max(min(view_width / game.cols, view_height / game.rows), 0.01)
+        self.rect = pygame.Rect(BOARD_OFFSET, BOARD_OFFSET, int(game.cols * self.fit_cell_size),
+                                int(game.rows * self.fit_cell_size))
+        self.set_origin(*self.origin)
+
+    def attach(self: Self, game: gl.SnakeGame):
+        self.game = game
+        self.board_image = pygame.image.frombuffer(game.display_cells, (game.cols, game.rows), "P")
+        self.board_image.set_palette(self.palette)
+        self.zoom = 1.0
+        self.origin = (0, 0)
+        self.follow = True
+        self.view_dirty = True
+
+    def render_scene(self: Self, screen: pygame.Surface, context: gl.SnakeGame):
+        if context is not self.game:
+            self.set_scale(self.width if self.width is not None else screen.get_width(), context)
+        changed = context.take_changed_cells()
+        if self.follow and self.zoom > 1.0:
+            self.follow_head()
+        if self.view_dirty or changed is None:
+            self.redraw()
+        elif changed:
+            self.update_cells(changed)
+        screen.blit(self.view, self.rect)
+        if self.cell_size < DETAIL_CELL_SIZE:
+            self.draw_food_marker(screen)
+
+    def visible_cells(self: Self) -> tuple[int, int, int, int]:
+        """Returns (first row, end row, first col, end col) of the cells at least partly inside the view."""
+        size = self.cell_size
+        x, y = self.origin
+        return (int(y // size), min(self.game.rows, math.ceil((y + self.rect.h) / size)),
+                int(x // size), min(self.game.cols, math.ceil((x + self.rect.w) / size)))
+
+    def cell_rect(self: Self, row: int, col: int) -> pygame.Rect:
+        """The cell's rectangle in view coordinates. Neighbouring cells tile without gaps or overlaps."""
+        size = self.cell_size
+        x, y = self.origin
+        left = int(col * size) - x
+        top = int(row * size) - y
+        return pygame.Rect(left, top, int((col + 1) * size) - x - left, int((row + 1) * size) - y - top)
+
+    def cell_center(self: Self, row: int, col: int) -> tuple[float, float]:
+        """The cell's centre in screen coordinates."""
+        size = self.cell_size
+        return (self.rect.x + (col + 0.5) * size - self.origin[0], self.rect.y + (row + 0.5) * size - self.origin[1])
+
+    def redraw(self: Self):
+        """Draws the visible part of the board from scratch."""
+        if self.view is None or self.view.get_size() != self.rect.size:
+            self.view = pygame.Surface(self.rect.size)
+        self.view_dirty = False
+        self.view.fill(self.palette[CELL_EMPTY])
+        first_row, end_row, first_col, end_col = self.visible_cells()
+        if first_row >= end_row or first_col >= end_col:
+            return
+        if self.cell_size < DETAIL_CELL_SIZE:
+            region = self.board_image.subsurface((first_col, first_row, end_col - first_col, end_row - first_row))
+            top_left = self.cell_rect(first_row, first_col)
+            bottom_right = self.cell_rect(end_row - 1, end_col - 1)
+            size = (bottom_right.right - top_left.left, bottom_right.bottom - top_left.top)
+            if self.cell_size < 1:
+                # Fewer pixels than cells: average them, so no single cell (such as the food) drops out.
+                full_color = pygame.Surface(region.get_size(), 0, 32)
+                full_color.blit(region, (0, 0))
+                scaled = pygame.transform.smoothscale(full_color, size)
+            else:
+                scaled = pygame.transform.scale(region, size)
+            self.view.blit(scaled, top_left.topleft)
+            return
+        cells = self.game.display_cells
+        cols = self.game.cols
+        for row in range(first_row, end_row):
+            offset = row * cols
+            for col in range(first_col, end_col):
+                code = cells[offset + col]
+                if code != CELL_EMPTY:
+                    self.draw_cell(row, col, code)
+
+    def draw_food_marker(self: Self, screen: pygame.Surface):
+        """Marks the food with a block DETAIL_CELL_SIZE wide, since a cell this small is hard to spot."""
+        food = self.game.state.food
+        if food < 0:
+            return
+        row, col = divmod(food, self.game.cols)
+        first_row, end_row, first_col, end_col = self.visible_cells()
+        if first_row <= row < end_row and first_col <= col < end_col:
+            marker = pygame.Rect(0, 0, DETAIL_CELL_SIZE, DETAIL_CELL_SIZE)
+            marker.center = self.cell_center(row, col)
+            pygame.draw.rect(screen, self.palette[CELL_FOOD], marker.clip(self.rect))
+
+    def draw_cell(self: Self, row: int, col: int, code: int):
+        rect = self.cell_rect(row, col)
+        self.view.fill(self.palette[CELL_EMPTY], rect)
+        if code != CELL_EMPTY:
+            pygame.draw.rect(self.view, self.palette[code], rect, 0, min(3, rect.w // 4))
+
+    def update_cells(self: Self, changed: list[int]):
+        """Redraws the changed cells that are inside the view."""
+        if self.cell_size < DETAIL_CELL_SIZE:
+            # Rescaling the visible part of the board image is a single C call, cheaper than patching pixels.
+            self.redraw()
+            return
+        first_row, end_row, first_col, end_col = self.visible_cells()
+        cells = self.game.display_cells
+        cols = self.game.cols
+        for cell in changed:
+            row, col = divmod(cell, cols)
+            if first_row <= row < end_row and first_col <= col < end_col:
+                self.draw_cell(row, col, cells[cell])
+
+    def set_origin(self: Self, x: float, y: float):
+        size = self.cell_size
+        max_x = max(int(self.game.cols * size) - self.rect.w, 0)
+        max_y = max(int(self.game.rows * size) - self.rect.h, 0)
+        origin = (int(min(max(x, 0), max_x)), int(min(max(y, 0), max_y)))
+        if origin != self.origin:
+            self.origin = origin
+            self.view_dirty = True
+
+    def zoom_at(self: Self, factor: float, point: tuple[int, int]):
+        """Zooms by factor, keeping the part of the board under point (in screen coordinates) in place."""
+        zoom = min(max(self.zoom * factor, 1.0), max(MAX_CELL_SIZE / self.fit_cell_size, 1.0))
+        if zoom == self.zoom:
+            return
+        view_x = point[0] - self.rect.x
+        view_y = point[1] - self.rect.y
+        scale = zoom / self.zoom
+        self.zoom = zoom
+        self.view_dirty = True
+        self.set_origin((self.origin[0] + view_x) * scale - view_x, (self.origin[1] + view_y) * scale - view_y)
+
+    def follow_head(self: Self):
+        """Re-centres the view on the head when it gets within a quarter of the view from an edge."""
+        row, col = divmod(self.game.state.head, self.game.cols)
+        rect = self.cell_rect(row, col)
+        margin_x = self.rect.w // 4
+        margin_y = self.rect.h // 4
+        if (rect.left < margin_x or rect.right > self.rect.w - margin_x or
+                rect.top < margin_y or rect.bottom > self.rect.h - margin_y):
+            size = self.cell_size
+            self.set_origin((col + 0.5) * size - self.rect.w / 2, (row + 0.5) * size - self.rect.h / 2)
+
+    def reset_view(self: Self):
+        self.zoom = 1.0
+        self.origin = (0, 0)
+        self.follow = True
+        self.view_dirty = True
+
+    def handle_event(self: Self, event) -> bool:
+        """Zooms and pans on mouse wheel, right-button drags and Home. Returns True if the event was consumed."""
+        if self.game is None:
+            return False
+        if event.type == pygame.MOUSEWHEEL:
+            point = pygame.mouse.get_pos()
+            if not self.rect.collidepoint(point):
+                return False
+            self.zoom_at(ZOOM_STEP ** event.y, point)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3 and self.rect.collidepoint(event.pos):
+            self.dragging = True
+            self.follow = False
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 3 and self.dragging:
+            self.dragging = False
+            return True
+        if event.type == pygame.MOUSEMOTION and self.dragging:
+            self.set_origin(self.origin[0] - event.rel[0], self.origin[1] - event.rel[1])
+            return True
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+            self.reset_view()
+            return True
+        return False
+
+    def draw_border(self: Self, screen: pygame.Surface, padding: int = 5):
+        """Draws a border around the board, padded so it doesn't overlap the cells."""
+        pygame.draw.rect(screen, "white", self.rect.inflate(2 * padding, 2 * padding), 3)
+
+    def draw_segments(self: Self, screen: pygame.Surface, segments, color=PATH_COLOR, width: int = 2):
+        """
+        Draws lines between the centres of pairs of (row, col) cells, clipped to the board. Nothing is drawn
+        (and segments isn't consumed) while the cells are too small for lines to be readable.
+        """
+        if not self.shows_paths:
+            return
+        clip = screen.get_clip()
+        screen.set_clip(self.rect)
+        for start, end in segments:
+            pygame.draw.line(screen, color, self.cell_center(*start), self.cell_center(*end), width)
+        screen.set_clip(clip)
+
+    def draw_path(self: Self, screen: pygame.Surface, path: list, color=PATH_COLOR, width: int = 2):
+        """Draws a path of (row, col) cells, skipping the segments that are entirely outside the view."""
+        if len(path) < 2 or not self.shows_paths:
+            return
+        first_row, end_row, first_col, end_col = self.visible_cells()
+        visible = [first_row <= row < end_row and first_col <= col < end_col for row, col in path]
+        self.draw_segments(screen, ((path[i], path[i + 1]) for i in range(len(path) - 1)
+                                    if visible[i] or visible[i + 1]), color, width)
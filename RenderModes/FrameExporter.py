@@ -0,0 +1,299 @@
+import io
+import os
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Self
+import numpy as np
+from Games.EpisodeRecord import EpisodeRecord
+from Games.ReplayPlayer import ReplayPlayer
+from Games.SnakeGameState import CELL_EMPTY
+from PerformanceHelperFunctions.Metrics import METRICS
+
+# Colors of the cell codes CELL_EMPTY, CELL_SNAKE, CELL_FOOD and CELL_OBSTICLE, as in BoardRenderer. (Not
+# imported from there, since that would pull in pygame.)
+CELL_COLORS = ((0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0))
+
+# Where exports go by default.
+EXPORT_DIRECTORY = os.path.join("SaveData", "exports")
+
+# Boards collected on the calling thread before they are handed to the encoder thread together, and how many
+# handed-over batches may wait there before add_frame blocks.
+FRAMES_PER_BATCH = 64
+QUEUED_BATCHES = 4
+
+# Frames are sized so their longer side is about this many pixels, unless a cell size is given.
+TARGET_FRAME_SIZE = 512
+MAX_CELL_SIZE = 16
+# Browsers slow down GIF frames shorter than 2 centiseconds, so GIFs play at most this many frames a second.
+MAX_GIF_FPS = 50
+
+
+def load_pillow():
+    """Returns Pillow's Image module, which encodes the frames, or raises an ImportError saying it is needed."""
+    try:
+        from PIL import Image
+    except ImportError as error:
+        raise ImportError("exporting frames needs Pillow (pip install -r requirements.txt)") from error
+    return Image
+
+
+def default_cell_size(rows: int, cols: int) -> int:
+    return max(1, min(MAX_CELL_SIZE, TARGET_FRAME_SIZE // max(rows, cols)))
+
+
+class FramePainter:
+    """
+    Paints boards of cell codes into palette-indexed frames, with array operations only: every cell becomes a
+    cell_size square of its code, and cells of 4 pixels or more keep a one-pixel gap, as on screen.
+    """
+
+    def __init__(self: Self, rows: int, cols: int, cell_size: int) -> Self:
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.height = rows * cell_size
+        self.width = cols * cell_size
+        self.gap = None
+        if cell_size >= 4:
+            # Pixels on the last row or column of a cell.
+            edge = np.arange(cell_size) == cell_size - 1
+            self.gap = np.tile(edge, rows)[:, None] | np.tile(edge, cols)[None, :]
+
+    def paint(self: Self, boards: np.ndarray) -> np.ndarray:
+        """Paints a batch of boards (n, rows, cols) into frames (n, height, width)."""
+        n = len(boards)
+        size = self.cell_size
+        if size == 1:
+            return boards
+        frames = np.broadcast_to(boards[:, :, None, :, None], (n, self.rows, size, self.cols, size))
+        frames = frames.reshape(n, self.height, self.width)
+        if self.gap is not None:
+            frames[:, self.gap] = CELL_EMPTY
+        return frames
+
+
+class GifWriter:
+    """
+    Streams frames into an animated GIF. Each frame after the first only stores the bounding box of the pixels
+    that changed, with the unchanged ones in it transparent, so a frame costs what moved. Pillow compresses
+    each box; identical frames lengthen the one before instead of being stored.
+    """
+
+    def __init__(self: Self, path: str, width: int, height: int, palette, fps: float) -> Self:
+        self.image_module = load_pillow()
+        self.width = width
+        self.height = height
+        # One spare index after the palette marks transparent pixels.
+        self.transparent = len(palette)
+        size_bits = max(1, (self.transparent).bit_length())
+        self.palette = b"".join(bytes(color) for color in palette).ljust(3 << size_bits, b"\0")
+        self.frame_time = 100 / min(fps, MAX_GIF_FPS)  # In centiseconds.
+        self.frames = 0
+        self.previous = None
+        self.pending = None  # The last frame's image data, written once its duration is known.
+        self.pending_start = 0.0
+        self.file = open(path, "wb")
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF0 | (size_bits - 1), 0, 0))
+        self.file.write(self.palette)
+        # Loop forever (the NETSCAPE2.0 application extension).
+        self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def write(self: Self, frame: np.ndarray):
+        if self.previous is None:
+            box, pixels = (0, 0), frame
+        else:
+            changed = frame != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) == 0:
+                self.frames += 1
+                return
+            cols = np.flatnonzero(changed.any(axis=0))
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            pixels = np.where(changed[top:bottom, left:right], frame[top:bottom, left:right], self.transparent)
+            box = (left, top)
+        self.flush()
+        self.pending = (box, self.encode(pixels.astype(np.uint8, copy=False)))
+        self.pending_start = self.frames
+        self.frames += 1
+        self.previous = frame
+
+    def encode(self: Self, pixels: np.ndarray) -> tuple[int, int, bytes]:
+        """Returns the size and LZW data (code size and sub-blocks) of pixels, compressed by Pillow."""
+        image = self.image_module.fromarray(pixels, "P")
+        image.putpalette(self.palette)
+        buffer = io.BytesIO()
+        image.save(buffer, "GIF", optimize=False, interlace=False)
+        data = buffer.getvalue()
+        # Skip the header and the global palette Pillow wrote, then the image descriptor (and a local palette).
+        offset = 13 + (3 << ((data[10] & 7) + 1) if data[10] & 0x80 else 0)
+        while data[offset] == 0x21:
+            # An extension: its label, then sub-blocks up to an empty one.
+            offset += 2
+            while data[offset]:
+                offset += data[offset] + 1
+            offset += 1
+        flags = data[offset + 9]
+        offset += 10 + (3 << ((flags & 7) + 1) if flags & 0x80 else 0)
+        return pixels.shape[1], pixels.shape[0], data[offset:data.rindex(b";")]
+
+    def flush(self: Self):
+        """Writes the pending frame, lasting until the current one."""
+        if self.pending is None:
+            return
+        (left, top), (width, height, lzw) = self.pending
+        # Durations are rounded from the frame count, so rounding errors don't add up.
+        delay = round(self.frames * self.frame_time) - round(self.pending_start * self.frame_time)
+        transparency = 1 if self.pending_start > 0 else 0
+        # Graphic control extension: keep the previous frame under this one (disposal 1), then the delay.
+        self.file.write(struct.pack("<3sBHBB", b"!\xf9\x04", 0x04 | transparency, max(delay, 2),
+                                    self.transparent, 0))
+        self.file.write(struct.pack("<BHHHHB", 0x2C, left, top, width, height, 0))
+        self.file.write(lzw)
+        self.pending = None
+
+    def close(self: Self):
+        self.flush()
+        self.file.write(b";")
+        self.file.close()
+
+
+class PngSequenceWriter:
+    """Writes every frame as a numbered PNG in a directory."""
+
+    def __init__(self: Self, directory: str, palette) -> Self:
+        self.image_module = load_pillow()
+        self.directory = directory
+        self.palette = b"".join(bytes(color) for color in palette)
+        self.frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self: Self, frame: np.ndarray):
+        image = self.image_module.fromarray(frame, "P")
+        image.putpalette(self.palette)
+        # Fast compression: board frames are flat colours and compress well regardless.
+        image.save(os.path.join(self.directory, f"frame-{self.frames:06d}.png"), compress_level=1)
+        self.frames += 1
+
+    def close(self: Self):
+        pass
+
+
+class FrameExporter:
+    """
+    Turns a sequence of boards into a GIF (a path ending in .gif) or a directory of PNG frames (any other
+    path), without a window.
+
+    add_frame only copies the board into the current batch. Full batches are painted and encoded on a
+    background thread, so the caller keeps simulating while earlier frames are written. When QUEUED_BATCHES
+    batches are waiting, add_frame blocks until the oldest is done, which bounds the memory held.
+    """
+
+    def __init__(self: Self, path: str, rows: int, cols: int, palette=CELL_COLORS, cell_size: int = None,
+                 fps: float = 30) -> Self:
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.painter = FramePainter(rows, cols, cell_size or default_cell_size(rows, cols))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.lower().endswith(".gif"):
+            self.writer = GifWriter(path, self.painter.width, self.painter.height, palette, fps)
+        else:
+            self.writer = PngSequenceWriter(path, palette)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-export")
+        self.pending: list[Future] = []
+        self.batch = None
+        self.batch_frames = 0
+        self.frames = 0
+
+    def add_frame(self: Self, cells):
+        """Adds a board (rows * cols cell codes, such as a state's cells buffer) as the next frame."""
+        if self.batch is None:
+            self.batch = np.empty((FRAMES_PER_BATCH, self.rows, self.cols), dtype=np.uint8)
+        self.batch[self.batch_frames] = np.frombuffer(cells, dtype=np.uint8).reshape(self.rows, self.cols)
+        self.batch_frames += 1
+        self.frames += 1
+        if self.batch_frames == FRAMES_PER_BATCH:
+            self.submit_batch()
+
+    def submit_batch(self: Self):
+        if self.batch_frames == 0:
+            return
+        boards = self.batch[:self.batch_frames]
+        self.batch = None
+        self.batch_frames = 0
+        # Drop finished batches, raising the error of one that failed.
+        for future in [future for future in self.pending if future.done()]:
+            future.result()
+            self.pending.remove(future)
+        if len(self.pending) >= QUEUED_BATCHES:
+            self.pending.pop(0).result()
+        self.pending.append(self.executor.submit(self.write_batch, boards))
+
+    def write_batch(self: Self, boards: np.ndarray):
+        for frame in self.painter.paint(boards):
+            self.writer.write(frame)
+
+    def close(self: Self) -> int:
+        """Writes the remaining frames, finishes the file and returns the number of frames."""
+        self.submit_batch()
+        self.executor.submit(self.writer.close)
+        self.executor.shutdown(wait=True)
+        # Raise the first error the encoder ran into, if any.
+        for future in self.pending:
+            future.result()
+        self.pending = []
+        return self.frames
+
+
+def export_replay(record: EpisodeRecord, path: str, every: int = 1, fps: float = 30, cell_size: int = None) -> int:
+    """
+    Renders a recorded episode to path, one frame per every moves, and returns the number of frames. Nothing
+    is drawn on screen, so this runs as fast as the moves replay and the frames encode.
+    """
+    player = ReplayPlayer(record)
+    exporter = FrameExporter(path, record.rows, record.cols, cell_size=cell_size, fps=fps)
+    exporter.add_frame(player.display_cells)
+    while not player.is_finished:
+        player.advance(every)
+        exporter.add_frame(player.display_cells)
+    return exporter.close()
+
+
+class SceneCapture:
+    """
+    Exports the board of whatever scene is running, one frame in every changes of it (see
+    GameManager.run). The export is sized for the first board seen; boards of another size are skipped.
+    """
+
+    def __init__(self: Self, path: str, every: int = 1, cell_size: int = None, fps: float = 30) -> Self:
+        self.path = path
+        self.every = every
+        self.cell_size = cell_size
+        self.fps = fps
+        self.exporter = None
+        self.last_board = None
+        self.changes = 0
+
+    def capture(self: Self, scene):
+        renderer = scene.get_renderer()
+        game = renderer.game if renderer is not None else None
+        if game is None:
+            return
+        if self.exporter is None:
+            self.exporter = FrameExporter(self.path, game.rows, game.cols, renderer.palette, self.cell_size,
+                                          self.fps)
+        elif (game.rows, game.cols) != (self.exporter.rows, self.exporter.cols):
+            return
+        board = bytes(game.display_cells)
+        if board == self.last_board:
+            return
+        self.last_board = board
+        if self.changes % self.every == 0:
+            with METRICS.timer("export.capture"):
+                self.exporter.add_frame(board)
+        self.changes += 1
+
+    def close(self: Self) -> int:
+        return self.exporter.close() if self.exporter is not None else 0
@@ -1,13 +1,18 @@
 from .Scene import Scene
 from typing import Self
-import pygame
 from UI.Button import Button
+from UI.Layouts import grid_layout
+from UI.WidgetTree import WidgetTree
 from Singlton import GAME_MANAGER
+from Games.SnakeGameLogic import BOARD_SIZES
+from Games.Maps import GENERATED_MAPS, map_files
+from Games.EpisodeRecord import REPLAY_DIRECTORY
+import os
 
 class MainMenuScene(Scene):
     def __init__(self):
         self.buttons = []
-        self.mouse_down_previous = False
+        self.widgets = WidgetTree(self.update_layout)
         self.game = self
         self.game_manager = GAME_MANAGER
 
@@ -32,6 +37,13 @@ class MainMenuScene(Scene):
         a_star_button.subscribe(self.load_snake_game_a_star_agent)
         self.buttons.append(a_star_button)
 
+        # Create "MCTS" button.
+        mcts_button = Button(
+            label="MCTS Agent"
+        )
+        mcts_button.subscribe(self.load_snake_game_mcts_agent)
+        self.buttons.append(mcts_button)
+
         # Create "snake game with reinforcement learning agent" button.
         rl_agent_button = Button(
             label="Reinforcement Learning Agent"
@@ -39,6 +51,51 @@ class MainMenuScene(Scene):
         rl_agent_button.subscribe(self.load_snake_game_rl_agent)
         self.buttons.append(rl_agent_button)
 
+        # Create "snake game with deep Q-learning agent" button.
+        deep_rl_agent_button = Button(
+            label="Deep RL Agent"
+        )
+        deep_rl_agent_button.subscribe(self.load_snake_game_deep_rl_agent)
+        self.buttons.append(deep_rl_agent_button)
+
+        # Create "arena" button: several agents' snakes on one board.
+        arena_button = Button(
+            label="Arena"
+        )
+        arena_button.subscribe(self.load_snake_game_arena)
+        self.buttons.append(arena_button)
+
+        # Create "replays" button: plays back recorded episodes.
+        replay_button = Button(
+            label="Replays"
+        )
+        replay_button.subscribe(self.load_snake_game_replay)
+        self.buttons.append(replay_button)
+
+        # Create the board size selector. The chosen size applies to every game started from the menu.
+        self.board_size_button = Button(
+            label=self.board_size_label()
+        )
+        self.board_size_button.subscribe(self.cycle_board_size)
+        self.buttons.append(self.board_size_button)
+
+        # Create the map selector: an open board, a generated maze or rooms, or one of the map files.
+        self.map_button = Button(
+            label=self.map_label()
+        )
+        self.map_button.subscribe(self.cycle_map)
+        self.buttons.append(self.map_button)
+
+        # Create the recording switch: while on, games started from the menu save their episodes as replays.
+        self.record_button = Button(
+            label=self.record_label()
+        )
+        self.record_button.subscribe(self.toggle_recording)
+        self.buttons.append(self.record_button)
+
+        for button in self.buttons:
+            self.widgets.add(button)
+
 
     def load_snake_game_human_agent(self):
         from Scenes import SnakeGameHumanAgentScene as gs
@@ -56,63 +113,97 @@ class MainMenuScene(Scene):
         new_scene = gs.SnakeGameAStarAgentScene()
         self.game_manager.changeScene(new_scene)
 
+    def load_snake_game_mcts_agent(self):
+        from Scenes import SnakeGameMCTSAgentScene as gs
+        new_scene = gs.SnakeGameMCTSAgentScene()
+        self.game_manager.changeScene(new_scene)
+
     def load_snake_game_rl_agent(self):
         from Scenes import SnakeGameRLAgent as rl
         new_scene = rl.SnakeGameRLAgent()
         self.game_manager.changeScene(new_scene)
 
-    def update_layout(self, screen):
+    def load_snake_game_deep_rl_agent(self):
+        from Scenes import SnakeGameRL_DLAgent as dl
+        new_scene = dl.SnakeGameRLAgent()
+        self.game_manager.changeScene(new_scene)
+
+    def load_snake_game_arena(self):
+        from Scenes import SnakeGameArenaScene as arena
+        new_scene = arena.SnakeGameArenaScene()
+        self.game_manager.changeScene(new_scene)
+
+    def load_snake_game_replay(self):
+        from Scenes import SnakeGameReplayScene as replay
+        new_scene = replay.SnakeGameReplayScene()
+        self.game_manager.changeScene(new_scene)
+
+    def board_size_label(self):
+        rows, cols = self.game_manager.board_size
+        return f"Board: {rows} x {cols}"
+
+    def cycle_board_size(self):
+        """Switches to the next board size in BOARD_SIZES (or the first, after a size set on the command line)."""
+        size = self.game_manager.board_size
+        index = BOARD_SIZES.index(size) + 1 if size in BOARD_SIZES else 0
+        self.game_manager.board_size = BOARD_SIZES[index % len(BOARD_SIZES)]
+        # Generated maps are regenerated for the new size; a map file only fits its own size.
+        kind = self.game_manager.map_kind
+        self.game_manager.select_map(kind if kind in GENERATED_MAPS else "none", self.game_manager.map_seed)
+        self.board_size_button.set_label(self.board_size_label())
+        self.map_button.set_label(self.map_label())
+
+    def map_label(self):
+        game_map = self.game_manager.game_map
+        return f"Map: {game_map.name if game_map is not None else 'none'}"
+
+    def cycle_map(self):
+        """Switches to the next map: none, the generated ones, then the files in Maps/."""
+        kinds = ["none", *GENERATED_MAPS, *map_files()]
+        kind = self.game_manager.map_kind
+        index = kinds.index(kind) if kind in kinds else -1
+        for step in range(1, len(kinds) + 1):
+            kind = kinds[(index + step) % len(kinds)]
+            try:
+                self.game_manager.select_map(kind, self.game_manager.map_seed)
+                break
+            except ValueError as error:
+                # The board is too small to generate this kind of map, or the file is malformed.
+                print(f"Skipping map {os.path.basename(kind)}: {error}")
+        self.map_button.set_label(self.map_label())
+        self.board_size_button.set_label(self.board_size_label())
+
+    def record_label(self):
+        return f"Record: {'on' if self.game_manager.replay_directory is not None else 'off'}"
+
+    def toggle_recording(self):
+        recording = self.game_manager.replay_directory is not None
+        self.game_manager.replay_directory = None if recording else REPLAY_DIRECTORY
+        self.record_button.set_label(self.record_label())
+
+    def update_layout(self, screen_size):
         """
         Recalculates button positions based on a grid layout with two columns per row.
         If the number of buttons is odd, the extra button is placed on the left.
+        Only called by the widget tree after the window has been resized.
         """
-        import math
-        window_width, window_height = screen.get_size()
-        num_buttons = len(self.buttons)
-        columns = 2
-        rows = math.ceil(num_buttons / columns)
-        
-        # Define a margin (space between buttons and window edges)
-        margin = 20
-        
-        # Compute available width and height for the button grid.
-        # Here we assume the grid spans nearly the whole window minus fixed margins.
-        available_width = window_width - 2 * margin  # left/right margin
-        available_height = window_height - 2 * margin  # top/bottom margin
-        
-        # Compute each button's width and height.
-        # Also include additional horizontal spacing (margin between columns).
-        button_width = (available_width - margin * (columns - 1)) // columns
-        button_height = min(100, (available_height - margin * (rows - 1)) // rows)
-        
-        # Position each button in the grid.
-        for idx, button in enumerate(self.buttons):
-            row_index = idx // columns
-            col_index = idx % columns
-            x_position = margin + col_index * (button_width + margin)
-            y_position = margin + row_index * (button_height + margin)
-            button.rect = pygame.Rect(x_position, y_position, button_width, button_height)
+        grid_layout(self.buttons, screen_size, columns=2)
 
     def render_scene(self, screen):
         """Draws the main menu including background and buttons."""
         screen.fill((0, 0, 0))  # Clear screen with black.
-        self.update_layout(screen)
-        for button in self.buttons:
-            button.draw(screen)
+        self.widgets.draw(screen)
+
+    def get_widgets(self):
+        return self.widgets
 
     def collect_input(self, context = GAME_MANAGER.scene):
-        """Polls input: upon a fresh left mouse click, checks buttons for a hit and calls on_click()."""
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            for button in self.buttons:
-                if button.rect.collidepoint(mouse_pos):
-                    button.on_click()  # Trigger the button's event.
-        self.mouse_down_previous = mouse_pressed
+        """Button clicks arrive through handle_event, so there is nothing to poll."""
+        pass
 
     def process_input(self, dt: float, context = GAME_MANAGER.scene):
         """No time-dependent processing is needed for the main menu."""
         pass
 
     def set_scale(self: Self, width : int):
-        pass
\ No newline at end of file
+        self.widgets.invalidate_layout()
\ No newline at end of file
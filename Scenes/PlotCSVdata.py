@@ -1,9 +1,12 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import sys
 
 
 def plot_csv_data(file_path):
+    # pandas and matplotlib are imported here rather than at module load, since they take longer to import
+    # than the rest of the game put together.
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
     df = pd.read_csv(file_path)
 
     # Check if the CSV file contains the required columns
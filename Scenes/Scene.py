@@ -5,6 +5,34 @@ class Scene:
     def set_game_manager(self, game_manager):
         self.game_manager = game_manager
     
+    def handle_event(self, event) -> bool:
+        """
+        Forwards a pygame event to the scene's active widget tree, then to its board renderer (for zooming
+        and panning). Returns True if it was consumed.
+        """
+        widgets = self.get_widgets()
+        if widgets is not None and widgets.handle_event(event):
+            return True
+        renderer = self.get_renderer()
+        if renderer is None:
+            return False
+        return renderer.handle_event(event)
+    
+    def get_widgets(self):
+        """Returns the WidgetTree that should currently receive events, or None."""
+        return None
+
+    def get_renderer(self):
+        """Returns the BoardRenderer drawing the scene's board, or None."""
+        return None
+    
+    def close(self):
+        """
+        Releases the scene's worker threads or processes and saves its game's episode in progress as a replay
+        (when recording). Called when the game quits; scenes also call it before leaving for the main menu.
+        """
+        pass
+
     def collect_input(self, context):
         raise NotImplementedError
     
@@ -15,4 +43,4 @@ class Scene:
         raise NotImplementedError
     
     def set_scale(self, width):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
@@ -1,31 +1,63 @@
 from .Scene import Scene
 from typing import List, Tuple, Dict, Set, Self
-from queue import PriorityQueue
+import heapq
 import pygame
 from Games import SnakeGameLogic
 from Games.SnakeGameLogic import SnakeGame, InputAction, BlockState
 from UI.Button import Button  # Add this import
+from UI.Layouts import hud_layout, end_screen_layout
+from UI.WidgetTree import WidgetTree
+from PerformanceHelperFunctions.Metrics import METRICS
+from RenderModes.BoardRenderer import BoardRenderer
+from SearchHelperFunctions.Landmarks import landmarks_for
+from Singlton import GAME_MANAGER
 
 class SnakeGameAStarAgentScene(Scene):
-    def __init__(self):
+    def __init__(self, seed=None):
         self.grid_size = 20  # Default grid size
-        self.game = SnakeGameLogic.SnakeGame(save_id="a_star_agent")
+        rows, cols = GAME_MANAGER.board_size
+        self.game = SnakeGameLogic.SnakeGame(save_id="a_star_agent", rows=rows, cols=cols, seed=seed,
+                                             game_map=GAME_MANAGER.game_map,
+                                             replay_directory=GAME_MANAGER.replay_directory)
+        self.renderer = BoardRenderer()
         self.path = []
         self.tail_position = None
         self.last_input_process = 0
         self.speed = 10
-        self.mouse_down_previous = False
-        self.main_menu_button = None
-        self.speed_increase_button = None
-        self.speed_decrease_button = None
-        self.restart_button = None
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.speed_decrease_button = self.hud_widgets.add(Button(
+            label="Slow",
+            callback=self.decrease_speed
+        ))
+        self.speed_increase_button = self.hud_widgets.add(Button(
+            label="Fast",
+            callback=self.increase_speed
+        ))
+
+        # Buttons shown on the Game Over screen.
+        self.end_screen_widgets = WidgetTree(self.layout_end_screen)
+        self.restart_button = self.end_screen_widgets.add(Button(
+            label="Restart Game",
+            callback=self.restart_game
+        ))
+        self.end_main_menu_button = self.end_screen_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
         # Initialize for the first path
         self.create_path()
     
     def collect_input(self):
         """Determines next move and sets the action based on the current path"""
         # Always try to create a new path
-        self.create_path()  # Remove the if not self.path condition to recalculate path every time
+        with METRICS.timer("a_star.decision"):
+            self.create_path()  # Remove the if not self.path condition to recalculate path every time
         
         # If we have a path, follow it
         if self.path:
@@ -49,26 +81,16 @@ class SnakeGameAStarAgentScene(Scene):
     def process_input(self, dt: float):
         if dt == 0:
             self.game.process_action()
+            METRICS.count("game.steps")
             return
         self.last_input_process += dt
         if self.last_input_process >= 1 / self.speed:
             self.last_input_process = 0
             self.game.process_action()
+            METRICS.count("game.steps")
             # Update tail position if we don't have one yet
             if self.tail_position is None:
                 self.tail_position = self.game.tail_locations[0]
-        
-        # Check for button clicks.
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            if self.main_menu_button is not None and self.main_menu_button.rect.collidepoint(mouse_pos):
-                self.main_menu_button.on_click()
-            if self.speed_decrease_button is not None and self.speed_decrease_button.rect.collidepoint(mouse_pos):
-                self.speed_decrease_button.on_click()
-            if self.speed_increase_button is not None and self.speed_increase_button.rect.collidepoint(mouse_pos):
-                self.speed_increase_button.on_click()
-        self.mouse_down_previous = mouse_pressed
 
     def create_path(self) -> List[Tuple[int, int]]:
         """Creates a path using A* pathfinding"""
@@ -91,24 +113,33 @@ class SnakeGameAStarAgentScene(Scene):
 
     def find_path_to_food(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
         """A* pathfinding to food"""
-        frontier = PriorityQueue()
-        frontier.put((0, start))
+        # heapq rather than queue.PriorityQueue: the search is single-threaded, so the queue's locking
+        # is pure overhead, and it adds up over the thousands of pushes of a search on a large board.
+        frontier = [(0, 0, start)]
         came_from = {start: None}
         cost_so_far = {start: 0}
+        expansions = 0
+        estimate = self.distance_estimator(goal)
 
-        while not frontier.empty():
-            current = frontier.get()[1]
+        while frontier:
+            current = heapq.heappop(frontier)[2]
             if current == goal:
                 break
+            expansions += 1
 
             for next_pos in self.get_valid_neighbors(current):
                 new_cost = cost_so_far[current] + 1
                 if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
                     cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.manhattan_distance(next_pos, goal)
-                    frontier.put((priority, next_pos))
+                    heuristic = estimate(next_pos)
+                    # Ties on priority go to the cell closest to the goal. On an open board every cell
+                    # between the head and the food has the same priority, and without the tie-break the
+                    # search expands that whole rectangle instead of heading straight for the goal.
+                    heapq.heappush(frontier, (new_cost + heuristic, heuristic, next_pos))
                     came_from[next_pos] = current
 
+        METRICS.observe("a_star.expansions", expansions)
+        METRICS.observe("a_star.nodes_visited", len(cost_so_far))
         return self.reconstruct_path(came_from, start, goal)
 
     def find_path_to_tail(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -143,6 +174,18 @@ class SnakeGameAStarAgentScene(Scene):
         """Calculate Manhattan distance between two points"""
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
+    def distance_estimator(self, goal: Tuple[int, int]):
+        """
+        Returns a function estimating the distance from a position to goal: the Manhattan distance on an open
+        board, or the map's landmark bound, which accounts for the detours walls force, on a board with walls.
+        """
+        state = self.game.state
+        if state.walls is None:
+            return lambda pos: self.manhattan_distance(pos, goal)
+        cols = state.cols
+        estimate = landmarks_for(state).estimator(goal[0] * cols + goal[1])
+        return lambda pos: estimate(pos[0] * cols + pos[1])
+
     def reconstruct_path(self, came_from: Dict, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
         """Reconstruct path from came_from dictionary"""
         if goal not in came_from:
@@ -157,16 +200,13 @@ class SnakeGameAStarAgentScene(Scene):
         return path
 
     def find_food_position(self) -> Tuple[int, int]:
-        """Find food position by scanning game state array"""
-        for row in range(self.game.rows):
-            for col in range(self.game.cols):
-                if self.game.state_arr[row][col] == BlockState.Food:
-                    return (row, col)
-        return None
+        """Find food position. The game tracks it, so there is no need to scan the board."""
+        return self.game.food_location
 
     def set_scale(self, width: int):
-        global block_size
-        block_size = (width - 20) / self.game.cols
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+        self.end_screen_widgets.invalidate_layout()
 
     def render_scene(self: Self, screen: pygame.Surface):
         if self.game is not None:
@@ -176,46 +216,19 @@ class SnakeGameAStarAgentScene(Scene):
                 # Fill the background.
                 screen.fill("black")
                 
-                # --- Define the grid drawing area ---
-                # These offsets ensure that the grid is not drawn at the very edge,
-                # leaving room for a border and score readouts.
-                game_offset_x = 10
-                game_offset_y = 10
-                game_width = self.game.cols * block_size
-                game_height = self.game.rows * block_size
-                
-                # --- Draw the grid blocks ---
-                # Adjust each block's position based on the game area offsets.
-                for x, row in enumerate(self.game.state_arr):
-                    for y, block in enumerate(row):
-                        rect = pygame.Rect(
-                            game_offset_x + y * block_size,
-                            game_offset_y + x * block_size,
-                            block_size,
-                            block_size
-                        )
-                        if block == BlockState.Snake:
-                            pygame.draw.rect(screen, "white", rect, 0, 3)
-                        elif block == BlockState.Food:
-                            pygame.draw.rect(screen, "red", rect, 0, 3)
-                        elif block == BlockState.Obsticle:
-                            pygame.draw.rect(screen, "green", rect, 0, 3)
+                # --- Draw the board ---
+                # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+                self.renderer.render_scene(screen, self.game)
+                board_rect = self.renderer.rect
+                game_offset_x = board_rect.left
                 
                 self.visualize_path(screen)
                 # --- Draw a border around the grid ---
-                # The border is drawn with a padding so it doesn't overlap the grid blocks.
-                border_padding = 5  # adjust as needed
-                border_rect = pygame.Rect(
-                    game_offset_x - border_padding,
-                    game_offset_y - border_padding,
-                    game_width + 2 * border_padding,
-                    game_height + 2 * border_padding
-                )
-                pygame.draw.rect(screen, "white", border_rect, 3)
+                self.renderer.draw_border(screen)
                 
                 # --- Draw the score readouts outside the grid ---
                 # Here, we choose to render the score information below the grid.
-                stats_offset_y = game_offset_y + game_height + 10
+                stats_offset_y = board_rect.bottom + 10
                 font = pygame.font.SysFont("Arial", 24)
                 score_text = font.render(f"Score: {self.game.score}", True, (255, 255, 255))
                 time_text = font.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
@@ -225,50 +238,22 @@ class SnakeGameAStarAgentScene(Scene):
                 screen.blit(time_text, (game_offset_x, stats_offset_y + 30))
                 screen.blit(high_score_text, (game_offset_x, stats_offset_y + 60))
 
-                button_width = 200
-                button_height = 50
-                menu_x = game_offset_x + game_width - button_width
-                menu_y = game_offset_y + game_height + 10
-                menu_y = stats_offset_y
-                if self.main_menu_button is None:
-                    self.main_menu_button = Button(
-                        label="Main Menu",
-                        callback=self.load_main_menu
-                    )
-                #self.main_menu_button.rect = pygame.Rect(game_width - game_offset_x, menu_y, button_width, button_height)
-                self.main_menu_button.rect = pygame.Rect(menu_x, menu_y, button_width, button_height)
-                self.main_menu_button.draw(screen)
-
-                # --- Place the Speed Control Buttons Below the Main Menu Button ---
-            # Define a small gap between rows.
-            vertical_gap = 10
-            speed_buttons_y = menu_y + button_height + vertical_gap
-            
-            # We'll arrange two buttons in a single row. Their total width equals the Main Menu button's width.
-            speed_button_margin = 10  # gap between the two speed buttons
-            speed_button_width = (button_width - speed_button_margin) // 2
-            speed_button_height = button_height
-            
-            # Left button: decrease speed ("Slow")
-            if self.speed_decrease_button is None:
-                self.speed_decrease_button = Button(
-                    label="Slow",
-                    callback=self.decrease_speed
-                )
-            speed_decrease_x = menu_x  # left column of the two-speed buttons
-            self.speed_decrease_button.rect = pygame.Rect(speed_decrease_x, speed_buttons_y, speed_button_width, speed_button_height)
-            self.speed_decrease_button.draw(screen)
-            
-            # Right button: increase speed ("Fast")
-            if self.speed_increase_button is None:
-                self.speed_increase_button = Button(
-                    label="Fast",
-                    callback=self.increase_speed
-                )
-            speed_increase_x = menu_x + speed_button_width + speed_button_margin
-            self.speed_increase_button.rect = pygame.Rect(speed_increase_x, speed_buttons_y, speed_button_width, speed_button_height)
-            self.speed_increase_button.draw(screen)
+                # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+                self.hud_widgets.draw(screen)
             
+    def get_widgets(self):
+        return self.end_screen_widgets if self.game.is_dead else self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button, self.speed_decrease_button, self.speed_increase_button)
+
+    def layout_end_screen(self, screen_size):
+        end_screen_layout(screen_size, self.restart_button, self.end_main_menu_button)
+
     def decrease_speed(self):
         """
         Decrease the game speed, but do not let it go below a minimum value.
@@ -287,28 +272,11 @@ class SnakeGameAStarAgentScene(Scene):
 
     def visualize_path(self, screen):
         """
-        Visualize the Hamiltonian path on the screen,
+        Visualize the A* path on the screen,
         drawing it centered relative to the grid.
         """
-        if not self.path:
-            return
-
-        # Use the same offsets as in render_scene.
-        game_offset_x = 10
-        game_offset_y = 10
-
         # Draw the path with a green line.
-        for i in range(len(self.path) - 1):
-            start_pos = self.path[i]
-            end_pos = self.path[i + 1]
-
-            # Convert grid positions to screen coordinates, adding the offsets.
-            start_x = game_offset_x + start_pos[1] * block_size + block_size // 2
-            start_y = game_offset_y + start_pos[0] * block_size + block_size // 2
-            end_x = game_offset_x + end_pos[1] * block_size + block_size // 2
-            end_y = game_offset_y + end_pos[0] * block_size + block_size // 2
-
-            pygame.draw.line(screen, (0, 255, 0), (start_x, start_y), (end_x, end_y), 2)
+        self.renderer.draw_path(screen, self.path)
 
     def end_game(self: Self, screen: pygame.Surface):
 
@@ -338,46 +306,14 @@ class SnakeGameAStarAgentScene(Scene):
         screen.blit(high_score_text, (screen_width // 2 - high_score_text.get_width() // 2, stats_y + 80))
         screen.blit(total_time_text, (screen_width // 2 - total_time_text.get_width() // 2, stats_y + 120))
 
-        # --- Create/reset buttons with updated positions ---
-        # Restart Button:
-        button_width = 200
-        button_height = 50
-        window_width, window_height = screen.get_size()
-        y_position = window_height // 1.5 - button_height // 2
-        restart_x = (screen_width - button_width) // 2
-        # Position the restart button below the stats.
-        restart_y = y_position
-        if self.restart_button is None:
-            self.restart_button = Button(
-                label="Restart Game",
-                callback=self.restart_game
-            )
-        self.restart_button.rect = pygame.Rect(restart_x, restart_y, button_width, button_height)
-        
-        # Main Menu Button:
-        menu_y = restart_y + button_height + 10  # position below the restart button
-        if self.main_menu_button is None:
-            self.main_menu_button = Button(
-                label="Main Menu",
-                callback=self.load_main_menu
-            )
-        self.main_menu_button.rect = pygame.Rect(restart_x, menu_y, button_width, button_height)
-        
-        # Draw the buttons.
-        self.restart_button.draw(screen)
-        self.main_menu_button.draw(screen)
-        
-        # Check for button clicks.
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            if self.restart_button.rect.collidepoint(mouse_pos):
-                self.restart_button.on_click()
-            if self.main_menu_button.rect.collidepoint(mouse_pos):
-                self.main_menu_button.on_click()
-        self.mouse_down_previous = mouse_pressed
+        # Draw the buttons. Clicks are handled by the widget tree through handle_event.
+        self.end_screen_widgets.draw(screen)
+
+    def close(self):
+        self.game.save_replay()
 
     def load_main_menu(self):
+        self.close()
         from Scenes import MainMenuScene as mm
         new_scene = mm.MainMenuScene()
         self.game_manager.changeScene(new_scene)
@@ -0,0 +1,198 @@
+from .Scene import Scene
+from typing import Self
+import pygame
+from Games.Arena import ArenaGame, SNAKE_COLORS, STEP_DIED
+from Games.ArenaAgents import ArenaController
+from Games.SnakeGameState import UP, DOWN, LEFT, RIGHT
+from Singlton import GAME_MANAGER
+from UI.Button import Button
+from UI.Layouts import hud_layout, end_screen_layout
+from UI.WidgetTree import WidgetTree
+from PerformanceHelperFunctions.Metrics import METRICS
+from RenderModes.BoardRenderer import BoardRenderer, CELL_COLORS
+
+# Keyboard bindings for steering the human snake(s).
+key_directions = {
+    pygame.K_w: UP, pygame.K_UP: UP,
+    pygame.K_s: DOWN, pygame.K_DOWN: DOWN,
+    pygame.K_a: LEFT, pygame.K_LEFT: LEFT,
+    pygame.K_d: RIGHT, pygame.K_RIGHT: RIGHT,
+}
+
+# Score lines shown below the board; with more snakes, the rest are summarised.
+SCORE_LINES = 6
+
+
+class SnakeGameArenaScene(Scene):
+    """
+    Several snakes, each with its own agent (GAME_MANAGER.arena_agents), on one board. The round ends when
+    every snake is dead.
+    """
+
+    def __init__(self, seed=None):
+        self.speed = 10  # ticks per second
+        self.last_input_process = 0
+        rows, cols = GAME_MANAGER.board_size
+        self.agent_names = list(GAME_MANAGER.arena_agents)
+        self.game = ArenaGame(rows, cols, len(self.agent_names), game_map=GAME_MANAGER.game_map, seed=seed)
+        self.controller = ArenaController(self.game.arena, self.agent_names, GAME_MANAGER.arena_parallel,
+                                          GAME_MANAGER.arena_workers, seed=seed)
+        self.game_manager = GAME_MANAGER
+        self.renderer = BoardRenderer(CELL_COLORS + SNAKE_COLORS)
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.speed_decrease_button = self.hud_widgets.add(Button(
+            label="Slow",
+            callback=self.decrease_speed
+        ))
+        self.speed_increase_button = self.hud_widgets.add(Button(
+            label="Fast",
+            callback=self.increase_speed
+        ))
+
+        # Buttons shown on the Game Over screen.
+        self.end_screen_widgets = WidgetTree(self.layout_end_screen)
+        self.restart_button = self.end_screen_widgets.add(Button(
+            label="Restart Game",
+            callback=self.restart_game
+        ))
+        self.end_main_menu_button = self.end_screen_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+
+    def collect_input(self: Self):
+        # Human snakes are steered through KEYDOWN events in handle_event; the agents move in process_input.
+        pass
+
+    def handle_event(self: Self, event) -> bool:
+        if event.type == pygame.KEYDOWN and event.key in key_directions:
+            humans = self.controller.human_agents()
+            for agent in humans:
+                agent.direction = key_directions[event.key]
+            if humans:
+                return True
+        return super().handle_event(event)
+
+    def process_input(self: Self, dt: float):
+        if self.game.is_dead:
+            return
+        if dt == 0:
+            self.process_game_step()
+            return
+        self.last_input_process += dt
+        if self.last_input_process >= 1 / self.speed:
+            self.last_input_process = 0
+            self.process_game_step()
+
+    def process_game_step(self: Self):
+        """Asks every agent for its move, then moves all snakes at once."""
+        with METRICS.timer("arena.decision"):
+            directions = self.controller.choose_directions()
+        with METRICS.timer("arena.step"):
+            results = self.game.step(directions)
+        METRICS.count("game.steps")
+        deaths = int((results == STEP_DIED).sum())
+        if deaths:
+            METRICS.count("arena.deaths", deaths)
+
+    def score_lines(self: Self) -> list[tuple[str, tuple]]:
+        """(text, colour) of the score readouts, best snakes first."""
+        snakes = self.game.arena.snakes
+        order = sorted(range(len(snakes)), key=lambda k: (snakes[k].is_dead, -snakes[k].score))
+        lines = []
+        for k in order[:SCORE_LINES]:
+            status = " (dead)" if snakes[k].is_dead else ""
+            lines.append((f"{k + 1} {self.agent_names[k]}: {snakes[k].score}{status}",
+                          SNAKE_COLORS[k % len(SNAKE_COLORS)]))
+        if len(order) > SCORE_LINES:
+            alive = sum(not snake.is_dead for snake in snakes)
+            lines.append((f"... {len(order) - SCORE_LINES} more, {alive} alive", (255, 255, 255)))
+        return lines
+
+    def render_scene(self: Self, screen: pygame.Surface):
+        if self.game.is_dead:
+            self.end_game(screen)
+            return
+        screen.fill("black")
+
+        # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+        self.renderer.render_scene(screen, self.game)
+        board_rect = self.renderer.rect
+        self.renderer.draw_border(screen)
+
+        stats_offset_y = board_rect.bottom + 10
+        font = pygame.font.SysFont("Arial", 20)
+        for i, (text, color) in enumerate(self.score_lines()):
+            screen.blit(font.render(text, True, color), (board_rect.left, stats_offset_y + 24 * i))
+
+        # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+        self.hud_widgets.draw(screen)
+
+    def end_game(self: Self, screen: pygame.Surface):
+        screen.fill("red")
+        screen_width, screen_height = screen.get_size()
+
+        font = pygame.font.SysFont("Arial", 48)
+        game_over_text = font.render("Game Over", True, (255, 255, 255))
+        game_over_rect = game_over_text.get_rect(center=(screen_width // 2, screen_height // 2 - 200))
+        screen.blit(game_over_text, game_over_rect)
+
+        # Final scores, with each snake's best over the rounds played.
+        font_small = pygame.font.SysFont("Arial", 24)
+        stats_y = game_over_rect.bottom + 10
+        snakes = self.game.arena.snakes
+        order = sorted(range(len(snakes)), key=lambda k: -snakes[k].score)[:SCORE_LINES]
+        for i, k in enumerate(order):
+            text = font_small.render(f"{k + 1} {self.agent_names[k]}: {snakes[k].score} "
+                                     f"(best {self.game.high_scores[k]})", True, (255, 255, 255))
+            screen.blit(text, (screen_width // 2 - text.get_width() // 2, stats_y + 32 * i))
+
+        # Draw the buttons. Clicks are handled by the widget tree through handle_event.
+        self.end_screen_widgets.draw(screen)
+
+    def get_widgets(self):
+        return self.end_screen_widgets if self.game.is_dead else self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        hud_layout(self.renderer.rect, self.main_menu_button, self.speed_decrease_button, self.speed_increase_button)
+
+    def layout_end_screen(self, screen_size):
+        end_screen_layout(screen_size, self.restart_button, self.end_main_menu_button)
+
+    def decrease_speed(self):
+        self.speed = max(1, self.speed - 5)
+        print(f"Speed decreased to {self.speed}")
+
+    def increase_speed(self):
+        self.speed = min(200, self.speed + 5)
+        print(f"Speed increased to {self.speed}")
+
+    def restart_game(self):
+        """Starts a new round with the same snakes and agents."""
+        self.game.reset()
+        self.last_input_process = 0
+        for agent in self.controller.human_agents():
+            agent.direction = None
+
+    def close(self):
+        self.controller.close()
+
+    def load_main_menu(self):
+        self.close()
+        from Scenes import MainMenuScene as mm
+        new_scene = mm.MainMenuScene()
+        self.game_manager.changeScene(new_scene)
+
+    def set_scale(self: Self, width: int):
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+        self.end_screen_widgets.invalidate_layout()
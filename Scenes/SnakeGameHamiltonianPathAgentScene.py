@@ -2,47 +2,83 @@ from .Scene import Scene
 from typing import Self
 import pygame
 from Games import SnakeGameLogic
-from Games.SnakeGameLogic import BlockState, InputAction
+from Games.SnakeGameLogic import BlockState, InputAction, DIRECTION_ACTIONS
 from Singlton import GAME_MANAGER
 from UI.Button import Button
-import GraphHelperFunctions.ArrayToGraph as gh
+from UI.Layouts import hud_layout, end_screen_layout
+from UI.WidgetTree import WidgetTree
+from PerformanceHelperFunctions.Metrics import METRICS
+from RenderModes.BoardRenderer import BoardRenderer
+from SearchHelperFunctions.RolloutPolicies import safe_directions
 import GraphHelperFunctions.Hamiltonian as ham
 
 class SnakeGameHamiltonianPathAgentScene(Scene):
 
-    def __init__(self):
+    def __init__(self, seed=None):
         self.speed = 10  # input processes per second
         self.last_input_process = 0
-        self.rows = 26
-        self.cols = 32
-        self.game = SnakeGameLogic.SnakeGame("hamiltonian", self.rows, self.cols)
-        self.restart_button = None
-        self.main_menu_button = None
-        self.speed_increase_button = None
-        self.speed_decrease_button = None
-        self.mouse_down_previous = False
+        rows, cols = GAME_MANAGER.board_size
+        self.game = SnakeGameLogic.SnakeGame("hamiltonian", rows, cols, seed=seed,
+                                             game_map=GAME_MANAGER.game_map,
+                                             replay_directory=GAME_MANAGER.replay_directory)
+        self.rows, self.cols = self.game.rows, self.game.cols
         self.game_manager = GAME_MANAGER
+        self.renderer = BoardRenderer()
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.speed_decrease_button = self.hud_widgets.add(Button(
+            label="Slow",
+            callback=self.decrease_speed
+        ))
+        self.speed_increase_button = self.hud_widgets.add(Button(
+            label="Fast",
+            callback=self.increase_speed
+        ))
+
+        # Buttons shown on the Game Over screen.
+        self.end_screen_widgets = WidgetTree(self.layout_end_screen)
+        self.restart_button = self.end_screen_widgets.add(Button(
+            label="Restart Game",
+            callback=self.restart_game
+        ))
+        self.end_main_menu_button = self.end_screen_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
         
         # Initialize the Hamiltonian path
         self.hamiltonian_path = None
+        self.cycle_searched = False
+        self.path_index = {}
         self.current_path_index = 0
-        self.graph = None
-        
-        # Initialize the graph and path
-        self.graph = gh.array_to_graph(self.game.state_arr)
-        self.hamiltonian_path = ham.find_hamiltonian_cycle(self.rows, self.cols)
+        self.initialize_graph_and_path()
 
     def initialize_graph_and_path(self):
         self.last_input_process = 0
-        self.restart_button = None
-        self.mouse_down_previous = False
-        
-        # Initialize the Hamiltonian path
-        self.current_path_index = 0
         
-        # Initialize the graph and path
-        self.graph = gh.array_to_graph(self.game.state_arr)
-        self.hamiltonian_path = ham.find_hamiltonian_cycle(self.rows, self.cols)
+        # The board never changes, so its cycle is searched for once (around the map's walls, if any); a
+        # restart only finds where the new snake starts on it.
+        if not self.cycle_searched:
+            self.cycle_searched = True
+            game_map = self.game.game_map
+            if game_map is not None:
+                self.hamiltonian_path = game_map.hamiltonian_cycle()
+            else:
+                self.hamiltonian_path = ham.find_hamiltonian_cycle(self.rows, self.cols)
+            if self.hamiltonian_path is None:
+                board = f"map {game_map.name}" if game_map is not None else f"{self.rows}x{self.cols} board"
+                print(f"No Hamiltonian cycle found on the {board}; the snake takes any safe move instead")
+            # Position of every cell in the cycle, so following it is a lookup rather than a scan of the board.
+            self.path_index = {}
+            for i, pos in enumerate(self.hamiltonian_path or ()):
+                self.path_index.setdefault(pos, i)
+        # Follow the cycle from wherever the snake starts on it.
+        self.current_path_index = self.path_index.get(self.game.head_location, 0)
     
     def get_next_action(self):
         """
@@ -105,45 +141,32 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
         if self.last_input_process >= 1 / self.speed:
             self.last_input_process = 0
             self.process_game_step()
-
-        # Check for button clicks.
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            if self.main_menu_button is not None and self.main_menu_button.rect.collidepoint(mouse_pos):
-                self.main_menu_button.on_click()
-            if self.speed_decrease_button is not None and self.speed_decrease_button.rect.collidepoint(mouse_pos):
-                self.speed_decrease_button.on_click()
-            if self.speed_increase_button is not None and self.speed_increase_button.rect.collidepoint(mouse_pos):
-                self.speed_increase_button.on_click()
-        self.mouse_down_previous = mouse_pressed
     
     def process_game_step(self):
         """
         Process one step of the game, updating the snake's position and the graph.
         """
-        # Ensure the graph is initialized.
-        if self.graph is None:
-            self.initialize_graph_and_path()
-        
         # Get the next action from the Hamiltonian cycle.
-        next_action = self.get_next_action()
+        with METRICS.timer("hamiltonian.decision"):
+            next_action = self.get_next_action()
+            if next_action is None:
+                # Without a cycle (or off it), take any move that doesn't kill the snake, as
+                # HamiltonianArenaAgent does.
+                options = safe_directions(self.game.state)
+                if options:
+                    next_action = DIRECTION_ACTIONS[options[0]]
         if next_action is not None:
             self.game.set_action(next_action)
-        else:
-            # You might decide what to do here if no valid action is found.
-            print("No valid next action found!")
         
         # Process the action.
         self.game.process_action()
+        METRICS.count("game.steps")
         
         # Update the current path index:
         # Try to match the snake's head position with a node in the Hamiltonian cycle.
-        if self.hamiltonian_path:
-            for i, pos in enumerate(self.hamiltonian_path):
-                if pos == self.game.head_location:
-                    self.current_path_index = i
-                    break
+        index = self.path_index.get(self.game.head_location)
+        if index is not None:
+            self.current_path_index = index
     
     def render_scene(self: Self, screen: pygame.Surface):
         if self.game is not None:
@@ -153,47 +176,20 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
                 # Fill the background.
                 screen.fill("black")
                 
-                # --- Define the grid drawing area ---
-                # These offsets ensure that the grid is not drawn at the very edge,
-                # leaving room for a border and score readouts.
-                game_offset_x = 10
-                game_offset_y = 10
-                game_width = self.game.cols * block_size
-                game_height = self.game.rows * block_size
-                
-                # --- Draw the grid blocks ---
-                # Adjust each block's position based on the game area offsets.
-                for x, row in enumerate(self.game.state_arr):
-                    for y, block in enumerate(row):
-                        rect = pygame.Rect(
-                            game_offset_x + y * block_size,
-                            game_offset_y + x * block_size,
-                            block_size,
-                            block_size
-                        )
-                        if block == BlockState.Snake:
-                            pygame.draw.rect(screen, "white", rect, 0, 3)
-                        elif block == BlockState.Food:
-                            pygame.draw.rect(screen, "red", rect, 0, 3)
-                        elif block == BlockState.Obsticle:
-                            pygame.draw.rect(screen, "green", rect, 0, 3)
+                # --- Draw the board ---
+                # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+                self.renderer.render_scene(screen, self.game)
+                board_rect = self.renderer.rect
+                game_offset_x = board_rect.left
 
                 self.visualize_path(screen)
                 
                 # --- Draw a border around the grid ---
-                # The border is drawn with a padding so it doesn't overlap the grid blocks.
-                border_padding = 5  # adjust as needed
-                border_rect = pygame.Rect(
-                    game_offset_x - border_padding,
-                    game_offset_y - border_padding,
-                    game_width + 2 * border_padding,
-                    game_height + 2 * border_padding
-                )
-                pygame.draw.rect(screen, "white", border_rect, 3)
+                self.renderer.draw_border(screen)
                 
                 # --- Draw the score readouts outside the grid ---
                 # Here, we choose to render the score information below the grid.
-                stats_offset_y = game_offset_y + game_height + 10
+                stats_offset_y = board_rect.bottom + 10
                 font = pygame.font.SysFont("Arial", 24)
                 score_text = font.render(f"Score: {self.game.score}", True, (255, 255, 255))
                 time_text = font.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
@@ -203,50 +199,22 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
                 screen.blit(time_text, (game_offset_x, stats_offset_y + 30))
                 screen.blit(high_score_text, (game_offset_x, stats_offset_y + 60))
 
-                button_width = 200
-                button_height = 50
-                menu_x = game_offset_x + game_width - button_width
-                menu_y = game_offset_y + game_height + 10
-                menu_y = stats_offset_y
-                if self.main_menu_button is None:
-                    self.main_menu_button = Button(
-                        label="Main Menu",
-                        callback=self.load_main_menu
-                    )
-                #self.main_menu_button.rect = pygame.Rect(game_width - game_offset_x, menu_y, button_width, button_height)
-                self.main_menu_button.rect = pygame.Rect(menu_x, menu_y, button_width, button_height)
-                self.main_menu_button.draw(screen)
-
-                # --- Place the Speed Control Buttons Below the Main Menu Button ---
-            # Define a small gap between rows.
-            vertical_gap = 10
-            speed_buttons_y = menu_y + button_height + vertical_gap
-            
-            # We'll arrange two buttons in a single row. Their total width equals the Main Menu button's width.
-            speed_button_margin = 10  # gap between the two speed buttons
-            speed_button_width = (button_width - speed_button_margin) // 2
-            speed_button_height = button_height
-            
-            # Left button: decrease speed ("Slow")
-            if self.speed_decrease_button is None:
-                self.speed_decrease_button = Button(
-                    label="Slow",
-                    callback=self.decrease_speed
-                )
-            speed_decrease_x = menu_x  # left column of the two-speed buttons
-            self.speed_decrease_button.rect = pygame.Rect(speed_decrease_x, speed_buttons_y, speed_button_width, speed_button_height)
-            self.speed_decrease_button.draw(screen)
-            
-            # Right button: increase speed ("Fast")
-            if self.speed_increase_button is None:
-                self.speed_increase_button = Button(
-                    label="Fast",
-                    callback=self.increase_speed
-                )
-            speed_increase_x = menu_x + speed_button_width + speed_button_margin
-            self.speed_increase_button.rect = pygame.Rect(speed_increase_x, speed_buttons_y, speed_button_width, speed_button_height)
-            self.speed_increase_button.draw(screen)
+                # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+                self.hud_widgets.draw(screen)
             
+    def get_widgets(self):
+        return self.end_screen_widgets if self.game.is_dead else self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button, self.speed_decrease_button, self.speed_increase_button)
+
+    def layout_end_screen(self, screen_size):
+        end_screen_layout(screen_size, self.restart_button, self.end_main_menu_button)
+
     def decrease_speed(self):
         """
         Decrease the game speed, but do not let it go below a minimum value.
@@ -267,26 +235,31 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
         """
         Visualize the Hamiltonian path on the screen,
         drawing it centered relative to the grid.
+        Only the segments touching visible cells are drawn, found through the cells rather than by walking
+        the whole cycle, so zooming into a large board stays cheap.
         """
-        if not self.hamiltonian_path:
+        if not self.hamiltonian_path or not self.renderer.shows_paths:
             return
 
-        # Use the same offsets as in render_scene.
-        game_offset_x = 10
-        game_offset_y = 10
+        path = self.hamiltonian_path
+        first_row, end_row, first_col, end_col = self.renderer.visible_cells()
 
-        # Draw the path with a green line.
-        for i in range(len(self.hamiltonian_path) - 1):
-            start_pos = self.hamiltonian_path[i]
-            end_pos = self.hamiltonian_path[i + 1]
+        def visible_segments():
+            for row in range(first_row, end_row):
+                for col in range(first_col, end_col):
+                    i = self.path_index.get((row, col))
+                    if i is None:
+                        continue
+                    if i + 1 < len(path):
+                        yield path[i], path[i + 1]
+                    # The segment coming in from outside the view is not drawn by its own start cell.
+                    previous = path[i - 1] if i > 0 else None
+                    if previous is not None and not (first_row <= previous[0] < end_row and
+                                                     first_col <= previous[1] < end_col):
+                        yield previous, path[i]
 
-            # Convert grid positions to screen coordinates, adding the offsets.
-            start_x = game_offset_x + start_pos[1] * block_size + block_size // 2
-            start_y = game_offset_y + start_pos[0] * block_size + block_size // 2
-            end_x = game_offset_x + end_pos[1] * block_size + block_size // 2
-            end_y = game_offset_y + end_pos[0] * block_size + block_size // 2
-
-            pygame.draw.line(screen, (0, 255, 0), (start_x, start_y), (end_x, end_y), 2)
+        # Draw the path with a green line.
+        self.renderer.draw_segments(screen, visible_segments())
 
     def end_game(self: Self, screen: pygame.Surface):
         # Fill the background with a solid color.
@@ -315,44 +288,8 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
         screen.blit(high_score_text, (screen_width // 2 - high_score_text.get_width() // 2, stats_y + 80))
         screen.blit(total_time_text, (screen_width // 2 - total_time_text.get_width() // 2, stats_y + 120))
 
-        # --- Create/reset buttons with updated positions ---
-        # Restart Button:
-        button_width = 200
-        button_height = 50
-        window_width, window_height = screen.get_size()
-        y_position = window_height // 1.5 - button_height // 2
-        restart_x = (screen_width - button_width) // 2
-        # Position the restart button below the stats.
-        restart_y = y_position
-        if self.restart_button is None:
-            self.restart_button = Button(
-                label="Restart Game",
-                callback=self.restart_game
-            )
-        self.restart_button.rect = pygame.Rect(restart_x, restart_y, button_width, button_height)
-        
-        # Main Menu Button:
-        menu_y = restart_y + button_height + 10  # position below the restart button
-        if self.main_menu_button is None:
-            self.main_menu_button = Button(
-                label="Main Menu",
-                callback=self.load_main_menu
-            )
-        self.main_menu_button.rect = pygame.Rect(restart_x, menu_y, button_width, button_height)
-        
-        # Draw the buttons.
-        self.restart_button.draw(screen)
-        self.main_menu_button.draw(screen)
-        
-        # Check for button clicks.
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            if self.restart_button.rect.collidepoint(mouse_pos):
-                self.restart_button.on_click()
-            if self.main_menu_button.rect.collidepoint(mouse_pos):
-                self.main_menu_button.on_click()
-        self.mouse_down_previous = mouse_pressed
+        # Draw the buttons. Clicks are handled by the widget tree through handle_event.
+        self.end_screen_widgets.draw(screen)
 
     def restart_game(self):
         """Reset the game when the restart button is clicked"""
@@ -361,12 +298,17 @@ class SnakeGameHamiltonianPathAgentScene(Scene):
         # Recreate the Hamiltonian path for the new game state
         self.initialize_graph_and_path()
 
+    def close(self):
+        self.game.save_replay()
+
     def load_main_menu(self):
+        self.close()
         from Scenes import MainMenuScene as mm
         new_scene = mm.MainMenuScene()
         self.game_manager.changeScene(new_scene)
 
     def set_scale(self: Self, width : int):
-        global block_size 
-        block_size = (width - 20) / self.game.cols
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+        self.end_screen_widgets.invalidate_layout()
         
\ No newline at end of file
@@ -0,0 +1,211 @@
+from .Scene import Scene
+from typing import Self
+import pygame
+from Games import SnakeGameLogic
+from Games.SnakeGameLogic import DIRECTION_ACTIONS
+from Singlton import GAME_MANAGER
+from UI.Button import Button
+from UI.Layouts import hud_layout, end_screen_layout
+from UI.WidgetTree import WidgetTree
+from RenderModes.BoardRenderer import BoardRenderer
+from PerformanceHelperFunctions.Metrics import METRICS
+from SearchHelperFunctions.MonteCarloTreeSearch import MonteCarloTreeSearch
+from SearchHelperFunctions.RolloutPolicies import ROLLOUT_POLICIES
+
+class SnakeGameMCTSAgentScene(Scene):
+
+    def __init__(self, rollout_policy="greedy", time_budget=0.05, workers=0, seed=None):
+        self.speed = 10  # input processes per second
+        self.last_input_process = 0
+        rows, cols = GAME_MANAGER.board_size
+        self.game = SnakeGameLogic.SnakeGame("mcts_agent", rows, cols, seed=seed, game_map=GAME_MANAGER.game_map,
+                                             replay_directory=GAME_MANAGER.replay_directory)
+        self.game_manager = GAME_MANAGER
+        self.renderer = BoardRenderer()
+
+        # The search gets a fixed time budget per move, so its strength scales with the CPU available.
+        # Setting workers > 0 adds root-parallel worker processes.
+        self.search = MonteCarloTreeSearch(rollout_policy=rollout_policy, time_budget=time_budget, workers=workers,
+                                          seed=seed)
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.speed_decrease_button = self.hud_widgets.add(Button(
+            label="Slow",
+            callback=self.decrease_speed
+        ))
+        self.speed_increase_button = self.hud_widgets.add(Button(
+            label="Fast",
+            callback=self.increase_speed
+        ))
+        self.rollout_button = self.hud_widgets.add(Button(
+            label=f"Rollout: {rollout_policy}",
+            callback=self.cycle_rollout_policy
+        ))
+
+        # Buttons shown on the Game Over screen.
+        self.end_screen_widgets = WidgetTree(self.layout_end_screen)
+        self.restart_button = self.end_screen_widgets.add(Button(
+            label="Restart Game",
+            callback=self.restart_game
+        ))
+        self.end_main_menu_button = self.end_screen_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+
+    def collect_input(self: Self):
+        # No need to collect input as the agent controls the snake
+        pass
+
+    def process_input(self: Self, dt: float):
+        # Skip processing if already dead
+        if self.game.is_dead:
+            return
+
+        # Process input at the specified speed
+        if dt == 0:
+            self.process_game_step()
+            return
+
+        self.last_input_process += dt
+        if self.last_input_process >= 1 / self.speed:
+            self.last_input_process = 0
+            self.process_game_step()
+
+    def process_game_step(self):
+        """
+        Searches for the best move from the current position, plays it and re-roots the tree on it.
+        """
+        with METRICS.timer("mcts.decision"):
+            direction = self.search.choose_direction(self.game.state)
+        METRICS.observe("mcts.iterations", self.search.last_iterations)
+        self.game.set_action(DIRECTION_ACTIONS[direction])
+        self.game.process_action()
+        METRICS.count("game.steps")
+        self.search.advance_root(direction)
+
+    def render_scene(self: Self, screen: pygame.Surface):
+        if self.game is not None:
+            if self.game.is_dead:
+                self.end_game(screen)
+            else:
+                # Fill the background.
+                screen.fill("black")
+
+                # --- Draw the board ---
+                # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+                self.renderer.render_scene(screen, self.game)
+                board_rect = self.renderer.rect
+                game_offset_x = board_rect.left
+
+                # --- Draw a border around the grid ---
+                self.renderer.draw_border(screen)
+
+                # --- Draw the score readouts outside the grid ---
+                # Here, we choose to render the score information below the grid.
+                stats_offset_y = board_rect.bottom + 10
+                font = pygame.font.SysFont("Arial", 24)
+                score_text = font.render(f"Score: {self.game.score}", True, (255, 255, 255))
+                time_text = font.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
+                high_score_text = font.render(f"High Score: {self.game.get_high_score()}", True, (255, 255, 255))
+                iterations_text = font.render(f"Iterations/move: {self.search.last_iterations}", True, (255, 255, 255))
+
+                screen.blit(score_text, (game_offset_x, stats_offset_y))
+                screen.blit(time_text, (game_offset_x, stats_offset_y + 30))
+                screen.blit(high_score_text, (game_offset_x, stats_offset_y + 60))
+                screen.blit(iterations_text, (game_offset_x, stats_offset_y + 90))
+
+                # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+                self.hud_widgets.draw(screen)
+
+    def get_widgets(self):
+        return self.end_screen_widgets if self.game.is_dead else self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button, self.speed_decrease_button, self.speed_increase_button)
+        # The rollout policy selector sits below the score readouts.
+        self.rollout_button.rect = pygame.Rect(game_rect.left, game_rect.bottom + 130, 200, 50)
+
+    def layout_end_screen(self, screen_size):
+        end_screen_layout(screen_size, self.restart_button, self.end_main_menu_button)
+
+    def decrease_speed(self):
+        """
+        Decrease the game speed, but do not let it go below a minimum value.
+        """
+        self.speed = max(1, self.speed - 5)
+        print(f"Speed decreased to {self.speed}")
+
+    def increase_speed(self):
+        """
+        Increase the game speed.
+        """
+        self.speed = min(200, self.speed + 5)
+        print(f"Speed increased to {self.speed}")
+
+    def cycle_rollout_policy(self):
+        """Switches to the next rollout policy (random, greedy, A* guided). The search tree is discarded."""
+        names = list(ROLLOUT_POLICIES)
+        next_policy = names[(names.index(self.search.rollout_policy) + 1) % len(names)]
+        self.search.set_rollout_policy(next_policy)
+        self.rollout_button.set_label(f"Rollout: {next_policy}")
+
+    def end_game(self: Self, screen: pygame.Surface):
+        # Fill the background with a solid color.
+        screen.fill("red")
+
+        # Obtain screen dimensions.
+        screen_width, screen_height = screen.get_size()
+
+        # Display game over text and stats in the upper half of the screen.
+        font = pygame.font.SysFont("Arial", 48)
+        game_over_text = font.render("Game Over", True, (255, 255, 255))
+        font_small = pygame.font.SysFont("Arial", 24)
+        score_text = font_small.render(f"Score: {self.game.score}", True, (255, 255, 255))
+        time_text = font_small.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
+        high_score_text = font_small.render(f"High Score: {self.game.get_high_score()}", True, (255, 255, 255))
+        total_time_text = font_small.render(f"Total Time: {self.game.get_total_time():.1f}s", True, (255, 255, 255))
+
+        # Center the game over text near the top half.
+        game_over_rect = game_over_text.get_rect(center=(screen_width // 2, screen_height // 2 - 150))
+        screen.blit(game_over_text, game_over_rect)
+
+        # Place the stats below the "Game Over" text but away from the game area.
+        stats_y = game_over_rect.bottom + 10
+        screen.blit(score_text, (screen_width // 2 - score_text.get_width() // 2, stats_y))
+        screen.blit(time_text, (screen_width // 2 - time_text.get_width() // 2, stats_y + 40))
+        screen.blit(high_score_text, (screen_width // 2 - high_score_text.get_width() // 2, stats_y + 80))
+        screen.blit(total_time_text, (screen_width // 2 - total_time_text.get_width() // 2, stats_y + 120))
+
+        # Draw the buttons. Clicks are handled by the widget tree through handle_event.
+        self.end_screen_widgets.draw(screen)
+
+    def restart_game(self):
+        """Reset the game and the search tree when the restart button is clicked"""
+        self.game.reset()
+        self.search.reset()
+        self.last_input_process = 0
+
+    def close(self):
+        self.search.close()
+        self.game.save_replay()
+
+    def load_main_menu(self):
+        self.close()
+        from Scenes import MainMenuScene as mm
+        new_scene = mm.MainMenuScene()
+        self.game_manager.changeScene(new_scene)
+
+    def set_scale(self: Self, width : int):
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+        self.end_screen_widgets.invalidate_layout()
@@ -1,127 +1,279 @@
 from .Scene import Scene
+import os
+import random
 import pygame  
 from typing import Self
 import numpy as np
-from .Scene import Scene
-from Games.SnakeGameLogic import SnakeGame, InputAction, BlockState
+from Games.SnakeGameLogic import SnakeGame
+from Games.SnakeGameState import SnakeGameState
+from Games.ForwardModel import ForwardModel, DEATH_REWARD
 from Singlton import GAME_MANAGER
 from UI.Button import Button
+from UI.Layouts import hud_layout
+from UI.WidgetTree import WidgetTree
+from RenderModes.BoardRenderer import BoardRenderer
+from PerformanceHelperFunctions.Metrics import METRICS
+from ModelHelperFunctions.QTable import QTable
+from ModelHelperFunctions.StateEncoders import STATE_ENCODERS
+from ModelHelperFunctions.TabularUpdates import UPDATE_MODES, OneStepUpdate, NStepUpdate, QLambdaUpdate
+
+# The Q-table is memory-mapped from here, so learning carries over between sessions. One file per encoder.
+Q_TABLE_PATH = "./model/q_table_{encoder}.npy"
+# State encoding for the tabular agent (see ModelHelperFunctions/StateEncoders.py).
+STATE_ENCODER = "canonical"
+
+
+# Update rule for the Q-table (see ModelHelperFunctions/TabularUpdates.py) and its parameters.
+UPDATE_MODE = "lambda"
+N_STEPS = 5
+TRACE_LAMBDA = 0.8
+
+# Headless episodes the scene trains per rendered frame; the button cycles through these.
+EPISODES_PER_FRAME_OPTIONS = (0, 1, 10, 100)
+
+
+def make_update(mode: str, q_table: QTable, num_envs: int, n_steps=N_STEPS, trace_lambda=TRACE_LAMBDA):
+    """Builds the named update rule from UPDATE_MODES for num_envs lockstep environments."""
+    if mode not in UPDATE_MODES:
+        raise ValueError(f"Unknown update mode {mode!r}, expected one of {list(UPDATE_MODES)}")
+    if mode == "n-step":
+        return NStepUpdate(q_table, num_envs, n_steps)
+    if mode == "lambda":
+        return QLambdaUpdate(q_table, num_envs, trace_lambda)
+    return OneStepUpdate(q_table, num_envs)
+
+
+class TabularTrainer:
+    """
+    Trains a QTable on compact game states stepped in lockstep: actions are chosen and the table is updated
+    for all environments at once. The environments are allocated once and reset in place, so the trainer
+    can be run a few episodes at a time (for instance once per rendered frame) without allocation churn.
+
+    update_mode picks the learning rule: one-step Q-learning, n-step returns or Q(lambda). With a game_map
+    (Games.Maps.GameMap of the Q-table's board size) the environments are played on its walls.
+
+    Episodes also end, with the death reward, after a board's worth of steps without food, since a greedy
+    tabular policy can otherwise loop forever.
+    """
+
+    def __init__(self, q_table: QTable, num_envs=64, seed=None, epsilon=0.5, epsilon_decay=0.995, min_epsilon=0.01,
+                 update_mode=UPDATE_MODE, n_steps=N_STEPS, trace_lambda=TRACE_LAMBDA, game_map=None):
+        self.q_table = q_table
+        self.update = make_update(update_mode, q_table, num_envs, n_steps, trace_lambda)
+        self.epsilon = epsilon
+        self.epsilon_decay = epsilon_decay
+        self.min_epsilon = min_epsilon
+        self.rng = np.random.default_rng(seed)
+        self.model = ForwardModel(random.Random(int(self.rng.integers(2**32))))
+        walls, start_cell = (game_map.walls, game_map.start_cell) if game_map is not None else (None, -1)
+        self.envs = [SnakeGameState(q_table.rows, q_table.cols, walls, start_cell) for _ in range(num_envs)]
+        for state in self.envs:
+            state.reset()
+            state.place_food(self.model.rng)
+        self.steps_since_food = np.zeros(num_envs, dtype=np.int64)
+        self.states = np.empty(num_envs, dtype=np.int64)
+        self.symmetries = np.empty(num_envs, dtype=np.int64)
+        for index, state in enumerate(self.envs):
+            self.states[index], self.symmetries[index] = q_table.encode_state(state)
+        self.next_states = np.empty_like(self.states)
+        self.rewards = np.empty(num_envs, dtype=np.float32)
+        self.dones = np.empty(num_envs, dtype=np.float32)
+        # Statistics over every episode this trainer has finished.
+        self.episodes = 0
+        self.steps = 0
+        self.best_score = 0
+
+    def decay_epsilon(self):
+        self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay)
+
+    def run(self, n_episodes: int) -> list[int]:
+        """
+        Steps until at least n_episodes have finished and returns their scores. Episodes still in
+        progress carry over to the next call, so a few more than n_episodes may be returned.
+        """
+        q_table = self.q_table
+        envs = self.envs
+        apply = self.model.apply
+        encode_state = q_table.encode_state
+        states, next_states = self.states, self.next_states
+        symmetries = self.symmetries
+        rewards, dones = self.rewards, self.dones
+        steps_since_food = self.steps_since_food
+        scores = []
+
+        while len(scores) < n_episodes:
+            actions, greedy = q_table.select_actions(states, self.epsilon, self.rng, return_greedy=True)
+            directions = q_table.actions_to_directions(actions, symmetries).tolist()
+            for index, state in enumerate(envs):
+                rewards[index], dones[index] = apply(state, directions[index])
+                next_states[index], symmetries[index] = encode_state(state)
+            self.steps += len(envs)
+            steps_since_food += 1
+            steps_since_food[rewards > 0] = 0
+            stalled = steps_since_food > q_table.cell_count
+            rewards[stalled] = DEATH_REWARD
+            dones[stalled] = 1
+            self.update.step(states, actions, rewards, next_states, dones, greedy)
+
+            for index in np.flatnonzero(dones):
+                state = envs[index]
+                scores.append(state.score)
+                state.reset()
+                state.place_food(self.model.rng)
+                steps_since_food[index] = 0
+                next_states[index], symmetries[index] = encode_state(state)
+                self.decay_epsilon()
+            states, next_states = next_states, states
+
+        self.states, self.next_states = states, next_states
+        self.episodes += len(scores)
+        if scores:
+            self.best_score = max(self.best_score, max(scores))
+        return scores
+
+
+def train_headless(q_table: QTable, n_episodes: int, num_envs=64, seed=None, epsilon=0.5, epsilon_decay=0.995,
+                   min_epsilon=0.01, update_mode=UPDATE_MODE, n_steps=N_STEPS, trace_lambda=TRACE_LAMBDA) -> list[int]:
+    """Trains the Q-table for n_episodes without a window and returns the score of each episode."""
+    trainer = TabularTrainer(q_table, num_envs, seed, epsilon, epsilon_decay, min_epsilon, update_mode, n_steps,
+                             trace_lambda)
+    return trainer.run(n_episodes)[:n_episodes]
 
 
 class SnakeGameRLAgent(Scene):
-    def __init__(self):
-        # Initialize the Snake game
-        self.game = SnakeGame("rl_agent")
-        self.main_menu_button = None
-        self.currentScore = 0
-
-        # Q-table for storing state-action values
-        self.q_table = {}
+    def __init__(self, seed=None):
+        # Initialize the Snake game. A seed makes both the food placement and the exploration reproducible.
+        rows, cols = GAME_MANAGER.board_size
+        self.game = SnakeGame("rl_agent", rows, cols, seed=seed, game_map=GAME_MANAGER.game_map,
+                              replay_directory=GAME_MANAGER.replay_directory)
+        self.renderer = BoardRenderer()
+        self.rng = np.random.default_rng(seed)
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.episodes_per_frame = 0
+        self.training_button = self.hud_widgets.add(Button(
+            label=self.training_label(),
+            callback=self.cycle_episodes_per_frame
+        ))
+
+        # Dense Q-table of state-action values (see ModelHelperFunctions/QTable.py), picked up from the
+        # last session if one was saved for this board size.
+        self.q_table = self.load_q_table()
 
 
         # Learning parameters
-        self.learning_rate = 0.1
-        self.discount_factor = 0.9
-        self.epsilon = 0.5
-        self.epsilon_decay = 0.995
-        self.min_epsilon = 0.01
-
-
-        # Actions the agent can take
-        self.actions = [InputAction.Up, InputAction.Down, InputAction.Left, InputAction.Right]
+        self.q_table.learning_rate = 0.1
+        self.q_table.discount_factor = 0.9
+        # The headless trainer shares the Q-table and owns the exploration schedule, which the displayed
+        # game follows too.
+        self.trainer = TabularTrainer(self.q_table, seed=int(self.rng.integers(2**32)), epsilon=0.5,
+                                      epsilon_decay=0.995, min_epsilon=0.01, game_map=self.game.game_map)
+        # The displayed game learns with the same rule, as a single environment.
+        self.update = make_update(UPDATE_MODE, self.q_table, 1)
+        self.last_greedy = True
+        self.last_action = 0
 
 
         # Time tracking for limiting agent speed
         self.last_action_time = 0
 
+    def load_q_table(self) -> QTable:
+        encoder = STATE_ENCODERS[STATE_ENCODER](self.game.rows, self.game.cols)
+        self.q_table_path = Q_TABLE_PATH.format(encoder=encoder.name)
+        if os.path.exists(self.q_table_path):
+            try:
+                return QTable.load(self.q_table_path, self.game.rows, self.game.cols, encoder=encoder)
+            except ValueError as error:
+                print(f"Starting a new Q-table: {error}")
+        return QTable(self.game.rows, self.game.cols, encoder=encoder)
+
 
     def get_state(self):
         """
-        Encodes the current game state into a tuple that can be used as a key in the Q-table.
+        Encodes the current game state into a Q-table row and the symmetry that folds it onto that row.
         """
-        head_x, head_y = self.game.head_location
-        food_x, food_y = self.game.food_location
-        return (head_x, head_y, food_x, food_y)
+        return self.q_table.encode_state(self.game.state)
 
 
     def choose_action(self, state):
         """
-        Chooses an action based on the epsilon-greedy policy.
+        Chooses a table action based on the epsilon-greedy policy and returns the board direction it maps to.
         """
-        if np.random.rand() < self.epsilon:
-            # Explore: choose a random action
-            return np.random.choice(self.actions)
-        else:
-            # Exploit: choose the action with the highest Q-value
-            if state in self.q_table:
-                return max(self.q_table[state], key=self.q_table[state].get)
-            else:
-                # If the state is not in the Q-table, initialize it
-                self.q_table[state] = {action: 0 for action in self.actions}
-                return np.random.choice(self.actions)
+        row, symmetry = state
+        actions, greedy = self.q_table.select_actions(np.array([row]), self.trainer.epsilon, self.rng,
+                                                      return_greedy=True)
+        self.last_greedy = bool(greedy[0])
+        self.last_action = int(actions[0])
+        return int(self.q_table.actions_to_directions(actions, np.array([symmetry]))[0])
 
 
-    def update_q_table(self, state, action, reward, next_state):
+    def update_q_table(self, state, action, reward, next_state, done):
         """
-        Updates the Q-value for the given state-action pair using the Q-learning formula.
+        Updates the Q-values for the given transition with the configured update rule.
         """
-        if state not in self.q_table:
-            self.q_table[state] = {a: 0 for a in self.actions}
-        if next_state not in self.q_table:
-            self.q_table[next_state] = {a: 0 for a in self.actions}
-
-
-        # Q-learning formula
-        old_value = self.q_table[state][action]
-        next_max = max(self.q_table[next_state].values())
-        new_value = old_value + self.learning_rate * (reward + self.discount_factor * next_max - old_value)
-        self.q_table[state][action] = new_value
+        self.update.step(np.array([state]), np.array([action]), np.array([reward], dtype=np.float32),
+                         np.array([next_state]), np.array([done], dtype=np.float32), np.array([self.last_greedy]))
 
 
     def collect_input(self):
         """
         Collects input by choosing an action based on the current state.
         """
-        state = self.get_state()
-        action = self.choose_action(state)
-        self.game.set_action(action)
+        with METRICS.timer("rl.decision"):
+            state = self.get_state()
+            self.game.set_direction(self.choose_action(state))
 
 
     def process_input(self, dt: float):
         """
-        Processes the chosen action and updates the Q-table.
+        Processes the chosen action and updates the Q-table, after training episodes_per_frame headless
+        episodes.
         """
+        if self.episodes_per_frame:
+            steps = self.trainer.steps
+            with METRICS.timer("rl.training_batch"):
+                scores = self.trainer.run(self.episodes_per_frame)
+            METRICS.count("training.steps", self.trainer.steps - steps)
+            METRICS.count("training.episodes", len(scores))
+
         if self.game.is_dead:
-            self.game = SnakeGame("rl_agent")
-            self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay)
+            # Reuse the game so attempts, the high score and the total time keep accumulating.
+            self.game.reset()
+            self.trainer.decay_epsilon()
             return
 
 
         # Get the current state
-        state = self.get_state()
+        state, _ = self.get_state()
+        score = self.game.score
 
 
         # Perform the action
         self.game.process_action()
+        METRICS.count("game.steps")
 
 
         # Get the next state and reward
-        next_state = self.get_state()
-        reward = self.get_reward()
+        next_state, _ = self.get_state()
+        reward = self.get_reward(score)
 
 
         # Update the Q-table
-        self.update_q_table(state, self.game.action, reward, next_state)
+        self.update_q_table(state, self.last_action, reward, next_state, self.game.is_dead)
 
 
-    def get_reward(self):
+    def get_reward(self, previous_score):
         """
-        Calculates the reward for the current state.
+        Calculates the reward for the step that started at previous_score.
         """
         if self.game.is_dead:
             return -10  # Negative reward for dying
-        elif self.game.score > self.currentScore:
-            self.currentScore = self.game.score
+        elif self.game.score > previous_score:
             return 10  # Positive reward for eating food
         else:
             return 0  # Small negative reward for each step to encourage faster solutions
@@ -133,67 +285,33 @@ class SnakeGameRLAgent(Scene):
                 # Fill the background.
                 screen.fill("black")
                 
-                # --- Define the grid drawing area ---
-                # These offsets ensure that the grid is not drawn at the very edge,
-                # leaving room for a border and score readouts.
-                game_offset_x = 10
-                game_offset_y = 10
-                game_width = self.game.cols * block_size
-                game_height = self.game.rows * block_size
-                
-                # --- Draw the grid blocks ---
-                # Adjust each block's position based on the game area offsets.
-                for x, row in enumerate(self.game.state_arr):
-                    for y, block in enumerate(row):
-                        rect = pygame.Rect(
-                            game_offset_x + y * block_size,
-                            game_offset_y + x * block_size,
-                            block_size,
-                            block_size
-                        )
-                        if block == BlockState.Snake:
-                            pygame.draw.rect(screen, "white", rect, 0, 3)
-                        elif block == BlockState.Food:
-                            pygame.draw.rect(screen, "red", rect, 0, 3)
-                        elif block == BlockState.Obsticle:
-                            pygame.draw.rect(screen, "green", rect, 0, 3)
+                # --- Draw the board ---
+                # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+                self.renderer.render_scene(screen, self.game)
+                board_rect = self.renderer.rect
+                game_offset_x = board_rect.left
                 
                 # --- Draw a border around the grid ---
-                # The border is drawn with a padding so it doesn't overlap the grid blocks.
-                border_padding = 5  # adjust as needed
-                border_rect = pygame.Rect(
-                    game_offset_x - border_padding,
-                    game_offset_y - border_padding,
-                    game_width + 2 * border_padding,
-                    game_height + 2 * border_padding
-                )
-                pygame.draw.rect(screen, "white", border_rect, 3)
+                self.renderer.draw_border(screen)
                 
                 # --- Draw the score readouts outside the grid ---
                 # Here, we choose to render the score information below the grid.
-                stats_offset_y = game_offset_y + game_height + 10
+                stats_offset_y = board_rect.bottom + 10
                 font = pygame.font.SysFont("Arial", 24)
                 score_text = font.render(f"Score: {self.game.score}", True, (255, 255, 255))
                 time_text = font.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
                 high_score_text = font.render(f"High Score: {self.game.get_high_score()}", True, (255, 255, 255))
+                training_text = font.render(
+                    f"Trained episodes: {self.trainer.episodes}  Best: {self.trainer.best_score}  "
+                    f"Epsilon: {self.trainer.epsilon:.3f}", True, (255, 255, 255))
                 
                 screen.blit(score_text, (game_offset_x, stats_offset_y))
                 screen.blit(time_text, (game_offset_x, stats_offset_y + 30))
                 screen.blit(high_score_text, (game_offset_x, stats_offset_y + 60))
+                screen.blit(training_text, (game_offset_x, stats_offset_y + 90))
 
-                button_width = 200
-                button_height = 50
-                menu_x = game_offset_x + game_width - button_width
-                menu_y = game_offset_y + game_height + 10
-                menu_y = stats_offset_y
-                if self.main_menu_button is None:
-                    self.main_menu_button = Button(
-                        label="Main Menu",
-                        callback=self.load_main_menu
-                    )
-                #self.main_menu_button.rect = pygame.Rect(game_width - game_offset_x, menu_y, button_width, button_height)
-                self.main_menu_button.rect = pygame.Rect(menu_x, menu_y, button_width, button_height)
-                self.main_menu_button.draw(screen)
+                # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+                self.hud_widgets.draw(screen)
 
 
 
@@ -201,10 +319,36 @@ class SnakeGameRLAgent(Scene):
         """
         Sets the scale of the game grid.
         """
-        global block_size
-        block_size = (width - 20) / self.game.cols
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+
+    def get_widgets(self):
+        return self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button)
+        # The training speed selector sits below the score readouts.
+        self.training_button.rect = pygame.Rect(game_rect.left, game_rect.bottom + 130, 200, 50)
+
+    def training_label(self):
+        return f"Train: {self.episodes_per_frame}/frame"
+
+    def cycle_episodes_per_frame(self):
+        """Switches how many headless episodes are trained per rendered frame."""
+        options = EPISODES_PER_FRAME_OPTIONS
+        self.episodes_per_frame = options[(options.index(self.episodes_per_frame) + 1) % len(options)]
+        self.training_button.set_label(self.training_label())
+
+    def close(self):
+        self.game.save_replay()
 
     def load_main_menu(self):
+        self.close()
+        self.q_table.save(self.q_table_path)
         from Scenes import MainMenuScene as mm
         new_scene = mm.MainMenuScene()
-        self.game_manager.changeScene(new_scene)
\ No newline at end of file
+        GAME_MANAGER.changeScene(new_scene)
\ No newline at end of file
@@ -2,104 +2,102 @@ from .Scene import Scene
 import pygame
 from typing import Self
 import numpy as np
-from Games.SnakeGameLogic import SnakeGame, InputAction, BlockState
+from Games.SnakeGameLogic import SnakeGame, DEFAULT_ROWS, DEFAULT_COLS
+from Games.SnakeGameEnv import SnakeGameEnv
 from Singlton import GAME_MANAGER
 from UI.Button import Button
+from UI.Layouts import hud_layout
+from UI.WidgetTree import WidgetTree
+from RenderModes.BoardRenderer import BoardRenderer
+from PerformanceHelperFunctions.Metrics import METRICS
 
 import torch
 import random
-from collections import deque
 
 # Import your model and trainer.
 from ModelHelperFunctions.QTrainer import Linear_QNet, QTrainer
+from ModelHelperFunctions.ConvQNet import Conv_QNet
+from ModelHelperFunctions.InferenceEngine import QNetInferenceEngine
+from ModelHelperFunctions.ReplayBuffer import ReplayBuffer
+from ModelHelperFunctions.Checkpoint import CheckpointManager, checkpoint_directory
 from PlotHelperFunctions.LineGraph import plot
 
 # Hyperparameters for DQN.
 MAX_MEMORY = 100_000
+# Board planes are much larger than the 11 features, so the conv network keeps a shorter replay memory
+# and trains on smaller batches (a 1000-sample conv update costs ~100ms on one CPU core).
+CONV_MAX_MEMORY = 20_000
+CONV_BATCH_SIZE = 128
 BATCH_SIZE = 1000
 LR = 0.001
-
-# Global block size; set by set_scale.
-block_size = 0
+# Target network: either sync every TARGET_UPDATE train steps (0 disables) or Polyak-average with TAU (None disables).
+# Both are off by default, which keeps the original bootstrapping from the online model.
+TARGET_UPDATE = 0
+TAU = None
+DOUBLE_DQN = False
+# CPU training speed (see QTrainer and ModelHelperFunctions/TrainerBenchmark.py). None keeps PyTorch's defaults.
+NUM_THREADS = None
+COMPILE_MODE = None
+# Games between resumable checkpoints (see CheckpointManager).
+CHECKPOINT_EVERY = 50
 
 ###############################################################################
 # Deep RL Agent using a Deep Q-Network
 ###############################################################################
 class DeepRLAgent:
-    def __init__(self):
+    def __init__(self, seed=None, target_update=TARGET_UPDATE, tau=TAU, double_dqn=DOUBLE_DQN, network="linear",
+                 rows=DEFAULT_ROWS, cols=DEFAULT_COLS, num_threads=NUM_THREADS, compile_mode=COMPILE_MODE):
+        """
+        :param network: "linear" for the small network over the 11 hand-crafted features, or "conv" for
+                        Conv_QNet over the whole board as channel planes (rows and cols give the board size).
+        """
+        # Exploration and replay sampling use their own RNG stream; a seed also fixes the initial weights.
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        if seed is not None:
+            torch.manual_seed(seed)
         self.n_games = 0
+        self.n_steps = 0
         self.epsilon = 0   # randomness factor (will decay with games)
         self.gamma = 0.9   # discount rate
-        self.memory = deque(maxlen=MAX_MEMORY)  # stores past experiences
-        # Input size of 11 (see get_state below), one hidden layer of 256 units, output size 3.
-        self.model = Linear_QNet(11, 256, 3)
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
+        self.network = network
+        if network == "conv":
+            # Blocked, head, food and direction planes (see SnakeGameEnv.board_planes). They are 0/1 valued,
+            # so the replay memory stores them as bytes.
+            self.observation_type = "planes"
+            self.state_shape = (4, rows, cols)
+            self.model = Conv_QNet(4, rows, cols, 3)
+            self.memory = ReplayBuffer(CONV_MAX_MEMORY, self.state_shape, np.uint8)
+            self.batch_size = CONV_BATCH_SIZE
+        else:
+            # Input size of 11 (see get_state below), one hidden layer of 256 units, output size 3.
+            self.observation_type = "features"
+            self.state_shape = (11,)
+            self.model = Linear_QNet(11, 256, 3)
+            self.memory = ReplayBuffer(MAX_MEMORY, self.state_shape)  # stores past experiences
+            self.batch_size = BATCH_SIZE
+        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma, target_update=target_update, tau=tau,
+                                double_dqn=double_dqn, num_threads=num_threads, compile_mode=compile_mode)
+        # Action selection runs without autograd. For the linear network it goes through a NumPy forward pass
+        # sharing the model's weights.
+        self.inference = QNetInferenceEngine(self.model, input_shape=self.state_shape)
 
-    def get_state(self, game: SnakeGame):
+    def get_state(self, env: SnakeGameEnv):
         """
-        Returns an 11-dimensional state representation.
-        Assumes a fixed block size of 20 for positional offsets.
+        Returns the state representation for this agent's network (see SnakeGameEnv.observation): either
+        the 11 features (danger straight/right/left, current direction, and food location relative to the
+        head) or the board planes.
         """
-        head = game.snake[0]
-        # These points are offset by 20 (i.e. one block) in each direction.
-        point_l = (head[0] - 20, head[1])
-        point_r = (head[0] + 20, head[1])
-        point_u = (head[0], head[1] - 20)
-        point_d = (head[0], head[1] + 20)
-        
-        # Check current movement direction.
-        dir_l = game.direction == InputAction.Left
-        dir_r = game.direction == InputAction.Right
-        dir_u = game.direction == InputAction.Up
-        dir_d = game.direction == InputAction.Down
-        
-        state = [
-            # Danger straight: if going right, check right; if left, check left; etc.
-            (dir_r and game.is_collision(point_r)) or 
-            (dir_l and game.is_collision(point_l)) or 
-            (dir_u and game.is_collision(point_u)) or 
-            (dir_d and game.is_collision(point_d)),
-
-            # Danger right: assume turning right relative to current direction.
-            (dir_u and game.is_collision(point_r)) or 
-            (dir_d and game.is_collision(point_l)) or 
-            (dir_l and game.is_collision(point_u)) or 
-            (dir_r and game.is_collision(point_d)),
-
-            # Danger left: assume turning left relative to current direction.
-            (dir_d and game.is_collision(point_r)) or 
-            (dir_u and game.is_collision(point_l)) or 
-            (dir_r and game.is_collision(point_u)) or 
-            (dir_l and game.is_collision(point_d)),
-            
-            # Current move direction.
-            dir_l,
-            dir_r,
-            dir_u,
-            dir_d,
-            
-            # Food location relative to head.
-            game.food[0] < head[0],  # food to the left
-            game.food[0] > head[0],  # food to the right
-            game.food[1] < head[1],  # food above
-            game.food[1] > head[1]   # food below
-        ]
-        
-        return np.array(state, dtype=int)
+        return env.observation()
 
     def remember(self, state, action, reward, next_state, done):
-        """Stores the experience in memory."""
-        self.memory.append((state, action, reward, next_state, done))
+        """Stores the experience in memory. The action is one-hot encoded."""
+        self.memory.push(state, int(np.argmax(action)), reward, next_state, done)
 
     def train_long_memory(self):
         """Train on a batch from the memory."""
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)  # random batch
-        else:
-            mini_sample = self.memory
-        
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, dones)
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size, self.np_rng)
+        self.trainer.train_batch(states, actions, rewards, next_states, dones)
 
     def train_short_memory(self, state, action, reward, next_state, done):
         """Train on a single step (short term memory)."""
@@ -110,55 +108,155 @@ class DeepRLAgent:
         # Adjust epsilon to promote exploration early on.
         self.epsilon = 80 - self.n_games
         final_move = [0, 0, 0]
-        if random.randint(0, 200) < self.epsilon:
-            move = random.randint(0, 2)
+        if self.rng.randint(0, 200) < self.epsilon:
+            move = self.rng.randint(0, 2)
             final_move[move] = 1
         else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
+            move = self.inference.best_action(state)
             final_move[move] = 1
 
         return final_move
 
+    def get_actions(self, states: np.ndarray) -> np.ndarray:
+        """Batched get_action for many environments at once. Returns relative action indices."""
+        self.epsilon = 80 - self.n_games
+        return self.inference.select_actions(states, max(self.epsilon, 0) / 201, self.np_rng)
+
+def play_training_step(agent: DeepRLAgent, env: SnakeGameEnv):
+    """
+    Plays and learns from one step. When the episode ends, the environment is reset, the agent trains on
+    its long-term memory and the final score is returned; otherwise returns None.
+    """
+    # Get the current state from the game.
+    with METRICS.timer("deep_rl.decision"):
+        state_old = agent.get_state(env)
+        # Choose an action (a one-hot encoded vector of length 3).
+        final_move = agent.get_action(state_old)
+    # Play one step of the game; obtain the new state, reward, done flag and score.
+    state_new, reward, done, info = env.step(final_move)
+    agent.n_steps += 1
+    METRICS.count("game.steps")
+    # Train on this individual step.
+    with METRICS.timer("deep_rl.train_short"):
+        agent.train_short_memory(state_old, final_move, reward, state_new, done)
+    METRICS.count("training.steps")
+    # Remember the experience.
+    agent.remember(state_old, final_move, reward, state_new, done)
+
+    if not done:
+        return None
+    # Game over: reset the game and train on long memory.
+    env.reset()
+    agent.n_games += 1
+    with METRICS.timer("deep_rl.train_long"):
+        agent.train_long_memory()
+    return info["score"]
+
+def play_training_steps(agent: DeepRLAgent, envs: list, states: np.ndarray) -> tuple[np.ndarray, list[int]]:
+    """
+    Batched play_training_step over several environments: actions are selected in one forward pass and the
+    short-memory update is a single batch. Returns the next states and the scores of episodes that ended.
+    """
+    actions = agent.get_actions(states)
+    next_states = np.empty_like(states)
+    rewards = np.empty(len(envs), dtype=np.float32)
+    dones = np.empty(len(envs), dtype=np.float32)
+    scores = []
+    for index, env in enumerate(envs):
+        next_states[index], rewards[index], dones[index], info = env.step(int(actions[index]))
+    agent.n_steps += len(envs)
+    agent.trainer.train_batch(states, actions, rewards, next_states, dones)
+    agent.memory.push_batch(states, actions, rewards, next_states, dones)
+    for index, env in enumerate(envs):
+        if dones[index]:
+            scores.append(env.game.score)
+            next_states[index] = env.reset()
+            agent.n_games += 1
+            agent.train_long_memory()
+    return next_states, scores
+
+def record_checkpoints(agent: DeepRLAgent, checkpoints: CheckpointManager, scores: list[int],
+                       checkpoint_every=CHECKPOINT_EVERY):
+    """Queues best checkpoints for the given finished-game scores, and a latest one every checkpoint_every games."""
+    for score in scores:
+        checkpoints.save_best(agent, score)
+    if scores and agent.n_games // checkpoint_every > (agent.n_games - len(scores)) // checkpoint_every:
+        checkpoints.save_latest(agent)
+
+def train_headless(agent: DeepRLAgent, n_games: int, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, seed=None, num_envs=1,
+                   checkpoints: CheckpointManager = None) -> list[int]:
+    """
+    Trains the agent for n_games episodes without a window and returns the score of each game.
+    With num_envs > 1, that many environments are stepped in lockstep with batched action selection.
+    With a CheckpointManager, best and periodic latest checkpoints are saved in the background.
+    """
+    if num_envs == 1:
+        env = SnakeGameEnv(rows=rows, cols=cols, seed=seed, observation_type=agent.observation_type)
+        scores = []
+        while len(scores) < n_games:
+            score = play_training_step(agent, env)
+            if score is not None:
+                scores.append(score)
+                if checkpoints is not None:
+                    record_checkpoints(agent, checkpoints, [score])
+        return scores
+
+    seeds = np.random.default_rng(seed).integers(2**32, size=num_envs)
+    envs = [SnakeGameEnv(rows=rows, cols=cols, seed=int(env_seed), observation_type=agent.observation_type)
+            for env_seed in seeds]
+    states = np.stack([env.observation() for env in envs])
+    scores = []
+    while len(scores) < n_games:
+        states, finished = play_training_steps(agent, envs, states)
+        scores.extend(finished)
+        if checkpoints is not None:
+            record_checkpoints(agent, checkpoints, finished)
+    return scores[:n_games]
+
 ###############################################################################
 # Scene for the Deep RL Agent
 ###############################################################################
 class SnakeGameRLAgent(Scene):
-    def __init__(self):
-        # Initialize the Deep RL agent and the game.
-        self.agent = DeepRLAgent()
-        self.game = SnakeGame("rl_agent")
-        self.main_menu_button = None
-        self.mouse_down_previous = False
+    def __init__(self, seed=None, network="linear", resume=True):
+        # Initialize the Deep RL agent and the game. A seed makes the whole run reproducible.
+        rows, cols = GAME_MANAGER.board_size
+        self.game = SnakeGame("rl_agent", rows, cols, seed=seed, game_map=GAME_MANAGER.game_map,
+                              replay_directory=GAME_MANAGER.replay_directory)
+        self.renderer = BoardRenderer()
+        self.agent = DeepRLAgent(seed, network=network, rows=self.game.rows, cols=self.game.cols)
+        self.env = SnakeGameEnv(self.game, observation_type=self.agent.observation_type)
+
+        # Training picks up from the latest checkpoint, if there is one for this network and board size.
+        self.checkpoints = CheckpointManager(checkpoint_directory(network, self.game.rows, self.game.cols))
+        try:
+            if resume and self.checkpoints.resume(self.agent):
+                print(f"Resumed training from game {self.agent.n_games}")
+        except ValueError as error:
+            print(f"Starting a new model: {error}")
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
         self.currentScore = 0
         self.last_input_process = 0
         self.speed = 30  # update frequency in seconds (steps per second)
 
     def process_game_step(self):
-        # Get the current state from the game.
-        state_old = self.agent.get_state(self.game)
-        # Choose an action (a one-hot encoded vector of length 3).
-        final_move = self.agent.get_action(state_old)
-        # Play one step of the game; obtain reward, done flag, and score.
-        reward, done, score = self.game.play_step(final_move)
-        state_new = self.agent.get_state(self.game)
-        # Train on this individual step.
-        self.agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        # Remember the experience.
-        self.agent.remember(state_old, final_move, reward, state_new, done)
-
-        if done:
-            # Game over: reset the game and train on long memory.
-            self.game.reset()
-            self.agent.n_games += 1
-            self.agent.train_long_memory()
+        score = play_training_step(self.agent, self.env)
+        if score is not None:
             if score > self.currentScore:
                 self.currentScore = score
-                # Optionally save the model:
-                self.agent.model.save()
+            # Checkpoints are written in the background, so saving never stalls the game loop.
+            record_checkpoints(self.agent, self.checkpoints, [score])
             print(f'Game {self.agent.n_games} Score {score}')
 
+    def collect_input(self):
+        # The agent picks its move inside process_game_step.
+        pass
+
     def process_input(self, dt: float):
         if self.game.is_dead:
             self.game.reset()
@@ -173,53 +271,21 @@ class SnakeGameRLAgent(Scene):
             self.last_input_process = 0
             self.process_game_step()
 
-        # Check for button clicks (e.g. Main Menu).
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed and not self.mouse_down_previous:
-            mouse_pos = pygame.mouse.get_pos()
-            if (self.main_menu_button is not None and 
-                self.main_menu_button.rect.collidepoint(mouse_pos)):
-                self.main_menu_button.on_click()
-        self.mouse_down_previous = mouse_pressed
-
     def render_scene(self, screen: pygame.Surface):
         # Clear the screen.
         screen.fill("black")
         
-        # --- Define grid drawing area ---
-        game_offset_x = 10
-        game_offset_y = 10
-        game_width = self.game.cols * block_size
-        game_height = self.game.rows * block_size
-
-        # --- Draw game grid ---
-        for x, row in enumerate(self.game.state_arr):
-            for y, block in enumerate(row):
-                rect = pygame.Rect(
-                    game_offset_x + y * block_size,
-                    game_offset_y + x * block_size,
-                    block_size,
-                    block_size
-                )
-                if block == BlockState.Snake:
-                    pygame.draw.rect(screen, "white", rect, 0, 3)
-                elif block == BlockState.Food:
-                    pygame.draw.rect(screen, "red", rect, 0, 3)
-                elif block == BlockState.Obsticle:
-                    pygame.draw.rect(screen, "green", rect, 0, 3)
+        # --- Draw the board ---
+        # Only the cells that changed since the last frame are redrawn, and only inside the viewport.
+        self.renderer.render_scene(screen, self.game)
+        board_rect = self.renderer.rect
+        game_offset_x = board_rect.left
         
         # --- Draw border around grid ---
-        border_padding = 5
-        border_rect = pygame.Rect(
-            game_offset_x - border_padding,
-            game_offset_y - border_padding,
-            game_width + 2 * border_padding,
-            game_height + 2 * border_padding
-        )
-        pygame.draw.rect(screen, "white", border_rect, 3)
+        self.renderer.draw_border(screen)
 
         # --- Draw game stats below the grid ---
-        stats_offset_y = game_offset_y + game_height + 10
+        stats_offset_y = board_rect.bottom + 10
         font = pygame.font.SysFont("Arial", 24)
         score_text = font.render(f"Score: {self.game.score}", True, (255, 255, 255))
         time_text = font.render(f"Time: {self.game.get_elapsed_time():.1f}s", True, (255, 255, 255))
@@ -229,20 +295,31 @@ class SnakeGameRLAgent(Scene):
         screen.blit(high_score_text, (game_offset_x, stats_offset_y + 60))
         
         # --- Draw the Main Menu Button ---
-        button_width = 200
-        button_height = 50
-        menu_x = game_offset_x + game_width - button_width
-        menu_y = stats_offset_y
-        if self.main_menu_button is None:
-            self.main_menu_button = Button(label="Main Menu", callback=self.load_main_menu)
-        self.main_menu_button.rect = pygame.Rect(menu_x, menu_y, button_width, button_height)
-        self.main_menu_button.draw(screen)
+        # Clicks are handled by the widget tree through handle_event.
+        self.hud_widgets.draw(screen)
 
     def set_scale(self, width: int):
-        global block_size
-        block_size = (width - 20) / self.game.cols
+        self.renderer.set_scale(width, self.game)
+        self.hud_widgets.invalidate_layout()
+
+    def get_widgets(self):
+        return self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer
+
+    def layout_hud(self, screen_size):
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button)
+
+    def close(self):
+        # Called when the window closes too, so training since the last periodic checkpoint isn't lost.
+        self.game.save_replay()
+        self.checkpoints.save_latest(self.agent)
+        self.checkpoints.close()
 
     def load_main_menu(self):
+        self.close()
         from Scenes import MainMenuScene as mm
         new_scene = mm.MainMenuScene()
         GAME_MANAGER.changeScene(new_scene)
@@ -0,0 +1,285 @@
+from .Scene import Scene
+from typing import Self
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from Games.EpisodeRecord import EpisodeRecord, REPLAY_EXTENSION, replay_files
+from Games.ReplayPlayer import ReplayPlayer
+from Singlton import GAME_MANAGER
+from UI.Button import Button
+from UI.Layouts import hud_layout
+from UI.WidgetTree import WidgetTree
+from PerformanceHelperFunctions.Metrics import METRICS
+from RenderModes.BoardRenderer import BoardRenderer
+
+# Playback speeds in moves per second, stepped through by the Slow and Fast buttons (and Down and Up keys).
+REPLAY_SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000)
+# Moves skipped by Left and Right with Shift held; without it they step one move.
+SKIP_MOVES = 100
+
+SCRUB_BAR_HEIGHT = 14
+SCRUB_COLOR = (90, 90, 90)
+SCRUB_PROGRESS_COLOR = (0, 160, 255)
+
+
+class SnakeGameReplayScene(Scene):
+    """
+    Plays back recorded episodes (.replay files, see Games.EpisodeRecord) at any speed, without running their
+    agent. The bar below the board seeks: click or drag it. Space pauses, Left and Right step a move (Shift:
+    SKIP_MOVES moves), Up and Down change the speed. Next opens the next older recording, and Export renders
+    the open one to a GIF in EXPORT_DIRECTORY on a background thread while playback goes on.
+    """
+
+    def __init__(self, path: str = None):
+        self.files = replay_files()
+        if path is not None and path not in self.files:
+            self.files.insert(0, path)
+        self.file_index = self.files.index(path) if path is not None else 0
+        self.speed_index = REPLAY_SPEEDS.index(10)
+        self.playing = True
+        self.position = 0.0  # Fractional move, advanced by speed * dt.
+        self.scrubbing = False
+        self.scrub_rect = pygame.Rect(0, 0, 0, 0)
+        self.player = None
+        self.record = None
+        self.export_executor = None
+        self.export_future = None
+        self.export_path = None
+        self.export_message = ""
+        self.message = "No replays recorded yet: turn Record on in the main menu or run with --record."
+        self.game_manager = GAME_MANAGER
+        self.renderer = BoardRenderer()
+
+        # In-game buttons. Their layout is cached until the window is resized.
+        self.hud_widgets = WidgetTree(self.layout_hud)
+        self.main_menu_button = self.hud_widgets.add(Button(
+            label="Main Menu",
+            callback=self.load_main_menu
+        ))
+        self.speed_decrease_button = self.hud_widgets.add(Button(
+            label="Slow",
+            callback=self.decrease_speed
+        ))
+        self.speed_increase_button = self.hud_widgets.add(Button(
+            label="Fast",
+            callback=self.increase_speed
+        ))
+        self.pause_button = self.hud_widgets.add(Button(
+            label="Pause",
+            callback=self.toggle_pause
+        ))
+        self.next_button = self.hud_widgets.add(Button(
+            label="Next",
+            callback=self.next_replay
+        ))
+        self.export_button = self.hud_widgets.add(Button(
+            label="Export",
+            callback=self.export_gif
+        ))
+
+        if self.files:
+            self.open_replay(self.files[self.file_index])
+
+    def open_replay(self: Self, path: str):
+        try:
+            self.record = EpisodeRecord.load(path)
+            self.player = ReplayPlayer(self.record)
+        except (OSError, ValueError) as error:
+            self.record = None
+            self.player = None
+            self.message = f"Can't play {os.path.basename(path)}: {error}"
+            print(self.message)
+        self.position = 0.0
+        # Fit the new board, which may differ in size from the last one.
+        self.set_scale(self.game_manager.screen_width)
+
+    def collect_input(self: Self):
+        # Playback controls arrive through handle_event.
+        pass
+
+    def handle_event(self: Self, event) -> bool:
+        if self.player is not None:
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and \
+                    self.scrub_rect.collidepoint(event.pos):
+                self.scrubbing = True
+                self.scrub_to(event.pos[0])
+                return True
+            if event.type == pygame.MOUSEMOTION and self.scrubbing:
+                self.scrub_to(event.pos[0])
+                return True
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.scrubbing:
+                self.scrubbing = False
+                return True
+            if event.type == pygame.KEYDOWN:
+                skip = SKIP_MOVES if event.mod & pygame.KMOD_SHIFT else 1
+                if event.key == pygame.K_SPACE:
+                    self.toggle_pause()
+                    return True
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    self.set_playing(False)
+                    self.seek(self.player.step + (skip if event.key == pygame.K_RIGHT else -skip))
+                    return True
+                if event.key == pygame.K_UP:
+                    self.increase_speed()
+                    return True
+                if event.key == pygame.K_DOWN:
+                    self.decrease_speed()
+                    return True
+        return super().handle_event(event)
+
+    def process_input(self: Self, dt: float):
+        if self.player is None or not self.playing or self.scrubbing or self.player.is_finished:
+            return
+        # Headless runs (dt == 0) play one move per frame.
+        self.position = self.position + 1 if dt == 0 else self.position + dt * REPLAY_SPEEDS[self.speed_index]
+        with METRICS.timer("replay.advance"):
+            played = self.player.advance(int(self.position) - self.player.step)
+        if played:
+            METRICS.count("game.steps", played)
+        if self.player.is_finished:
+            self.position = self.player.step
+
+    def seek(self: Self, step: int):
+        with METRICS.timer("replay.seek"):
+            self.player.seek(step)
+        self.position = self.player.step
+
+    def scrub_to(self: Self, x: int):
+        fraction = min(max((x - self.scrub_rect.left) / max(self.scrub_rect.width, 1), 0.0), 1.0)
+        self.seek(round(fraction * self.player.length))
+
+    def render_scene(self: Self, screen: pygame.Surface):
+        self.poll_export()
+        screen.fill("black")
+        font = pygame.font.SysFont("Arial", 24)
+        if self.player is None:
+            screen.blit(font.render(self.message, True, (255, 255, 255)), (10, 10))
+            self.hud_widgets.update_layout(screen)
+            self.main_menu_button.draw(screen)
+            if len(self.files) > 1:
+                self.next_button.draw(screen)
+            return
+
+        # Only the cells that changed since the last frame are redrawn, and only inside the viewport; a seek
+        # redraws the whole view.
+        self.renderer.render_scene(screen, self.player)
+        board_rect = self.renderer.rect
+        self.renderer.draw_border(screen)
+
+        # The scrub bar, filled up to the current move.
+        pygame.draw.rect(screen, SCRUB_COLOR, self.scrub_rect)
+        progress = self.scrub_rect.copy()
+        progress.width = int(self.scrub_rect.width * self.player.step / max(self.player.length, 1))
+        pygame.draw.rect(screen, SCRUB_PROGRESS_COLOR, progress)
+
+        stats_offset_y = self.scrub_rect.bottom + 8
+        name = os.path.basename(self.files[self.file_index])
+        status = "end" if self.player.is_finished else ("playing" if self.playing else "paused")
+        lines = (f"{name}",
+                 f"Move {self.player.step} / {self.player.length} ({status})",
+                 f"Score: {self.player.score}   Speed: {REPLAY_SPEEDS[self.speed_index]}/s")
+        for i, line in enumerate(lines):
+            screen.blit(font.render(line, True, (255, 255, 255)), (board_rect.left, stats_offset_y + 28 * i))
+        # The state of the last export, under the buttons.
+        if self.export_message:
+            screen.blit(font.render(self.export_message, True, (255, 255, 255)),
+                        (board_rect.left, self.export_button.rect.bottom + 8))
+
+        # Draw the in-game buttons. Clicks are handled by the widget tree through handle_event.
+        self.hud_widgets.draw(screen)
+
+    def get_widgets(self):
+        return self.hud_widgets
+
+    def get_renderer(self):
+        return self.renderer if self.player is not None else None
+
+    def layout_hud(self, screen_size):
+        if self.player is None:
+            # Only the message, Main Menu and Next are shown.
+            self.main_menu_button.rect = pygame.Rect(10, 50, 200, 50)
+            self.next_button.rect = pygame.Rect(220, 50, 95, 50) if len(self.files) > 1 else pygame.Rect(0, 0, 0, 0)
+            for button in (self.speed_decrease_button, self.speed_increase_button, self.pause_button,
+                           self.export_button):
+                button.rect = pygame.Rect(0, 0, 0, 0)
+            return
+        game_rect = self.renderer.rect
+        hud_layout(game_rect, self.main_menu_button, self.speed_decrease_button, self.speed_increase_button)
+        # The scrub bar runs along the bottom of the board up to the buttons; Pause, Next and Export sit below
+        # the readouts.
+        self.scrub_rect = pygame.Rect(game_rect.left, game_rect.bottom + 10,
+                                      max(self.main_menu_button.rect.left - game_rect.left - 20, 50),
+                                      SCRUB_BAR_HEIGHT)
+        self.pause_button.rect = pygame.Rect(game_rect.left, game_rect.bottom + 130, 95, 50)
+        self.next_button.rect = pygame.Rect(game_rect.left + 105, game_rect.bottom + 130, 95, 50)
+        self.export_button.rect = pygame.Rect(game_rect.left + 210, game_rect.bottom + 130, 95, 50)
+
+    def set_playing(self: Self, playing: bool):
+        self.playing = playing
+        self.pause_button.set_label("Pause" if playing else "Play")
+
+    def toggle_pause(self):
+        if self.player is not None and self.player.is_finished:
+            # Play again from the start.
+            self.seek(0)
+            self.set_playing(True)
+            return
+        self.set_playing(not self.playing)
+
+    def decrease_speed(self):
+        self.speed_index = max(0, self.speed_index - 1)
+
+    def increase_speed(self):
+        self.speed_index = min(len(REPLAY_SPEEDS) - 1, self.speed_index + 1)
+
+    def next_replay(self):
+        """Opens the next older recording, wrapping around to the newest."""
+        if not self.files:
+            return
+        self.file_index = (self.file_index + 1) % len(self.files)
+        self.open_replay(self.files[self.file_index])
+        self.set_playing(True)
+
+    def export_gif(self):
+        """Starts exporting the open recording, unless an export is still running."""
+        if self.record is None or self.export_future is not None:
+            return
+        from RenderModes.FrameExporter import EXPORT_DIRECTORY, export_replay
+
+        if self.export_executor is None:
+            self.export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay-export")
+        name = os.path.basename(self.files[self.file_index])
+        if name.endswith(REPLAY_EXTENSION):
+            name = name[:-len(REPLAY_EXTENSION)]
+        self.export_path = os.path.join(EXPORT_DIRECTORY, f"{name}.gif")
+        self.export_future = self.export_executor.submit(export_replay, self.record, self.export_path)
+        self.export_button.set_label("Exporting")
+        self.export_message = f"Exporting to {self.export_path}"
+
+    def poll_export(self: Self):
+        if self.export_future is None or not self.export_future.done():
+            return
+        try:
+            self.export_message = f"Exported {self.export_future.result()} frames to {self.export_path}"
+        except (ImportError, OSError, ValueError) as error:
+            self.export_message = f"Export failed: {error}"
+        print(self.export_message)
+        self.export_future = None
+        self.export_button.set_label("Export")
+
+    def close(self):
+        # Let a running export finish its file.
+        if self.export_executor is not None:
+            self.export_executor.shutdown(wait=True)
+            self.export_executor = None
+
+    def load_main_menu(self):
+        self.close()
+        from Scenes import MainMenuScene as mm
+        new_scene = mm.MainMenuScene()
+        self.game_manager.changeScene(new_scene)
+
+    def set_scale(self: Self, width: int):
+        if self.player is not None:
+            self.renderer.set_scale(width, self.player)
+        self.hud_widgets.invalidate_layout()
@@ -0,0 +1,67 @@
+import heapq
+from Games.SnakeGameState import SnakeGameState, CELL_SNAKE, CELL_OBSTICLE
+from SearchHelperFunctions.Landmarks import landmarks_for
+
+def find_path(state: SnakeGameState, start: int, goal: int, max_expansions: int = -1) -> list[int]:
+    """
+    A* search over a compact game state using flat cell indices and a Manhattan heuristic, or on a board
+    with walls the tighter landmark heuristic of its map (see SearchHelperFunctions.Landmarks).
+
+    Returns the list of cells leading from start to goal (excluding start), or an empty list if the goal
+    can't be reached. Snake and obstacle cells are impassable, except for the goal itself, so the
+    search can also be used to chase the tail. max_expansions bounds the work for use inside rollouts.
+    """
+    if start == goal:
+        return []
+    cols = state.cols
+    cells = state.cells
+    neighbors = state.neighbors
+    goal_row, goal_col = divmod(goal, cols)
+    estimate = landmarks_for(state).estimator(goal) if state.walls is not None else None
+
+    came_from = {start: -1}
+    cost_so_far = {start: 0}
+    frontier = [(0, start)]
+    expansions = 0
+    while frontier:
+        current = heapq.heappop(frontier)[1]
+        if current == goal:
+            break
+        expansions += 1
+        if expansions == max_expansions:
+            return []
+        new_cost = cost_so_far[current] + 1
+        base = current << 2
+        for direction in range(4):
+            next_cell = neighbors[base + direction]
+            if next_cell < 0:
+                continue
+            if next_cell != goal and (cells[next_cell] == CELL_SNAKE or cells[next_cell] == CELL_OBSTICLE):
+                continue
+            if new_cost < cost_so_far.get(next_cell, new_cost + 1):
+                cost_so_far[next_cell] = new_cost
+                if estimate is None:
+                    row, col = divmod(next_cell, cols)
+                    priority = new_cost + abs(row - goal_row) + abs(col - goal_col)
+                else:
+                    priority = new_cost + estimate(next_cell)
+                heapq.heappush(frontier, (priority, next_cell))
+                came_from[next_cell] = current
+
+    if goal not in came_from:
+        return []
+    path = []
+    current = goal
+    while current != start:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
+
+def direction_towards(state: SnakeGameState, cell: int) -> int:
+    """Returns the direction code that moves the head into an adjacent cell, or -1 if it isn't adjacent."""
+    base = state.head << 2
+    for direction in range(4):
+        if state.neighbors[base + direction] == cell:
+            return direction
+    return -1
@@ -0,0 +1,91 @@
+from array import array
+from typing import Self
+import numpy as np
+from Games.SnakeGameState import SnakeGameState, neighbor_table, CELL_OBSTICLE
+
+# Landmarks per map. Each one costs a breadth-first search when the map is first searched, and a lookup per
+# heuristic call afterwards.
+LANDMARK_COUNT = 8
+
+# Landmark heuristics are shared by every state on the same walls. The key holds the walls buffer itself;
+# bytes cache their hash, so finding a map's heuristic again costs a dictionary lookup.
+_landmark_heuristics = {}
+
+def landmarks_for(state: SnakeGameState) -> "LandmarkHeuristic":
+    """Returns the landmark heuristic of the state's walls, building it on first use."""
+    key = (state.rows, state.cols, state.walls)
+    heuristic = _landmark_heuristics.get(key)
+    if heuristic is None:
+        heuristic = _landmark_heuristics[key] = LandmarkHeuristic(state.walls, state.rows, state.cols,
+                                                                  reference=state.start_cell)
+    return heuristic
+
+def distance_field(walls: bytes, rows: int, cols: int, source: int) -> array:
+    """Breadth-first distances from source to every cell around the walls; -1 for cells it can't reach."""
+    neighbors = neighbor_table(rows, cols)
+    field = array('i', [-1]) * (rows * cols)
+    field[source] = 0
+    frontier = [source]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for cell in frontier:
+            base = cell << 2
+            for direction in range(4):
+                next_cell = neighbors[base + direction]
+                if next_cell >= 0 and field[next_cell] < 0 and walls[next_cell] != CELL_OBSTICLE:
+                    field[next_cell] = distance
+                    next_frontier.append(next_cell)
+        frontier = next_frontier
+    return field
+
+
+class LandmarkHeuristic:
+    """
+    A* heuristic for a board with static walls, from precomputed distance fields (the ALT technique: A*,
+    landmarks and the triangle inequality). For a landmark L, the walls-only distance d satisfies
+    d(n, goal) >= |d(L, goal) - d(L, n)|, and the snake's body can only make real paths longer, so the largest
+    of these bounds and the Manhattan distance is still admissible, and much tighter than Manhattan distance
+    alone once walls force detours.
+
+    Landmarks are picked by farthest-point selection, each as far (around the walls) as possible from the ones
+    already picked, starting from the cell farthest from reference.
+    """
+
+    def __init__(self: Self, walls: bytes, rows: int, cols: int, count: int = LANDMARK_COUNT,
+                 reference: int = -1) -> Self:
+        self.rows = rows
+        self.cols = cols
+        if reference < 0 or walls[reference] == CELL_OBSTICLE:
+            reference = next(i for i, code in enumerate(walls) if code != CELL_OBSTICLE)
+        self.landmarks = []
+        self.fields = []
+        nearest = np.frombuffer(distance_field(walls, rows, cols, reference), dtype=np.int32).copy()
+        for _ in range(count):
+            landmark = int(np.argmax(nearest))
+            if nearest[landmark] <= 0:
+                break
+            field = distance_field(walls, rows, cols, landmark)
+            self.landmarks.append(landmark)
+            self.fields.append(field)
+            np.minimum(nearest, np.frombuffer(field, dtype=np.int32), out=nearest)
+
+    def estimator(self: Self, goal: int):
+        """Returns a function estimating the distance from a cell to goal."""
+        cols = self.cols
+        goal_row, goal_col = divmod(goal, cols)
+        pairs = [(field, field[goal]) for field in self.fields if field[goal] >= 0]
+
+        def estimate(cell: int) -> int:
+            row, col = divmod(cell, cols)
+            best = abs(row - goal_row) + abs(col - goal_col)
+            for field, to_goal in pairs:
+                bound = field[cell] - to_goal
+                if bound < 0:
+                    bound = -bound
+                if bound > best:
+                    best = bound
+            return best
+
+        return estimate
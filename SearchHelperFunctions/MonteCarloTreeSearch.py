@@ -0,0 +1,191 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Self
+from Games.SnakeGameState import SnakeGameState
+from Games.ForwardModel import ForwardModel, UndoLog
+from SearchHelperFunctions.RolloutPolicies import ROLLOUT_POLICIES, safe_directions
+
+
+class MCTSNode:
+    """Open-loop tree node: it is reached by a sequence of directions and keeps statistics for that sequence."""
+    __slots__ = ('children', 'visits', 'value_sum')
+
+    def __init__(self: Self) -> Self:
+        self.children = [None, None, None, None]
+        self.visits = 0
+        self.value_sum = 0.0
+
+
+class MonteCarloTreeSearch:
+    """
+    UCT search over the snake forward model.
+
+    The tree is open-loop: nodes store direction sequences rather than states, and every iteration replays
+    the sequence from the root with the forward model's undo log. That keeps memory per node tiny and
+    handles the random food placement after eating without chance nodes. After a move, the chosen child
+    becomes the new root so its statistics are reused.
+
+    With workers > 0 the search is root-parallel: worker processes build independent trees for the same
+    position while this process grows the persistent tree, and the root statistics are summed.
+    """
+
+    def __init__(self: Self, rollout_policy: str = "greedy", time_budget: float = 0.05, exploration: float = 1.0,
+                 rollout_depth: int = 40, discount: float = 0.97, workers: int = 0, seed=None) -> Self:
+        self.rollout_policy = rollout_policy
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.discount = discount
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.model = ForwardModel(self.rng)
+        self.policy = ROLLOUT_POLICIES[rollout_policy]()
+        self.undo_log = UndoLog()
+        self.root = MCTSNode()
+        self.executor = None
+        self.last_iterations = 0
+
+    def set_rollout_policy(self: Self, rollout_policy: str):
+        self.rollout_policy = rollout_policy
+        self.policy = ROLLOUT_POLICIES[rollout_policy]()
+        self.reset()
+
+    def reset(self: Self):
+        """Discards the search tree, e.g. when the game restarts."""
+        self.root = MCTSNode()
+
+    def advance_root(self: Self, direction: int):
+        """Re-roots the tree at the child reached by the move that was actually played."""
+        child = self.root.children[direction]
+        self.root = child if child is not None else MCTSNode()
+
+    def close(self: Self):
+        """Shuts down the worker processes, if any were started."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def choose_direction(self: Self, state: SnakeGameState) -> int:
+        """Searches from the given state for the time budget and returns the most visited direction."""
+        options = safe_directions(state)
+        # Forced moves (no or one safe direction) are returned without searching.
+        self.last_iterations = 0
+        if not options:
+            return state.direction
+        if len(options) == 1:
+            return options[0]
+
+        # Search on a private copy so the caller's state is never touched, even transiently.
+        state = state.copy()
+        futures = []
+        if self.workers > 0:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            settings = (self.rollout_policy, self.time_budget, self.exploration, self.rollout_depth, self.discount)
+            futures = [self.executor.submit(search_root_statistics, state, settings, self.rng.getrandbits(32))
+                       for _ in range(self.workers)]
+
+        self.last_iterations = self.search(state, self.root, time.perf_counter() + self.time_budget)
+
+        visits = [0, 0, 0, 0]
+        for direction, child in enumerate(self.root.children):
+            if child is not None:
+                visits[direction] = child.visits
+        for future in futures:
+            worker_visits, worker_iterations = future.result()
+            self.last_iterations += worker_iterations
+            for direction in range(4):
+                visits[direction] += worker_visits[direction]
+        return max(options, key=lambda direction: visits[direction])
+
+    def search(self: Self, state: SnakeGameState, root: MCTSNode, deadline: float) -> int:
+        """Runs iterations on the tree below root until the deadline. Returns the number of iterations."""
+        iterations = 0
+        model = self.model
+        undo_log = self.undo_log
+        undo_log.clear()
+        while True:
+            self.iterate(state, root)
+            iterations += 1
+            # Roll the state back to the root position.
+            while len(undo_log):
+                model.undo(state, undo_log)
+            if time.perf_counter() >= deadline:
+                return iterations
+
+    def iterate(self: Self, state: SnakeGameState, root: MCTSNode):
+        """One selection, expansion, rollout and backpropagation pass. Leaves the moves in the undo log."""
+        model = self.model
+        undo_log = self.undo_log
+        discount = self.discount
+        scale = 1.0 / model.food_reward
+        path = [root]
+        rewards = []
+        node = root
+        done = False
+
+        # Selection and expansion.
+        while not done:
+            options = safe_directions(state)
+            if not options:
+                options = [state.direction]
+            direction = self.select(node, options)
+            child = node.children[direction]
+            expanded = child is None
+            if expanded:
+                child = MCTSNode()
+                node.children[direction] = child
+            reward, done = model.apply(state, direction, undo_log)
+            rewards.append(reward * scale)
+            path.append(child)
+            node = child
+            if expanded:
+                break
+
+        # Rollout.
+        value = 0.0
+        if not done:
+            policy = self.policy
+            rng = self.rng
+            policy.begin(state)
+            factor = 1.0
+            for _ in range(self.rollout_depth):
+                factor *= discount
+                reward, done = model.apply(state, policy.choose(state, rng), undo_log)
+                value += factor * reward * scale
+                if done:
+                    break
+
+        # Backpropagation: each node gets the discounted return from the move that led to it.
+        for index in range(len(path) - 1, 0, -1):
+            value = rewards[index - 1] + discount * value
+            path[index].visits += 1
+            path[index].value_sum += value
+        root.visits += 1
+
+    def select(self: Self, node: MCTSNode, options: list[int]) -> int:
+        """UCB1 selection; unvisited moves are tried first, in random order."""
+        unvisited = [direction for direction in options if node.children[direction] is None]
+        if unvisited:
+            return unvisited[self.rng.randrange(len(unvisited))]
+        log_visits = math.log(node.visits + 1)
+        best_direction = options[0]
+        best_score = -math.inf
+        for direction in options:
+            child = node.children[direction]
+            score = child.value_sum / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_direction = direction
+        return best_direction
+
+
+def search_root_statistics(state: SnakeGameState, settings: tuple, seed: int) -> tuple[list[int], int]:
+    """Worker entry point for root-parallel search: builds a fresh tree and returns its root visit counts."""
+    rollout_policy, time_budget, exploration, rollout_depth, discount = settings
+    search = MonteCarloTreeSearch(rollout_policy, time_budget, exploration, rollout_depth, discount, seed=seed)
+    iterations = search.search(state, search.root, time.perf_counter() + time_budget)
+    visits = [child.visits if child is not None else 0 for child in search.root.children]
+    return visits, iterations
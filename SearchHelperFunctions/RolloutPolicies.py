@@ -0,0 +1,91 @@
+from Games.SnakeGameState import SnakeGameState
+from SearchHelperFunctions.GridAStar import find_path, direction_towards
+
+def safe_directions(state: SnakeGameState) -> list[int]:
+    """Returns the directions that don't immediately kill the snake."""
+    base = state.head << 2
+    return [direction for direction in range(4) if not state.is_blocked(state.neighbors[base + direction])]
+
+class RandomRollout:
+    """Moves uniformly at random among the moves that don't immediately kill the snake."""
+    name = "random"
+
+    def begin(self, state: SnakeGameState):
+        pass
+
+    def choose(self, state: SnakeGameState, rng) -> int:
+        options = safe_directions(state)
+        if not options:
+            return state.direction
+        return options[rng.randrange(len(options))]
+
+class GreedyRollout:
+    """Takes the safe move that gets closest to the food (Manhattan distance), breaking ties at random."""
+    name = "greedy"
+
+    def begin(self, state: SnakeGameState):
+        pass
+
+    def choose(self, state: SnakeGameState, rng) -> int:
+        options = safe_directions(state)
+        if not options:
+            return state.direction
+        if state.food < 0:
+            return options[rng.randrange(len(options))]
+        cols = state.cols
+        food_row, food_col = divmod(state.food, cols)
+        best = []
+        best_distance = None
+        base = state.head << 2
+        for direction in options:
+            row, col = divmod(state.neighbors[base + direction], cols)
+            distance = abs(row - food_row) + abs(col - food_col)
+            if best_distance is None or distance < best_distance:
+                best_distance = distance
+                best = [direction]
+            elif distance == best_distance:
+                best.append(direction)
+        return best[rng.randrange(len(best))]
+
+class AStarRollout:
+    """
+    Follows an A* path to the food, planned once at the start of the rollout and again whenever the food
+    moves. Falls back to the greedy policy when no path exists or the planned path becomes blocked.
+    """
+    name = "astar"
+
+    def __init__(self, max_expansions: int = 2000):
+        self.max_expansions = max_expansions
+        self.greedy = GreedyRollout()
+        self.path = []
+        self.path_index = 0
+        self.path_food = -1
+
+    def begin(self, state: SnakeGameState):
+        self.plan(state)
+
+    def plan(self, state: SnakeGameState):
+        self.path_food = state.food
+        self.path_index = 0
+        if state.food < 0:
+            self.path = []
+        else:
+            self.path = find_path(state, state.head, state.food, self.max_expansions)
+
+    def choose(self, state: SnakeGameState, rng) -> int:
+        if state.food != self.path_food:
+            self.plan(state)
+        if self.path_index < len(self.path):
+            next_cell = self.path[self.path_index]
+            direction = direction_towards(state, next_cell)
+            if direction >= 0 and not state.is_blocked(next_cell):
+                self.path_index += 1
+                return direction
+            self.path = []
+        return self.greedy.choose(state, rng)
+
+ROLLOUT_POLICIES = {
+    RandomRollout.name: RandomRollout,
+    GreedyRollout.name: GreedyRollout,
+    AStarRollout.name: AStarRollout,
+}
@@ -0,0 +1,137 @@
+"""
+A command-line client of the spectator server (Server/SpectatorServer.py), to test it without a browser or
+to script it. It mirrors the board from the server's messages and prints the status once a second.
+
+    python -m Server.SpectatorClient                       # watch the server on localhost
+    python -m Server.SpectatorClient --speed 500 --restart # send commands first, then watch
+    python -m Server.SpectatorClient --show --seconds 10   # draw small boards as text, stop after 10 s
+
+Only the standard library is used, so it runs on machines without the game's dependencies.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+from typing import Self
+from Server.WebSocket import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, accept_key, read_frame, write_frame
+
+# Board messages of large boards run to hundreds of kilobytes.
+MAX_SERVER_MESSAGE = 16 * 1024 * 1024
+CELL_CHARACTERS = ".#*X"
+
+
+class SpectatorClient:
+    """A WebSocket connection to the spectator server, and the board as far as its messages tell."""
+
+    def __init__(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Self:
+        self.reader = reader
+        self.writer = writer
+        self.rows = self.cols = 0
+        self.cells = bytearray()
+        self.status = {}
+        self.messages = 0
+        self.changes = 0
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "SpectatorClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        response = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        if " 101 " not in response.split("\r\n")[0] or accept_key(key) not in response:
+            raise ConnectionError(f"not a WebSocket server: {response.splitlines()[0]}")
+        return cls(reader, writer)
+
+    async def send(self: Self, command: str, **fields):
+        write_frame(self.writer, OP_TEXT, json.dumps({"command": command, **fields}).encode(), os.urandom(4))
+        await self.writer.drain()
+
+    async def receive(self: Self) -> dict | None:
+        """Applies the next message to the board and returns it, or None once the server closed."""
+        while True:
+            opcode, payload = await read_frame(self.reader, MAX_SERVER_MESSAGE)
+            if opcode == OP_CLOSE:
+                return None
+            if opcode == OP_PING:
+                write_frame(self.writer, OP_PONG, payload, os.urandom(4))
+            elif opcode == OP_TEXT:
+                break
+        message = json.loads(payload)
+        if message["type"] == "board":
+            self.rows, self.cols = message["rows"], message["cols"]
+            self.cells = bytearray(ord(digit) - 48 for digit in message["cells"])
+        else:
+            changes = message["cells"]
+            for i in range(0, len(changes), 2):
+                self.cells[changes[i]] = changes[i + 1]
+            self.changes += len(changes) // 2
+        self.status = message
+        self.messages += 1
+        return message
+
+    def board_text(self: Self) -> str:
+        return "\n".join("".join(CELL_CHARACTERS[code] for code in self.cells[row * self.cols:(row + 1) * self.cols])
+                         for row in range(self.rows))
+
+    async def close(self: Self):
+        write_frame(self.writer, OP_CLOSE, b"\x03\xe8", os.urandom(4))  # 1000: normal closure.
+        self.writer.close()
+
+
+async def watch(args):
+    client = await SpectatorClient.connect(args.host, args.port)
+    if args.speed is not None:
+        await client.send("speed", value=args.speed)
+    if args.pause:
+        await client.send("pause")
+    if args.resume:
+        await client.send("resume")
+    if args.restart:
+        await client.send("restart")
+
+    async def receive_all():
+        while await client.receive() is not None:
+            pass
+        print("The server closed the connection")
+
+    async def report():
+        while True:
+            await asyncio.sleep(1.0)
+            if args.show:
+                print(client.board_text())
+            status = client.status
+            print(f"episode {status.get('episode')}  move {status.get('step')}  score {status.get('score')}  "
+                  f"speed {status.get('speed')}/s  {client.messages} messages, {client.changes} cell changes")
+
+    # Messages are read by one task, so a timeout never cuts one in half.
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.wait_for(receive_all(), args.seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        reporter.cancel()
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch and control the snake spectator server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, help="set the agent's moves per second (0: unlimited)")
+    parser.add_argument("--pause", action="store_true")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="start a new game")
+    parser.add_argument("--show", action="store_true", help="print the board every second")
+    parser.add_argument("--seconds", type=float, help="stop watching after this long")
+    args = parser.parse_args()
+    try:
+        asyncio.run(watch(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Self
+from Games.ArenaAgents import ARENA_AGENTS
+from Games.SnakeGameLogic import SnakeGame
+from Server.WebSocket import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, accept_key, read_frame, write_frame
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Agents the server can run: those of the arena that don't wait for a keyboard.
+SERVED_AGENTS = tuple(name for name, agent in ARENA_AGENTS.items() if not agent.local)
+
+# Moves per second the agent plays at unless told otherwise; 0 plays as fast as it can.
+DEFAULT_SPEED = 20
+MAX_SPEED = 1_000_000
+# How often the simulation hands its changes to the viewers, at most. Moves in between are coalesced.
+BROADCAST_FPS = 30
+# The simulation never catches up on more than this many seconds of moves at once, after a stall.
+MAX_LAG = 0.25
+# Seconds a finished game stays on screen before the next one starts.
+RESTART_DELAY = 1.0
+
+# Bytes of unsent messages a viewer's connection may buffer before sending to it waits (which coalesces the
+# frames meanwhile).
+WRITE_BUFFER_LIMIT = 64 * 1024
+
+CLIENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spectator.html")
+# Turns cell codes into the digits of a "board" message.
+CELL_DIGITS = bytes((48 + code) % 256 for code in range(256))
+
+
+class Frame:
+    """
+    What the simulation hands to the viewers every broadcast: the cells that changed since the last frame
+    with their new codes (or the whole board, when cells is None), and where things stand.
+    """
+
+    def __init__(self: Self, cells: dict[int, int] | None, board: bytes | None, status: dict) -> Self:
+        self.cells = cells
+        self.board = board
+        self.status = status
+        self.message = None
+
+    def delta_message(self: Self) -> bytes:
+        """The frame as a "delta" message, encoded once for all the viewers that are up to date."""
+        if self.message is None:
+            self.message = encode_message("delta", self.cells, self.status)
+        return self.message
+
+
+class Simulation:
+    """
+    Plays a SnakeGame with one of the SERVED_AGENTS on its own thread, at speed moves per second, and starts
+    a new game RESTART_DELAY after every death.
+
+    The game records the cells each move changes anyway (for the BoardRenderer), so all a broadcast costs
+    this thread is turning that list into a Frame, at most BROADCAST_FPS times a second; the moves in
+    between only pay for a clock read. speed, paused and restart are set from the server's thread.
+    """
+
+    def __init__(self: Self, agent_name: str, rows: int, cols: int, game_map=None, seed=None,
+                 replay_directory=None, speed: float = DEFAULT_SPEED) -> Self:
+        if agent_name not in SERVED_AGENTS:
+            raise ValueError(f"Unknown agent {agent_name!r}, expected one of {SERVED_AGENTS}")
+        self.agent_name = agent_name
+        self.game = SnakeGame(f"serve-{agent_name}", rows, cols, save_results=False, seed=seed,
+                              game_map=game_map, replay_directory=replay_directory)
+        self.rows, self.cols = self.game.rows, self.game.cols
+        walls = game_map.walls if game_map is not None else None
+        self.agent = ARENA_AGENTS[agent_name](self.rows, self.cols, walls, self.game.seed)
+        self.speed = speed
+        self.paused = False
+        self.restart_requested = False
+        self.steps = 0
+        self.publish = None  # Called with every Frame, on this thread; set by the server.
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self: Self, publish):
+        self.publish = publish
+        self.thread = threading.Thread(target=self.run, name="snake-simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self: Self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.game.save_replay()
+
+    def status(self: Self) -> dict:
+        game = self.game
+        return {"step": self.steps, "episode": game.attempts, "score": game.score, "high_score": game.high_score,
+                "head": game.state.head, "food": game.state.food, "dead": game.is_dead, "speed": self.speed,
+                "paused": self.paused, "agent": self.agent_name}
+
+    def take_frame(self: Self) -> Frame:
+        changed = self.game.take_changed_cells()
+        cells = self.game.display_cells
+        if changed is None:
+            return Frame(None, bytes(cells), self.status())
+        return Frame({cell: cells[cell] for cell in changed}, None, self.status())
+
+    def run(self: Self):
+        game = self.game
+        agent = self.agent
+        clock = time.perf_counter
+        next_move = next_broadcast = clock()
+        died_at = None
+        last_status = None
+        while not self.stopping.is_set():
+            now = clock()
+            if self.restart_requested or (died_at is not None and now - died_at >= RESTART_DELAY):
+                self.restart_requested = False
+                died_at = None
+                game.reset()
+                next_move = now
+            elif self.paused or died_at is not None:
+                # Nothing moves; only wake up to broadcast a change of the controls.
+                self.stopping.wait(1 / BROADCAST_FPS)
+                next_move = clock()
+            elif self.speed > 0:
+                # Moves are due at a steady rate; after a stall only MAX_LAG seconds of them are caught up.
+                next_move = max(next_move + 1 / self.speed, now - MAX_LAG)
+                if next_move > now:
+                    self.stopping.wait(next_move - now)
+                game.set_direction(agent.choose(game.state))
+                game.process_action()
+                self.steps += 1
+            else:
+                # As fast as it can: moves until the next broadcast, checking nothing but the clock.
+                steps = 0
+                while not game.is_dead and clock() < next_broadcast:
+                    game.set_direction(agent.choose(game.state))
+                    game.process_action()
+                    steps += 1
+                self.steps += steps
+            if died_at is None and game.is_dead:
+                died_at = clock()
+            now = clock()
+            if now >= next_broadcast:
+                next_broadcast = now + 1 / BROADCAST_FPS
+                controls = (self.speed, self.paused, game.is_dead)
+                if game.changed_cells or game.redraw_all or controls != last_status:
+                    last_status = controls
+                    self.publish(self.take_frame())
+
+
+class Viewer:
+    """
+    One connected WebSocket client. Frames are merged into what it hasn't been sent yet, so a slow viewer
+    gets fewer, larger updates instead of a growing queue, and the simulation never waits for it.
+    """
+
+    def __init__(self: Self, writer: asyncio.StreamWriter, capacity: int) -> Self:
+        self.writer = writer
+        self.capacity = capacity
+        self.pending_frame = None  # The one frame not sent yet, while there is only one.
+        self.pending_cells = {}  # Otherwise, the changes of all of them.
+        self.needs_board = True  # A new viewer starts with the whole board.
+        self.status = None
+        self.ready = asyncio.Event()
+
+    def queue(self: Self, frame: Frame):
+        self.status = frame.status
+        if frame.cells is None:
+            self.needs_board = True
+        elif not self.needs_board:
+            if self.pending_frame is None and not self.pending_cells:
+                self.pending_frame = frame
+            else:
+                if self.pending_frame is not None:
+                    self.pending_cells.update(self.pending_frame.cells)
+                    self.pending_frame = None
+                self.pending_cells.update(frame.cells)
+                # Past a quarter of the board the whole board is the smaller message.
+                if len(self.pending_cells) > self.capacity // 4:
+                    self.needs_board = True
+        if self.needs_board:
+            self.pending_frame = None
+            self.pending_cells = {}
+        self.ready.set()
+
+    def take_message(self: Self, board: bytearray, rows: int, cols: int) -> bytes:
+        if self.needs_board:
+            self.needs_board = False
+            return encode_message("board", None, self.status, rows=rows, cols=cols,
+                                  cells=bytes(board).translate(CELL_DIGITS).decode("ascii"))
+        if self.pending_frame is not None:
+            message = self.pending_frame.delta_message()
+            self.pending_frame = None
+            return message
+        message = encode_message("delta", self.pending_cells, self.status)
+        self.pending_cells = {}
+        return message
+
+
+class SpectatorServer:
+    """
+    Serves a Simulation to browsers and scripts over HTTP and WebSocket, with the standard library only.
+
+        GET /        the browser client (spectator.html)
+        GET /state   the current board and status, as JSON
+        GET /ws      a WebSocket streaming the board: a "board" message with every cell (as digits), then
+                     "delta" messages of [cell, code, cell, code, ...] for the cells that changed. Every
+                     message carries the status (step, score, head, food, speed, ...). Clients control
+                     the game with {"command": "speed", "value": moves_per_second}, {"command": "pause"},
+                     {"command": "resume"} and {"command": "restart"}.
+
+    The simulation runs on its own thread and publishes to the event loop; each viewer has a task sending
+    it the latest changes, waiting for its socket to drain between messages.
+    """
+
+    def __init__(self: Self, simulation: Simulation, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Self:
+        self.simulation = simulation
+        self.host = host
+        self.port = port
+        self.rows, self.cols = simulation.rows, simulation.cols
+        # The board as last published, kept on the event loop's thread for new viewers and /state.
+        self.board = bytearray(simulation.game.display_cells)
+        self.status = simulation.status()
+        self.viewers: set[Viewer] = set()
+        self.loop = None
+        self.server = None
+
+    def publish(self: Self, frame: Frame):
+        """Called on the simulation's thread; passes the frame on to the event loop."""
+        self.loop.call_soon_threadsafe(self.broadcast, frame)
+
+    def broadcast(self: Self, frame: Frame):
+        if frame.cells is None:
+            self.board[:] = frame.board
+        else:
+            for cell, code in frame.cells.items():
+                self.board[cell] = code
+        self.status = frame.status
+        for viewer in self.viewers:
+            viewer.queue(frame)
+
+    async def serve(self: Self):
+        """Serves until cancelled."""
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.simulation.start(self.publish)
+        print(f"Spectator server on http://{self.host}:{self.port}/ ({self.simulation.agent_name} on "
+              f"{self.rows}x{self.cols})")
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.simulation.stop()
+
+    async def handle_connection(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            lines = request.decode("latin-1").split("\r\n")
+            method, path = lines[0].split(" ")[:2]
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            path = path.split("?")[0]
+            if method != "GET":
+                await self.respond(writer, "405 Method Not Allowed", "text/plain", b"Only GET is served\n")
+            elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self.serve_viewer(reader, writer, headers.get("sec-websocket-key", ""))
+            elif path == "/":
+                with open(CLIENT_PATH, "rb") as file:
+                    await self.respond(writer, "200 OK", "text/html; charset=utf-8", file.read())
+            elif path == "/state":
+                state = {"rows": self.rows, "cols": self.cols, "cells": list(self.board), **self.status}
+                await self.respond(writer, "200 OK", "application/json", json.dumps(state).encode())
+            else:
+                await self.respond(writer, "404 Not Found", "text/plain", b"Not found\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down. Nothing awaits this task, and asyncio reports cancelled
+            # connection handlers as errors, so it ends normally.
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self: Self, writer: asyncio.StreamWriter, status: str, content_type: str, body: bytes):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def serve_viewer(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: str):
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n".encode())
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_LIMIT)
+        viewer = Viewer(writer, self.rows * self.cols)
+        viewer.status = self.status
+        viewer.ready.set()
+        self.viewers.add(viewer)
+        # The viewer is served until either direction ends, and an error in either is raised here.
+        tasks = (asyncio.create_task(self.send_frames(viewer)),
+                 asyncio.create_task(self.receive_commands(reader, writer)))
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            self.viewers.discard(viewer)
+            for task in tasks:
+                task.cancel()
+
+    async def send_frames(self: Self, viewer: Viewer):
+        while True:
+            await viewer.ready.wait()
+            viewer.ready.clear()
+            write_frame(viewer.writer, OP_TEXT, viewer.take_message(self.board, self.rows, self.cols))
+            # Backpressure: frames arriving while the socket drains are merged into the next message.
+            await viewer.writer.drain()
+
+    async def receive_commands(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while True:
+            opcode, payload = await read_frame(reader)
+            if opcode == OP_CLOSE:
+                write_frame(writer, OP_CLOSE, payload[:2])
+                await writer.drain()
+                return
+            if opcode == OP_PING:
+                write_frame(writer, OP_PONG, payload)
+            elif opcode == OP_TEXT:
+                try:
+                    self.apply_command(json.loads(payload))
+                except (ValueError, TypeError, KeyError, AttributeError) as error:
+                    print(f"Ignored spectator command {payload[:100]!r}: {error}")
+
+    def apply_command(self: Self, command: dict):
+        simulation = self.simulation
+        name = command["command"]
+        if name == "speed":
+            speed = float(command["value"])
+            if not speed >= 0:
+                raise ValueError(f"speed {speed} is not a number of moves per second")
+            simulation.speed = min(speed, MAX_SPEED)
+        elif name == "pause":
+            simulation.paused = True
+        elif name == "resume":
+            simulation.paused = False
+        elif name == "restart":
+            simulation.restart_requested = True
+        else:
+            raise ValueError(f"unknown command {name!r}")
+
+
+def encode_message(kind: str, changes: dict[int, int] | None, status: dict, **fields) -> bytes:
+    message = {"type": kind}
+    if changes is not None:
+        message["cells"] = [value for item in changes.items() for value in item]
+    message.update(fields)
+    message.update(status)
+    return json.dumps(message, separators=(",", ":")).encode()
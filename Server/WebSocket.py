@@ -0,0 +1,62 @@
+"""
+The little of the WebSocket protocol (RFC 6455) the spectator server and its Python client need: the opening
+handshake's key and single-frame messages, over asyncio streams.
+"""
+import asyncio
+import base64
+import hashlib
+import struct
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Opcodes.
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# The largest message read by default.
+MAX_MESSAGE = 4096
+
+
+def accept_key(key: str) -> str:
+    """The Sec-WebSocket-Accept a server answers a client's Sec-WebSocket-Key with."""
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+
+def write_frame(writer: asyncio.StreamWriter, opcode: int, payload: bytes, mask: bytes = None):
+    """Writes one final WebSocket frame. Clients have to mask theirs (with four random bytes); servers don't."""
+    length = len(payload)
+    mask_bit = 0x80 if mask is not None else 0
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if mask is not None:
+        header += mask
+        payload = apply_mask(payload, mask)
+    writer.write(header + payload)
+
+
+async def read_frame(reader: asyncio.StreamReader, limit: int = MAX_MESSAGE) -> tuple[int, bytes]:
+    """Reads one WebSocket frame, unmasking it. Fragmented and oversized messages are refused."""
+    first, second = await reader.readexactly(2)
+    if not first & 0x80:
+        raise ValueError("fragmented WebSocket messages are not supported")
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    if length > limit:
+        raise ValueError(f"WebSocket message of {length} bytes")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return first & 0x0F, apply_mask(payload, mask) if mask is not None else payload
+
+
+def apply_mask(payload: bytes, mask: bytes) -> bytes:
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
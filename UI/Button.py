@@ -18,11 +18,17 @@ class Button:
         self.rect = pygame.Rect(0, 0, 0, 0)  # Will be set by layout logic.
         self.font = pygame.font.SysFont("Arial", font_size)
         self.subscribers = []  # List of functions to call on click.
+        self.text_surf = None  # Cached label surface, rendered on first draw.
 
     def subscribe(self, fn):
         """Registers a callback function to be notified when the button is clicked."""
         self.subscribers.append(fn)
 
+    def set_label(self, label):
+        """Changes the button text; the cached label surface is re-rendered on the next draw."""
+        self.label = label
+        self.text_surf = None
+
     def on_click(self):
         """Should be called when the button is pressed. It first calls an optional direct callback,
         then notifies all subscribers, passing broadcast_value only if it exists."""
@@ -40,7 +46,8 @@ class Button:
         pygame.draw.rect(screen, (255, 255, 255), self.rect)
         # Border (black)
         pygame.draw.rect(screen, (0, 0, 0), self.rect, 2)
-        # Render and center the label text.
-        text_surf = self.font.render(self.label, True, (0, 0, 0))
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        screen.blit(text_surf, text_rect)
\ No newline at end of file
+        # Center the label text. It is rendered once and again only after set_label changes it.
+        if self.text_surf is None:
+            self.text_surf = self.font.render(self.label, True, (0, 0, 0))
+        text_rect = self.text_surf.get_rect(center=self.rect.center)
+        screen.blit(self.text_surf, text_rect)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import math
+import pygame
+
+def grid_layout(buttons, screen_size, columns=2, margin=20, max_button_height=100):
+    """
+    Positions buttons on a grid with the given number of columns per row.
+    If the number of buttons doesn't fill the last row, the extra buttons are placed on the left.
+    """
+    window_width, window_height = screen_size
+    rows = max(1, math.ceil(len(buttons) / columns))
+
+    # Compute available width and height for the button grid.
+    # Here we assume the grid spans nearly the whole window minus fixed margins.
+    available_width = window_width - 2 * margin  # left/right margin
+    available_height = window_height - 2 * margin  # top/bottom margin
+
+    # Compute each button's width and height.
+    # Also include additional horizontal spacing (margin between columns).
+    button_width = (available_width - margin * (columns - 1)) // columns
+    button_height = min(max_button_height, (available_height - margin * (rows - 1)) // rows)
+
+    # Position each button in the grid.
+    for idx, button in enumerate(buttons):
+        row_index = idx // columns
+        col_index = idx % columns
+        x_position = margin + col_index * (button_width + margin)
+        y_position = margin + row_index * (button_height + margin)
+        button.rect = pygame.Rect(x_position, y_position, button_width, button_height)
+
+def hud_layout(game_rect, main_menu_button, speed_decrease_button=None, speed_increase_button=None,
+               button_width=200, button_height=50):
+    """
+    Positions the in-game buttons below the bottom-right corner of the board.
+    The Main Menu button sits first, with the optional Slow/Fast speed buttons sharing the row below it.
+    """
+    menu_x = game_rect.right - button_width
+    menu_y = game_rect.bottom + 10
+    main_menu_button.rect = pygame.Rect(menu_x, menu_y, button_width, button_height)
+
+    if speed_decrease_button is None or speed_increase_button is None:
+        return
+
+    # We'll arrange two buttons in a single row. Their total width equals the Main Menu button's width.
+    vertical_gap = 10
+    speed_button_margin = 10  # gap between the two speed buttons
+    speed_buttons_y = menu_y + button_height + vertical_gap
+    speed_button_width = (button_width - speed_button_margin) // 2
+    speed_decrease_button.rect = pygame.Rect(menu_x, speed_buttons_y, speed_button_width, button_height)
+    speed_increase_button.rect = pygame.Rect(menu_x + speed_button_width + speed_button_margin, speed_buttons_y,
+                                             speed_button_width, button_height)
+
+def end_screen_layout(screen_size, restart_button, main_menu_button, button_width=200, button_height=50):
+    """Stacks the Restart and Main Menu buttons in the lower third of the Game Over screen."""
+    window_width, window_height = screen_size
+    restart_x = (window_width - button_width) // 2
+    restart_y = window_height // 1.5 - button_height // 2
+    restart_button.rect = pygame.Rect(restart_x, restart_y, button_width, button_height)
+    menu_y = restart_y + button_height + 10  # position below the restart button
+    main_menu_button.rect = pygame.Rect(restart_x, menu_y, button_width, button_height)
@@ -0,0 +1,95 @@
+import time
+import pygame
+from PerformanceHelperFunctions.Metrics import Metrics
+
+# Ensure the font module is initialized
+if not pygame.font.get_init():
+    pygame.font.init()
+
+# The overlay text is re-rendered at this interval rather than every frame, so drawing it stays cheap.
+REFRESH_INTERVAL = 0.25
+MESSAGE_DURATION = 3.0
+
+
+class MetricsOverlay:
+    """
+    Semi-transparent panel listing where frame time goes: the main loop phases, agent decision latency
+    and search statistics, and step rates. F3 toggles it and F4 exports the metrics (see GameManager).
+    """
+
+    def __init__(self, font_size=16):
+        self.visible = False
+        self.font = pygame.font.SysFont("Arial", font_size)
+        self.panel = None  # Cached rendered panel, refreshed every REFRESH_INTERVAL.
+        self.refreshed = 0.0
+        self.message = None
+        self.message_until = 0.0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.panel = None
+
+    def notify(self, message: str):
+        """Shows a one-line message (such as the export path) at the bottom of the panel for a few seconds."""
+        self.message = message
+        self.message_until = time.perf_counter() + MESSAGE_DURATION
+        self.panel = None
+
+    def rows(self, metrics: Metrics) -> list[tuple]:
+        """The panel as rows of cells; single-cell rows span the panel. Columns are aligned when drawn."""
+        rows = []
+        frames = metrics.rates.get("frames")
+        if frames is not None:
+            rows.append((f"FPS {frames.per_second:.1f}",))
+        rows.append(("ms", "last", "mean", "p95"))
+        for name, histogram in metrics.histograms.items():
+            if histogram.unit == "ms":
+                p95, = histogram.percentiles(0.95)
+                rows.append((name, f"{histogram.last:.2f}", f"{histogram.mean:.2f}", f"{p95:.2f}"))
+        counts = [histogram for histogram in metrics.histograms.values() if histogram.unit != "ms"]
+        if counts:
+            rows.append(("per call", "last", "mean", "p95"))
+            for histogram in counts:
+                p95, = histogram.percentiles(0.95)
+                rows.append((histogram.name, f"{histogram.last:.0f}", f"{histogram.mean:.1f}", f"{p95:.0f}"))
+        rates = [rate for name, rate in metrics.rates.items() if name != "frames"]
+        if rates:
+            rows.append(("rate", "/s", "total", ""))
+            for rate in rates:
+                rows.append((rate.name, f"{rate.per_second:.0f}", str(rate.total), ""))
+        if self.message is not None and time.perf_counter() < self.message_until:
+            rows.append((self.message,))
+        rows.append(("F3 hide  F4 export",))
+        return rows
+
+    def render_panel(self, metrics: Metrics) -> pygame.Surface:
+        rows = [[self.font.render(cell, True, (255, 255, 255)) for cell in row] for row in self.rows(metrics)]
+        gap = 12
+        widths = [0, 0, 0, 0]
+        for row in rows:
+            if len(row) > 1:
+                for column, surface in enumerate(row):
+                    widths[column] = max(widths[column], surface.get_width())
+        width = max([sum(widths) + gap * 3] + [row[0].get_width() for row in rows if len(row) == 1]) + 16
+        line_height = self.font.get_linesize()
+        panel = pygame.Surface((width, line_height * len(rows) + 16), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        for index, row in enumerate(rows):
+            y = 8 + index * line_height
+            if len(row) == 1:
+                panel.blit(row[0], (8, y))
+                continue
+            # The name column is left-aligned, the numbers right-aligned.
+            panel.blit(row[0], (8, y))
+            right = 8 + widths[0]
+            for column in range(1, len(row)):
+                right += gap + widths[column]
+                panel.blit(row[column], (right - row[column].get_width(), y))
+        return panel
+
+    def draw(self, screen: pygame.Surface, metrics: Metrics):
+        now = time.perf_counter()
+        if self.panel is None or now - self.refreshed >= REFRESH_INTERVAL:
+            self.panel = self.render_panel(metrics)
+            self.refreshed = now
+        screen.blit(self.panel, (screen.get_width() - self.panel.get_width(), 0))
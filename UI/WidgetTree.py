@@ -0,0 +1,48 @@
+import pygame
+
+class WidgetTree:
+    def __init__(self, layout=None):
+        """
+        :param layout: Optional function called with the screen size (width, height) that assigns
+                       each widget's rect. It only runs when the layout has been invalidated.
+        """
+        self.widgets = []
+        self.layout = layout
+        self.layout_dirty = True
+
+    def add(self, widget):
+        """Adds a widget to the tree and returns it, so creation and registration can be chained."""
+        self.widgets.append(widget)
+        self.layout_dirty = True
+        return widget
+
+    def invalidate_layout(self):
+        """Marks the cached layout as stale. Called when the window is resized."""
+        self.layout_dirty = True
+
+    def update_layout(self, screen):
+        """Recomputes widget rects only if the layout has been invalidated since the last call."""
+        if self.layout_dirty:
+            if self.layout is not None:
+                self.layout(screen.get_size())
+            self.layout_dirty = False
+
+    def handle_event(self, event) -> bool:
+        """
+        Hit-tests a left click against the widgets once and triggers the widget under the cursor.
+        Returns True if the event was consumed.
+        """
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return False
+        # Walk the widgets from the top-most (last drawn) down, so overlapping widgets behave intuitively.
+        for widget in reversed(self.widgets):
+            if widget.rect.collidepoint(event.pos):
+                widget.on_click()
+                return True
+        return False
+
+    def draw(self, screen):
+        """Draws every widget, refreshing the cached layout first if needed."""
+        self.update_layout(screen)
+        for widget in self.widgets:
+            widget.draw(screen)
@@ -0,0 +1,60 @@
+import contextlib
+import os
+from Games.SnakeGameLogic import SnakeGame
+from Games.SnakeGameState import CELL_SNAKE
+import GraphHelperFunctions.Hamiltonian as ham
+
+
+def cycle_cells(rows: int, cols: int) -> list[int]:
+    """The board's Hamiltonian cycle as flat cell indices."""
+    with quiet():
+        cycle = ham.find_hamiltonian_cycle(rows, cols)
+    if cycle is None:
+        raise ValueError(f"A {rows}x{cols} board has no Hamiltonian cycle; use an even number of rows or columns")
+    return [row * cols + col for row, col in cycle]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences anything the Hamiltonian cycle builders print while a case is timed."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def cycle_directions(game: SnakeGame, cells: list[int]) -> list[int]:
+    """For every cell, the direction that moves on to the next cell of the cycle."""
+    neighbors = game.state.neighbors
+    directions = [0] * len(cells)
+    for index, cell in enumerate(cells):
+        next_cell = cells[(index + 1) % len(cells)]
+        for direction in range(4):
+            if neighbors[cell * 4 + direction] == next_cell:
+                directions[cell] = direction
+    return directions
+
+
+def make_game(rows: int, cols: int, occupancy=0.0, seed=0) -> SnakeGame:
+    """
+    A headless game whose snake already covers the given fraction of the board, laid along the
+    Hamiltonian cycle so that it is a valid, connected body. Food is placed on one of the free cells.
+    """
+    game = SnakeGame("benchmark", rows, cols, save_results=False, seed=seed)
+    length = max(1, min(int(occupancy * rows * cols), rows * cols - 1))
+    if length == 1:
+        return game
+
+    cells = cycle_cells(rows, cols)
+    directions = cycle_directions(game, cells)
+    state = game.state
+    state.reset(start_cell=cells[0])
+    for index, cell in enumerate(cells[:length]):
+        state.body[index] = cell
+        state.cells[cell] = CELL_SNAKE
+    state.length = length
+    state.head = cells[length - 1]
+    state.direction = directions[state.head]
+    state.pending_growth = 0
+    game.set_direction(state.direction)
+    game.sync_state_arr()
+    game.place_food()
+    return game
@@ -0,0 +1,55 @@
+from Games.Arena import ArenaGame
+from Games.ArenaAgents import ArenaController
+from Games.SnakeGameLogic import BlockState
+from benchmarks.Fixtures import cycle_cells, cycle_directions, make_game
+from benchmarks.Timing import record
+
+OCCUPANCIES = (0.0, 0.5, 0.9, 0.99)
+
+# Snakes of the arena benchmark, all played by the greedy agent.
+ARENA_SNAKES = 8
+
+
+def run(sizes, min_time=0.5) -> list[dict]:
+    results = []
+    for rows, cols in sizes:
+        params = {"rows": rows, "cols": cols}
+
+        # The snake follows the Hamiltonian cycle, so it keeps eating and growing instead of dying
+        # after a few moves; a finished (full) board starts over.
+        game = make_game(rows, cols)
+        directions = cycle_directions(game, cycle_cells(rows, cols))
+
+        def step():
+            if game.is_dead:
+                game.reset()
+            game.set_direction(directions[game.state.head])
+            game.process_action()
+
+        results.append(record("game.process_action", params, step, min_time))
+        results.append(record("game.reset", params, game.reset, min_time))
+
+        for occupancy in OCCUPANCIES:
+            crowded = make_game(rows, cols, occupancy)
+
+            def place_food():
+                crowded.place_food()
+                food = crowded.food_location
+                if food is not None:
+                    crowded.set_block_state(food, BlockState.Empty)
+
+            results.append(record("game.place_food", dict(params, occupancy=occupancy), place_food, min_time))
+
+        # One arena tick: the greedy agents' moves, chosen serially, and the simultaneous step. A finished
+        # round starts over.
+        arena = ArenaGame(rows, cols, ARENA_SNAKES, seed=0)
+        controller = ArenaController(arena.arena, ["greedy"] * ARENA_SNAKES, parallel="serial", seed=0)
+
+        def tick():
+            if arena.is_dead:
+                arena.reset()
+            arena.step(controller.choose_directions())
+
+        results.append(record("arena.tick", dict(params, snakes=ARENA_SNAKES), tick, min_time))
+        controller.close()
+    return results
@@ -0,0 +1,47 @@
+import GraphHelperFunctions.ArrayToGraph as gh
+import GraphHelperFunctions.Hamiltonian as ham
+from Games.Maps import generate_maze
+from Games.SnakeGameLogic import SnakeGame
+from SearchHelperFunctions.Landmarks import landmarks_for
+from benchmarks.Fixtures import make_game, quiet
+from benchmarks.Timing import record
+
+# Fraction of the board covered by the snake when searching for the food.
+OCCUPANCIES = (0.0, 0.5)
+
+
+def run(sizes, min_time=0.5) -> list[dict]:
+    # Imported here because scenes pull in pygame; the caller sets up the headless video driver first.
+    from Scenes.SnakeGameAStarAgentScene import SnakeGameAStarAgentScene
+
+    scene = SnakeGameAStarAgentScene()
+    results = []
+    for rows, cols in sizes:
+        params = {"rows": rows, "cols": cols}
+        for occupancy in OCCUPANCIES:
+            game = make_game(rows, cols, occupancy)
+            scene.game = game
+            scene.path = []
+            start, goal = game.head_location, game.food_location
+            results.append(record("astar.find_path_to_food", dict(params, occupancy=occupancy),
+                                  lambda: scene.find_path_to_food(start, goal), min_time))
+
+        with quiet():
+            results.append(record("hamiltonian.find_hamiltonian_cycle", params,
+                                  lambda: ham.find_hamiltonian_cycle(rows, cols), min_time))
+        state_arr = make_game(rows, cols).state_arr
+        results.append(record("graph.array_to_graph", params, lambda: gh.array_to_graph(state_arr), min_time))
+
+        # The same searches around the walls of a generated maze. The map's landmark heuristic is built once
+        # per map, so it is built before timing.
+        game_map = generate_maze(rows, cols, seed=0)
+        game = SnakeGame("benchmark", save_results=False, seed=0, game_map=game_map)
+        landmarks_for(game.state)
+        scene.game = game
+        scene.path = []
+        start, goal = game.head_location, game.food_location
+        results.append(record("astar.find_path_to_food", dict(params, occupancy=0.0, map="maze"),
+                              lambda: scene.find_path_to_food(start, goal), min_time))
+        results.append(record("hamiltonian.find_hamiltonian_cycle_on_map", dict(params, map="maze"),
+                              lambda: ham.find_hamiltonian_cycle_on_map(game_map.walls, rows, cols), min_time))
+    return results
@@ -0,0 +1,70 @@
+import os
+import tempfile
+from benchmarks.Fixtures import make_game, quiet
+from benchmarks.Timing import record
+
+# Fraction of the board covered by the snake in the rendered frame.
+OCCUPANCY = 0.25
+ASPECT_RATIO = 4 / 3
+
+
+def scene_factories() -> dict:
+    """Every scene, by name, as a zero-argument constructor. Imported lazily since scenes pull in pygame."""
+    from Scenes.MainMenuScene import MainMenuScene
+    from Scenes.SnakeGameHumanAgentScene import SnakeGameHumanAgentScene
+    from Scenes.SnakeGameHamiltonianPathAgentScene import SnakeGameHamiltonianPathAgentScene
+    from Scenes.SnakeGameAStarAgentScene import SnakeGameAStarAgentScene
+    from Scenes.SnakeGameMCTSAgentScene import SnakeGameMCTSAgentScene
+    from Scenes import SnakeGameRLAgent as rl
+    from Scenes import SnakeGameRL_DLAgent as dl
+
+    return {
+        "main_menu": MainMenuScene,
+        "human": SnakeGameHumanAgentScene,
+        "hamiltonian": SnakeGameHamiltonianPathAgentScene,
+        "a_star": SnakeGameAStarAgentScene,
+        "mcts": lambda: SnakeGameMCTSAgentScene(seed=0),
+        "rl": lambda: rl.SnakeGameRLAgent(seed=0),
+        "deep_rl": lambda: dl.SnakeGameRLAgent(seed=0, resume=False),
+    }
+
+
+def run(sizes, min_time=0.5, width=600) -> list[dict]:
+    import pygame
+    from Singlton import GAME_MANAGER
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, width * ASPECT_RATIO))
+    results = []
+    # Scenes load and create saved models relative to the working directory; keep those out of the repo.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            for name, factory in scene_factories().items():
+                with quiet():
+                    scene = factory()
+                scene.set_game_manager(GAME_MANAGER)
+                if name == "main_menu":
+                    # The menu has no board, so its frame doesn't depend on the board size.
+                    scene.set_scale(width)
+                    results.append(record("render.main_menu", {"width": width},
+                                          lambda: scene.render_scene(screen), min_time))
+                    continue
+                for rows, cols in sizes:
+                    use_board(scene, rows, cols)
+                    scene.set_scale(width)
+                    results.append(record(f"render.{name}", {"rows": rows, "cols": cols, "width": width},
+                                          lambda: scene.render_scene(screen), min_time))
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def use_board(scene, rows: int, cols: int):
+    """Swaps the scene's game for a headless one of the given size, part-way through an episode."""
+    scene.game = make_game(rows, cols, OCCUPANCY)
+    if hasattr(scene, "initialize_graph_and_path"):
+        scene.rows, scene.cols = rows, cols
+        with quiet():
+            scene.initialize_graph_and_path()
@@ -0,0 +1,128 @@
+"""
+Benchmarks the hot paths of the game, the planners, the DQN trainer and the scene renderers.
+
+Run from the repository root (no window is opened; render cases use SDL's dummy video driver):
+
+    python -m benchmarks.RunBenchmarks
+    python -m benchmarks.RunBenchmarks --groups game pathfinding --sizes 10x10 26x32
+    python -m benchmarks.RunBenchmarks --compare benchmarks/results/baseline.json
+
+Every case reports per-call seconds (median, min and mean of several timed batches). Results are written
+as JSON, by default to benchmarks/results/<timestamp>.json. With --compare, each case's median is checked
+against a previous results file, and the exit status is 1 if any case got slower by more than --threshold.
+"""
+import os
+
+# Must be set before pygame is first imported.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+GROUPS = ("game", "pathfinding", "training", "render")
+DEFAULT_SIZES = ("10x10", "26x32", "50x64")
+RESULTS_DIRECTORY = os.path.join("benchmarks", "results")
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    rows, _, cols = text.partition("x")
+    try:
+        return int(rows), int(cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"board sizes look like ROWSxCOLS, not {text!r}")
+
+
+def run_group(group: str, sizes, min_time: float, width: int) -> list[dict]:
+    if group == "game":
+        from benchmarks import GameBenchmarks
+        return GameBenchmarks.run(sizes, min_time)
+    if group == "pathfinding":
+        from benchmarks import PathfindingBenchmarks
+        return PathfindingBenchmarks.run(sizes, min_time)
+    if group == "training":
+        from benchmarks import TrainingBenchmarks
+        return TrainingBenchmarks.run(min_time)
+    from benchmarks import RenderBenchmarks
+    return RenderBenchmarks.run(sizes, min_time, width)
+
+
+def environment() -> dict:
+    """Where the numbers came from, so that results from different machines aren't compared blindly."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(previous: dict, current: dict, threshold: float) -> list[str]:
+    """Prints each case's change in median time and returns the cases that regressed beyond threshold."""
+    old = {result["case"]: result for result in previous["results"]}
+    regressions = []
+    print(f"\nCompared with {previous['environment'].get('commit')} ({previous['environment'].get('timestamp')}):")
+    for result in current["results"]:
+        before = old.get(result["case"])
+        if before is None:
+            print(f"  {result['case']:<60} new")
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["case"])
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"  {result['case']:<60} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help="board sizes as ROWSxCOLS (one of them must be even)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds of timing per case")
+    parser.add_argument("--width", type=int, default=600, help="window width for the render cases")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown that counts as a regression in --compare")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "results": []}
+    for group in args.groups:
+        for result in run_group(group, args.sizes, args.min_time, args.width):
+            print(f"{result['case']:<60} {result['median_s'] * 1e6:12.2f} us  {result['per_second']:12.1f}/s",
+                  flush=True)
+            report["results"].append(result)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+        output = os.path.join(RESULTS_DIRECTORY, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        if compare(previous, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
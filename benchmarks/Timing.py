@@ -0,0 +1,57 @@
+import gc
+import statistics
+import time
+
+
+def measure(fn, min_time=0.5, repeats=5) -> dict:
+    """
+    Times fn() the way timeit does: the call count is doubled until one batch of calls takes at least
+    min_time / repeats, then that batch is run repeats times with the garbage collector off.
+    Returns per-call seconds (median, min and mean over the batches) and the total call count.
+    """
+    target = min_time / repeats
+    number = 1
+    while True:
+        elapsed = time_batch(fn, number)
+        if elapsed >= target:
+            break
+        number *= 2
+
+    per_call = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            per_call.append(time_batch(fn, number) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    median = statistics.median(per_call)
+    return {
+        "calls": number * repeats,
+        "median_s": median,
+        "min_s": min(per_call),
+        "mean_s": statistics.fmean(per_call),
+        "per_second": 1 / median if median > 0 else float("inf"),
+    }
+
+
+def time_batch(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def case_key(name: str, params: dict) -> str:
+    """Identifies a benchmark case across runs, e.g. game.process_action[rows=26,cols=32]."""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def record(name: str, params: dict, fn, min_time=0.5, repeats=5) -> dict:
+    """Measures one case and returns its result row."""
+    result = {"case": case_key(name, params), "name": name, "params": params}
+    result.update(measure(fn, min_time, repeats))
+    return result
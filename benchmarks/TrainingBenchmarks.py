@@ -0,0 +1,30 @@
+import numpy as np
+
+BATCH_SIZES = (1, 1000)
+
+
+def run(min_time=0.5) -> list[dict]:
+    # torch is only imported when the training cases are selected; it dominates start-up time.
+    import torch
+    from ModelHelperFunctions.QTrainer import Linear_QNet, QTrainer
+    from benchmarks.Timing import record
+
+    results = []
+    for batch_size in BATCH_SIZES:
+        torch.manual_seed(0)
+        trainer = QTrainer(Linear_QNet(11, 256, 3), lr=0.001, gamma=0.9)
+        rng = np.random.default_rng(0)
+        states = rng.integers(0, 2, size=(batch_size, 11)).astype(np.float32)
+        next_states = rng.integers(0, 2, size=(batch_size, 11)).astype(np.float32)
+        actions = np.eye(3, dtype=np.float32)[rng.integers(0, 3, size=batch_size)]
+        rewards = rng.choice(np.array([-10, 0, 10], dtype=np.float32), size=batch_size)
+        dones = rewards < 0
+        if batch_size == 1:
+            # The short-memory call shape: one transition with a bool done flag.
+            args = (states[0], actions[0], rewards[0], next_states[0], bool(dones[0]))
+        else:
+            args = (states, actions, rewards, next_states, dones)
+
+        results.append(record("qtrainer.train_step", {"batch_size": batch_size},
+                              lambda: trainer.train_step(*args), min_time))
+    return results
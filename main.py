@@ -1,43 +1,332 @@
-import pygame
-from Singlton import GAME_MANAGER
-import Scenes.MainMenuScene as startScene
+"""
+Snake with human, search and learning agents.
 
-# pygame setup
-pygame.init()
-pygame.font.init()  # Ensure the font module is initialized
+    python main.py                                   # the game, starting at the main menu
+    python main.py --scene a_star                    # straight into one scene
+    python main.py --scene hamiltonian --rows 500 --cols 500
+    python main.py --scene a_star --map maze --map-seed 7
+    python main.py --scene mcts --headless --frames 2000 --profile sampling
+    python main.py --scene hamiltonian --headless --frames 50000 --record
+    python main.py --replay SaveData/replays/hamiltonian-20250101-120000-00000.replay
+    python main.py --replay SaveData/replays/hamiltonian-20250101-120000-00000.replay --export episode.gif
+    python main.py --scene a_star --headless --frames 5000 --export SaveData/exports/a_star.gif
+    python main.py --scene arena --snakes human,a_star,hamiltonian,rl,greedy --arena-parallel processes
+    python main.py --serve --agent a_star --rows 50 --cols 64 --port 8765
+    python main.py --train rl --episodes 20000 --profile cprofile --profile-start 1000 --profile-steps 5000
+
+--rows and --cols set the board size of every game, in scenes as well as in training (the main menu can
+change it too). In a scene, the mouse wheel zooms the board, dragging with the right button pans it and
+Home shows the whole board again.
+
+--map puts walls on the board: "maze" or "rooms" generates a map of the board's size from --map-seed, and
+the path of a .map file (see Games/Maps.py for the format, Maps/ for examples) loads one, board size
+included. The main menu can pick a map too.
+
+--scene arena puts several snakes on one board, all moving at once: one per agent named in --snakes (human,
+greedy, a_star, hamiltonian, rl; the human snake is steered with the arrow keys). --arena-parallel picks
+where the agents compute their moves (serial, threads, processes or auto, see Games/ArenaAgents.py) and
+--arena-workers how many threads or processes do.
+
+--record writes every episode a scene (or --train deep_rl) finishes to SaveData/replays/, as the seed of
+its food and its moves packed four to a byte. --scene replay plays them back at any speed and seeks anywhere
+in them (--replay opens a given file); the main menu has Record and Replays buttons too.
+
+--export renders boards to an animated GIF (a path ending in .gif) or a directory of PNG frames (any other
+path), without drawing them on screen: with --replay it exports that recording and exits, with a scene it
+captures the board every frame it changes. --export-every keeps one frame in that many moves, --export-fps
+sets the GIF's playback rate and --cell-size its pixels per cell. The replay scene's Export button does the
+same for the recording on screen.
+
+--serve runs an agent (--agent) without a window and serves it on http://--host:--port/: the page there
+shows the board live and has speed, pause and restart controls, and /ws streams the board's changes over a
+WebSocket to any number of viewers (see Server/SpectatorServer.py). python -m Server.SpectatorClient is a
+command-line viewer. --speed sets the agent's moves per second to start with (0: as fast as it can).
+
+--headless runs a scene without a window, one agent step per frame and with no frame-rate cap, for
+--frames frames. --train runs headless training for --episodes episodes instead of a scene.
+
+--seed fixes the food of the scene started from the command line (or of --serve, or --train) and its agents'
+random choices, so the same command plays the same games. Searches bounded by time (MCTS) still depend on
+how fast the machine is, and the deep RL scene takes its random state from the checkpoint it resumes.
+
+--profile wraps a scene or a --train run in cProfile or the sampling profiler, from step --profile-start for
+--profile-steps steps (frames of a scene, finished episodes of a training run; by default the whole run).
+Output goes to SaveData/profiles/: .pstats and a text summary for cProfile, collapsed stacks (for
+flamegraph.pl or speedscope) and a text summary for the sampling profiler. --serve and exporting a --replay
+are not profiled. F3 shows the performance overlay in any scene.
+
+--import-report runs the same command under python -X importtime and then lists the slowest imports and
+which heavy dependencies (torch, pandas, matplotlib, networkx) were loaded. Those are only imported by the
+features that use them, so the menu and the search agents start without them.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from Games.EpisodeRecord import REPLAY_DIRECTORY
+from Games.SnakeGameLogic import DEFAULT_ROWS, DEFAULT_COLS
+
+SCENES = ("menu", "human", "hamiltonian", "a_star", "mcts", "rl", "deep_rl", "arena", "replay")
+TRAINERS = ("rl", "deep_rl")
 
 screen_width = 600
 aspect_ratio = 4/3
 
-screen = pygame.display.set_mode((screen_width, screen_width * aspect_ratio), pygame.RESIZABLE)
-clock = pygame.time.Clock()
-
-# Initialize the game manager with the main menu scene
-GAME_MANAGER.initialize(startScene.MainMenuScene(), screen_width)
-
-running = True
-dt = 0
-
-while running:
-    # poll for events
-    # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.VIDEORESIZE:
-            screen_width = event.w
-            screen = pygame.display.set_mode((screen_width, screen_width * aspect_ratio), pygame.RESIZABLE)
-            GAME_MANAGER.scene.set_scale(screen_width)
-    
-    GAME_MANAGER.scene.collect_input()
-    GAME_MANAGER.scene.process_input(dt)
-    GAME_MANAGER.scene.render_scene(screen)
-
-    # flip() the display to put your work on screen
-    pygame.display.flip()
-
-    # limits FPS to 60
-    # dt is delta time in seconds since last frame, used for framerate-independent physics.
-    dt = clock.tick(60) / 1000
-
-pygame.quit()
\ No newline at end of file
+
+def make_scene(name: str, replay_path: str = None, seed: int = None):
+    """
+    Builds a scene by name. Imports are deferred so only the chosen scene's dependencies are loaded. A seed
+    makes the scene's games (and its agents' random choices) the same on every run.
+    """
+    if name == "human":
+        from Scenes.SnakeGameHumanAgentScene import SnakeGameHumanAgentScene
+        return SnakeGameHumanAgentScene(seed=seed)
+    if name == "hamiltonian":
+        from Scenes.SnakeGameHamiltonianPathAgentScene import SnakeGameHamiltonianPathAgentScene
+        return SnakeGameHamiltonianPathAgentScene(seed=seed)
+    if name == "a_star":
+        from Scenes.SnakeGameAStarAgentScene import SnakeGameAStarAgentScene
+        return SnakeGameAStarAgentScene(seed=seed)
+    if name == "mcts":
+        from Scenes.SnakeGameMCTSAgentScene import SnakeGameMCTSAgentScene
+        return SnakeGameMCTSAgentScene(seed=seed)
+    if name == "rl":
+        from Scenes.SnakeGameRLAgent import SnakeGameRLAgent
+        return SnakeGameRLAgent(seed=seed)
+    if name == "deep_rl":
+        from Scenes.SnakeGameRL_DLAgent import SnakeGameRLAgent
+        return SnakeGameRLAgent(seed=seed)
+    if name == "arena":
+        from Scenes.SnakeGameArenaScene import SnakeGameArenaScene
+        return SnakeGameArenaScene(seed=seed)
+    if name == "replay":
+        from Scenes.SnakeGameReplayScene import SnakeGameReplayScene
+        return SnakeGameReplayScene(replay_path)
+    from Scenes.MainMenuScene import MainMenuScene
+    return MainMenuScene()
+
+
+def export_recording(args):
+    """Renders the --replay recording to --export offscreen; pygame is never started."""
+    from Games.EpisodeRecord import EpisodeRecord
+    from RenderModes.FrameExporter import export_replay
+
+    record = EpisodeRecord.load(args.replay)
+    start = time.perf_counter()
+    frames = export_replay(record, args.export, args.export_every, args.export_fps, args.cell_size)
+    elapsed = time.perf_counter() - start
+    print(f"Exported {frames} frames of {args.replay} to {args.export} in {elapsed:.1f}s "
+          f"({frames / elapsed:.0f} frames/s)")
+
+
+def run_scene(args, profiler):
+    import pygame
+    from Singlton import GAME_MANAGER
+
+    GAME_MANAGER.board_size = (args.rows, args.cols)
+    GAME_MANAGER.map_kind, GAME_MANAGER.map_seed, GAME_MANAGER.game_map = args.map, args.map_seed, args.game_map
+    GAME_MANAGER.arena_agents = args.snakes
+    GAME_MANAGER.replay_directory = args.replay_directory
+    GAME_MANAGER.arena_parallel, GAME_MANAGER.arena_workers = args.arena_parallel, args.arena_workers
+    if args.export is not None:
+        from RenderModes.FrameExporter import SceneCapture
+        GAME_MANAGER.frame_capture = SceneCapture(args.export, args.export_every, args.cell_size, args.export_fps)
+    # pygame setup
+    pygame.init()
+    pygame.font.init()  # Ensure the font module is initialized
+    screen = pygame.display.set_mode((screen_width, screen_width * aspect_ratio), pygame.RESIZABLE)
+
+    # Initialize the game manager with the starting scene
+    GAME_MANAGER.initialize(make_scene(args.scene, args.replay, args.seed), screen_width)
+
+    # Runs until the window is closed. F3 shows the performance overlay and F4 exports its metrics.
+    if args.headless:
+        start = time.perf_counter()
+        GAME_MANAGER.run(screen, aspect_ratio, fps=0, max_frames=args.frames, fixed_dt=0, profiler=profiler)
+        elapsed = time.perf_counter() - start
+        print(f"Ran {args.frames} frames of {args.scene} in {elapsed:.1f}s ({args.frames / elapsed:.0f} frames/s)")
+        print(f"Metrics written to {GAME_MANAGER.export_metrics()}")
+    else:
+        GAME_MANAGER.run(screen, aspect_ratio, profiler=profiler)
+    if GAME_MANAGER.frame_capture is not None:
+        print(f"Exported {GAME_MANAGER.frame_capture.close()} frames to {args.export}")
+
+    pygame.quit()
+
+
+def run_server(args):
+    """Serves an agent's game to spectators until interrupted."""
+    import asyncio
+    from Server.SpectatorServer import Simulation, SpectatorServer
+
+    simulation = Simulation(args.agent, args.rows, args.cols, game_map=args.game_map, seed=args.seed,
+                            replay_directory=args.replay_directory, speed=args.speed)
+    try:
+        asyncio.run(SpectatorServer(simulation, args.host, args.port).serve())
+    except KeyboardInterrupt:
+        print(f"Stopped after {simulation.steps} moves")
+
+
+def run_training(args, profiler):
+    """Headless training of the tabular or deep RL agent for args.episodes episodes; nothing is saved."""
+    import numpy as np
+
+    start = time.perf_counter()
+    scores = []
+    if args.train == "rl":
+        from ModelHelperFunctions.QTable import QTable
+        from ModelHelperFunctions.StateEncoders import STATE_ENCODERS
+        from Scenes.SnakeGameRLAgent import TabularTrainer, STATE_ENCODER
+
+        q_table = QTable(args.rows, args.cols, encoder=STATE_ENCODERS[STATE_ENCODER](args.rows, args.cols))
+        trainer = TabularTrainer(q_table, seed=args.seed, game_map=args.game_map)
+        if profiler is not None:
+            profiler.step(0)
+        while len(scores) < args.episodes:
+            finished = trainer.run(1)
+            scores.extend(finished)
+            if profiler is not None:
+                profiler.step(len(finished))
+        steps = trainer.steps
+    else:
+        from Games.SnakeGameEnv import SnakeGameEnv
+        from Scenes.SnakeGameRL_DLAgent import DeepRLAgent, play_training_step
+
+        agent = DeepRLAgent(args.seed, network=args.network, rows=args.rows, cols=args.cols)
+        env = SnakeGameEnv(rows=args.rows, cols=args.cols, seed=args.seed, observation_type=agent.observation_type,
+                           game_map=args.game_map, replay_directory=args.replay_directory)
+        if profiler is not None:
+            profiler.step(0)
+        while len(scores) < args.episodes:
+            score = play_training_step(agent, env)
+            if score is not None:
+                scores.append(score)
+                if profiler is not None:
+                    profiler.step()
+        steps = agent.n_steps
+
+    elapsed = time.perf_counter() - start
+    tail = scores[-max(1, len(scores) // 10):]
+    print(f"Trained {args.train} for {len(scores)} episodes, {steps} steps in {elapsed:.1f}s "
+          f"({steps / elapsed:.0f} steps/s); mean score of the last {len(tail)}: {np.mean(tail):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scene", choices=SCENES, default="menu")
+    parser.add_argument("--headless", action="store_true", help="run the scene without a window")
+    parser.add_argument("--frames", type=int, default=1000, help="frames to run with --headless")
+    parser.add_argument("--train", choices=TRAINERS, help="train an agent headlessly instead of running a scene")
+    parser.add_argument("--episodes", type=int, default=1000, help="episodes to train with --train")
+    parser.add_argument("--network", choices=("linear", "conv"), default="linear", help="network for --train deep_rl")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="board rows")
+    parser.add_argument("--cols", type=int, default=DEFAULT_COLS, help="board columns")
+    parser.add_argument("--map", default="none", help="walls: none, maze, rooms or the path of a .map file")
+    parser.add_argument("--map-seed", type=int, help="seed of a generated --map (default: random)")
+    parser.add_argument("--snakes", default="human,a_star,hamiltonian,rl",
+                        help="comma-separated agents of the arena's snakes")
+    parser.add_argument("--arena-parallel", choices=("auto", "serial", "threads", "processes"), default="auto",
+                        help="where the arena's agents compute their moves")
+    parser.add_argument("--arena-workers", type=int, help="threads or processes of --arena-parallel")
+    parser.add_argument("--record", action="store_true",
+                        help=f"write every finished episode to {REPLAY_DIRECTORY} for --scene replay")
+    parser.add_argument("--replay", help="the .replay file --scene replay opens (default: the newest)")
+    parser.add_argument("--serve", action="store_true", help="serve an agent's game to browsers over HTTP")
+    parser.add_argument("--agent", default="hamiltonian", help="the agent --serve runs")
+    parser.add_argument("--host", default="127.0.0.1", help="address --serve listens on")
+    parser.add_argument("--port", type=int, default=8765, help="port --serve listens on")
+    parser.add_argument("--speed", type=float, default=20, help="moves per second of --serve (0: unlimited)")
+    parser.add_argument("--export", help="write the boards to this .gif or PNG frame directory")
+    parser.add_argument("--export-every", type=int, default=1, help="moves per exported frame")
+    parser.add_argument("--export-fps", type=float, default=30, help="playback rate of an exported GIF")
+    parser.add_argument("--cell-size", type=int, help="pixels per cell of exported frames (default: fit 512)")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the scene's games and agents, --serve or --train (default: random)")
+    parser.add_argument("--profile", choices=("cprofile", "sampling"))
+    parser.add_argument("--profile-start", type=int, default=0, help="steps to run before profiling starts")
+    parser.add_argument("--profile-steps", type=int, help="steps to profile (default: the rest of the run)")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="seconds between samples of the sampling profiler")
+    parser.add_argument("--import-report", action="store_true",
+                        help="run under python -X importtime and summarise where start-up time goes")
+    args = parser.parse_args()
+    if args.replay is not None:
+        args.scene = "replay"
+    if args.headless and args.scene == "menu":
+        parser.error("--headless needs an agent --scene")
+    if args.rows < 2 or args.cols < 2:
+        parser.error("the board needs at least 2 rows and 2 columns")
+    if args.record and args.train == "rl":
+        parser.error("--record: the tabular trainer steps its games in batches and keeps no episode records")
+    args.replay_directory = REPLAY_DIRECTORY if args.record else None
+    if args.serve:
+        from Server.SpectatorServer import SERVED_AGENTS
+        if args.agent not in SERVED_AGENTS:
+            parser.error(f"--agent: expected one of {list(SERVED_AGENTS)}")
+        if args.speed < 0:
+            parser.error("--speed can't be negative")
+        if args.train or args.headless or args.export is not None or args.profile:
+            parser.error("--serve runs on its own, without --train, --headless, --export or --profile")
+    if args.export is not None and args.train:
+        parser.error("--export needs a scene or a --replay, not --train")
+    if args.export is not None and args.replay is not None and args.profile:
+        parser.error("--profile profiles a scene or a --train run, not exporting a --replay")
+    if args.export is not None and importlib.util.find_spec("PIL") is None:
+        parser.error("--export needs Pillow (pip install -r requirements.txt)")
+    if args.export_every < 1 or args.export_fps <= 0 or (args.cell_size is not None and args.cell_size < 1):
+        parser.error("--export-every and --cell-size must be at least 1, --export-fps positive")
+    args.snakes = tuple(name.strip() for name in args.snakes.split(",") if name.strip())
+    if not args.snakes:
+        parser.error("--snakes needs at least one agent")
+    if args.scene == "arena":
+        from Games.ArenaAgents import ARENA_AGENTS
+        unknown = [name for name in args.snakes if name not in ARENA_AGENTS]
+        if unknown:
+            parser.error(f"--snakes: unknown agents {unknown}, expected some of {list(ARENA_AGENTS)}")
+    args.game_map = None
+    if args.map != "none":
+        from Games.Maps import make_map
+        if args.map_seed is None:
+            args.map_seed = random.getrandbits(32)
+        try:
+            args.game_map = make_map(args.map, args.rows, args.cols, args.map_seed)
+        except (OSError, ValueError) as error:
+            parser.error(f"--map {args.map}: {error}")
+        args.rows, args.cols = args.game_map.rows, args.game_map.cols
+
+    if args.headless or args.train:
+        # Must be set before pygame and matplotlib are first imported.
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        os.environ.setdefault("MPLBACKEND", "Agg")
+
+    if args.import_report:
+        from PerformanceHelperFunctions.ImportTiming import run_with_import_report
+        # The child inherits the environment set above and runs the same command without this flag.
+        arguments = [argument for argument in sys.argv[1:] if argument != "--import-report"]
+        sys.exit(run_with_import_report(os.path.abspath(__file__), arguments))
+
+    profiler = None
+    if args.profile:
+        from PerformanceHelperFunctions.Profiling import ProfileWindow
+        label = f"train-{args.train}" if args.train else args.scene
+        profiler = ProfileWindow(args.profile, label, args.profile_start, args.profile_steps, args.profile_interval)
+
+    try:
+        if args.train:
+            run_training(args, profiler)
+        elif args.serve:
+            run_server(args)
+        elif args.replay is not None and args.export is not None:
+            export_recording(args)
+        else:
+            run_scene(args, profiler)
+    finally:
+        if profiler is not None:
+            profiler.close()
+
+
+if __name__ == "__main__":
+    main()
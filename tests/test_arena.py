@@ -0,0 +1,47 @@
+import unittest
+from Games.Arena import ArenaState
+from Games.SnakeGameState import CELL_EMPTY, CELL_SNAKE, DOWN, RIGHT, STEP_DIED, STEP_MOVED
+
+
+def place_snakes(arena: ArenaState, bodies: list[list[tuple[int, int]]]):
+    """Clears the board (food included) and lays out every snake's body, given from tail to head."""
+    arena.cells[:] = bytes(arena.capacity)
+    arena.owner.fill(-1)
+    arena.foods = []
+    for k, body in enumerate(bodies):
+        snake = arena.snakes[k]
+        cells = [row * arena.cols + col for row, col in body]
+        for slot, cell in enumerate(cells):
+            snake.body[slot] = cell
+            arena.cells[cell] = CELL_SNAKE
+            arena.owner[cell] = k
+        snake.tail_slot = 0
+        snake.length = len(cells)
+        snake.head = cells[-1]
+        snake.pending_growth = 0
+        arena.heads[k] = cells[-1]
+    arena.assign_food()
+
+
+class ArenaStepTest(unittest.TestCase):
+
+    def test_head_entering_a_tail_that_moves_away_dies(self):
+        # A tick checks the board as it was when the tick started, so a tail counts as occupied even if its
+        # snake moves it away in the same tick (as for a single snake).
+        arena = ArenaState(10, 10, 2, seed=0)
+        place_snakes(arena, [[(2, 3), (3, 3), (4, 3)], [(5, 3), (5, 4), (5, 5)]])
+        results = arena.step([DOWN, RIGHT])
+        self.assertEqual(results.tolist(), [STEP_DIED, STEP_MOVED])
+        self.assertEqual(arena.cells[5 * 10 + 3], CELL_EMPTY)
+        self.assertEqual(arena.snakes[1].head, 5 * 10 + 6)
+
+    def test_heads_entering_the_same_cell_all_die(self):
+        arena = ArenaState(10, 10, 2, seed=0)
+        place_snakes(arena, [[(2, 1), (2, 2), (2, 3)], [(0, 4), (1, 4)]])
+        results = arena.step([RIGHT, DOWN])
+        self.assertEqual(results.tolist(), [STEP_DIED, STEP_DIED])
+        self.assertTrue(arena.is_over)
+
+
+if __name__ == "__main__":
+    unittest.main()